@@ -0,0 +1,388 @@
+"""Run a Pipeline over many images without the GUI
+
+Usage:
+    python main.py batch --pipeline spec.json --input imgs/ --output out/
+    python main.py batch --pipeline GaussianBlur --input imgs/ --output out/
+    python batch.py --pipeline my_module:my_pipeline --input imgs/ --output out/
+    python main.py batch --pipeline spec.json --input frames/ --output out/ \
+        --batch-size 64
+
+No QApplication is created; images are spread over a process pool and each
+result is written to disk as soon as it is ready. With ``--batch-size``
+images are pushed through the pipeline a stack at a time instead; see
+``models.batching``.
+"""
+import argparse
+import importlib
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+import cv2
+
+from models.base_transform import BaseTransform
+from models.image_io import read_image
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.window import Window
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# Pipeline built by _init_worker in each worker process
+_worker_pipeline = None
+
+
+class BatchResult(NamedTuple):
+    """Outcome of running the pipeline on one image"""
+
+    path: str
+    out_path: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+
+
+def load_pipeline(name: str, img_path: Union[str, Path]) -> Pipeline:
+    """Return the Pipeline described by ``name``
+
+    Args:
+        name (str): Either a pipeline spec saved with ``Pipeline.save``
+            (``*.json``), the name of a builtin transform window, eg:
+            ``GaussianBlur``, or ``module:attr`` where attr is a Pipeline,
+            Window, BaseTransform, list of those, or a callable returning one
+        img_path (str, Path): Image used to initialize the pipeline's loader
+
+    Returns:
+        Pipeline: the pipeline
+    """
+    if name.endswith(".json"):
+        return Pipeline.load(name, image_path=img_path)
+
+    if ":" not in name:
+        from models.transform_windows import _TRANS_WINDOWS, get_transform_window
+
+        for transform in _TRANS_WINDOWS:
+            if transform.__name__ == name:
+                return Pipeline(get_transform_window(transform, str(img_path)))
+        raise ValueError(f"Unknown builtin pipeline: {name}")
+
+    module_name, attr = name.split(":", 1)
+    obj = getattr(importlib.import_module(module_name), attr)
+    if callable(obj) and not isinstance(obj, (Pipeline, Window, BaseTransform)):
+        obj = obj()
+    if isinstance(obj, Pipeline):
+        return obj
+    return Pipeline(obj)
+
+
+def collect_images(input_path: Union[str, Path]) -> List[Path]:
+    """Return sorted image paths in directory ``input_path``, or the file itself"""
+    input_path = Path(input_path)
+    if input_path.is_file():
+        return [input_path]
+    if not input_path.is_dir():
+        raise FileNotFoundError(input_path)
+    return sorted(
+        path for path in input_path.iterdir() if config.is_valid_image(str(path))
+    )
+
+
+def process_image(
+    pipeline: Pipeline,
+    img_path: Union[str, Path],
+    out_dir: Union[str, Path],
+    ext: Optional[str] = None,
+    tile_size: Optional[int] = None,
+    tile_workers: Optional[int] = None,
+) -> BatchResult:
+    """Run ``pipeline`` on the image at ``img_path`` and write the result
+
+    If the pipeline starts with a LoadImage, that transform loads the image;
+    otherwise the image is passed to the first transform. With ``tile_size``
+    the image is processed tile by tile instead; see ``models.tiling``.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run
+        img_path (str, Path): Input image
+        out_dir (str, Path): Directory the output image is written to
+        ext (str, optional): Output extension, eg: ``.png``. Default is the
+            extension of ``img_path``.
+        tile_size (int, optional): Process the image in tiles of this size
+        tile_workers (int, optional): Number of tiles processed at once.
+            Default is ``[Performance] processing_threads``.
+
+    Returns:
+        BatchResult: result for this image
+    """
+    img_path = Path(img_path)
+    out_path = Path(out_dir) / (img_path.stem + (ext or img_path.suffix))
+    start = time.perf_counter()
+    try:
+        source = pipeline.windows[0].transforms[0]
+        if tile_size:
+            img = read_image(img_path)
+            if img is None:
+                raise ValueError(f"Unable to read image: {img_path}")
+            img_out = pipeline.run_tiled(
+                img, tile_size=tile_size, workers=tile_workers
+            )
+        elif isinstance(source, LoadImage):
+            source.load(str(img_path))
+            img_out, _ = pipeline.run_pipeline()
+        else:
+            img = read_image(img_path)
+            if img is None:
+                raise ValueError(f"Unable to read image: {img_path}")
+            img_out, _ = pipeline.run_pipeline(img_in=img)
+
+        errors = [
+            f"{transform.__class__.__name__}: {transform.error.strip().splitlines()[-1]}"
+            for window in pipeline.windows
+            for transform in window.transforms
+            if transform.error is not None
+        ]
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        if not cv2.imwrite(str(out_path), img_out):
+            raise ValueError(f"Unable to write image: {out_path}")
+    except Exception as e:
+        return BatchResult(str(img_path), None, time.perf_counter() - start, str(e))
+    finally:
+        # Results are not reused across images, so don't hold on to them
+        pipeline.clear_cache()
+    return BatchResult(str(img_path), str(out_path), time.perf_counter() - start)
+
+
+def process_batch(
+    pipeline: Pipeline,
+    img_paths: List[Union[str, Path]],
+    out_dir: Union[str, Path],
+    ext: Optional[str] = None,
+) -> List[BatchResult]:
+    """Run ``pipeline`` on the images at ``img_paths`` at once and write the results
+
+    The images are stacked and run with ``Pipeline.run_batch``, which is
+    fastest for many small images of the same size. The pipeline's source
+    transform, eg: LoadImage, is skipped. Each image is timed as an equal
+    share of the whole batch.
+
+    Returns:
+        list: BatchResult of each image, in order
+    """
+    start = time.perf_counter()
+    img_paths = [Path(path) for path in img_paths]
+    imgs = []
+    errors = {}
+    for img_path in img_paths:
+        img = read_image(img_path)
+        if img is None:
+            errors[img_path] = f"Unable to read image: {img_path}"
+        else:
+            imgs.append(img)
+    paths = [path for path in img_paths if path not in errors]
+    outputs = []
+    if imgs:
+        try:
+            outputs, _ = pipeline.run_batch(imgs)
+        except Exception as e:
+            log.debug("Batch of %s images failed", len(imgs), exc_info=True)
+            errors.update((path, str(e)) for path in paths)
+
+    out_paths = {}
+    for img_path, img_out in zip(paths, outputs):
+        out_path = Path(out_dir) / (img_path.stem + (ext or img_path.suffix))
+        if cv2.imwrite(str(out_path), img_out):
+            out_paths[img_path] = str(out_path)
+        else:
+            errors[img_path] = f"Unable to write image: {out_path}"
+
+    seconds = (time.perf_counter() - start) / len(img_paths)
+    return [
+        BatchResult(str(path), out_paths.get(path), seconds, errors.get(path))
+        for path in img_paths
+    ]
+
+
+def _init_worker(name: str, img_path: str):
+    global _worker_pipeline
+    _worker_pipeline = load_pipeline(name, img_path)
+
+
+def _process_in_worker(
+    img_path: str, out_dir: str, ext: Optional[str], tile_size: Optional[int]
+) -> BatchResult:
+    # Images are already spread over the processes; don't also spread tiles
+    return process_image(_worker_pipeline, img_path, out_dir, ext, tile_size, 1)
+
+
+def _process_batch_in_worker(
+    img_paths: List[str], out_dir: str, ext: Optional[str]
+) -> List[BatchResult]:
+    return process_batch(_worker_pipeline, img_paths, out_dir, ext)
+
+
+def run_batch(
+    pipeline: str,
+    input_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    workers: Optional[int] = None,
+    ext: Optional[str] = None,
+    tile_size: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """Run ``pipeline`` on every image in ``input_path``
+
+    Results are yielded as each image finishes, not in input order.
+
+    Args:
+        pipeline (str): Pipeline spec path or name, see ``load_pipeline``. A
+            name rather than a Pipeline is taken because each worker process
+            builds its own copy.
+        input_path (str, Path): Directory of images, or a single image
+        output_dir (str, Path): Directory to write the results to; created
+            if needed
+        workers (int, optional): Number of worker processes; 0 runs in this
+            process. Default is ``[Performance] processing_threads``.
+        ext (str, optional): Output extension. Default keeps the input's.
+        tile_size (int, optional): Process each image in tiles of this size,
+            see ``process_image``
+        batch_size (int, optional): Process this many images at once, see
+            ``process_batch``. Can't be combined with ``tile_size``.
+
+    Yields:
+        BatchResult: result for each image
+    """
+    images = collect_images(input_path)
+    if not images:
+        return
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if workers is None:
+        workers = config.get_processing_threads()
+    if batch_size and tile_size:
+        raise ValueError("batch_size and tile_size can't be combined")
+    batches = []
+    if batch_size:
+        batches = [
+            [str(path) for path in images[i : i + batch_size]]
+            for i in range(0, len(images), batch_size)
+        ]
+
+    if workers <= 0:
+        pipe = load_pipeline(pipeline, images[0])
+        if batches:
+            for batch in batches:
+                yield from process_batch(pipe, batch, output_dir, ext)
+        else:
+            for img_path in images:
+                yield process_image(pipe, img_path, output_dir, ext, tile_size)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(pipeline, str(images[0])),
+    ) as executor:
+        if batches:
+            futures = [
+                executor.submit(_process_batch_in_worker, batch, str(output_dir), ext)
+                for batch in batches
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+            return
+        futures = [
+            executor.submit(
+                _process_in_worker, str(path), str(output_dir), ext, tile_size
+            )
+            for path in images
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Batch entrypoint; returns the number of images that failed"""
+    parser = argparse.ArgumentParser("OpenCV Playground Batch")
+    parser.add_argument(
+        "--pipeline",
+        required=True,
+        help="Pipeline spec (.json), builtin transform name, eg: GaussianBlur, "
+        "or module:attr",
+    )
+    parser.add_argument(
+        "--input", required=True, help="Directory of images or a single image"
+    )
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes; 0 runs in this process. "
+        "Default is [Performance] processing_threads",
+    )
+    parser.add_argument(
+        "--ext", default=None, help="Output extension, eg: .png. Default keeps the input's"
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        default=None,
+        help="Process each image in tiles of this many pixels, bounding memory "
+        "use for very large images. Every transform must be local, eg: filters",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Push this many images through the pipeline at once, amortizing "
+        "the per image overhead of many small images of the same size",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
+        help="Log Level",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format=config.get_log_format(), level=args.log_level)
+    if args.batch_size and args.tile_size:
+        parser.error("--batch-size and --tile-size can't be combined")
+
+    failed = 0
+    total = 0.0
+    count = 0
+    batch_start = time.perf_counter()
+    results = run_batch(
+        args.pipeline,
+        args.input,
+        args.output,
+        args.workers,
+        args.ext,
+        args.tile_size,
+        args.batch_size,
+    )
+    for result in results:
+        count += 1
+        total += result.seconds
+        if result.error is None:
+            print(f"{result.path} -> {result.out_path} {result.seconds * 1000:.1f} ms")
+        else:
+            failed += 1
+            print(f"{result.path} FAILED {result.seconds * 1000:.1f} ms: {result.error}")
+        sys.stdout.flush()
+
+    elapsed = time.perf_counter() - batch_start
+    mean = total / count * 1000 if count else 0.0
+    print(
+        f"{count} images, {failed} failed, {elapsed:.2f} s total, "
+        f"{mean:.1f} ms mean per image"
+    )
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""Benchmark the builtin transform pipelines without the GUI
+
+Usage:
+    python main.py benchmark --output bench.json
+    python main.py benchmark --transforms GaussianBlur,Canny --sizes 0.3,2
+    python benchmark.py --compare baseline.json --output bench.json
+
+Every pipeline in ``transform_windows._TRANS_WINDOWS`` is run on synthetic
+images of each size, dtype and channel count. Each case runs in a fresh
+process so its peak RSS isn't inflated by the cases before it; ``rss_before``
+is the RSS once the image is built and ``peak_rss`` the peak while the
+pipeline runs. Transform
+caches are cleared before every run, so each run recomputes the whole
+pipeline, and the QImage conversion done to display the output is timed too.
+
+The results are written as JSON. With ``--compare``, cases whose median
+latency grew by more than ``--threshold`` are reported and the exit status
+is non zero, so regressions in the pipeline's overhead can be caught.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# Megapixels of the synthetic images
+SIZES = (0.3, 2, 12, 48)
+DTYPES = ("uint8", "float32")
+CHANNELS = (1, 3)
+
+
+class Case(NamedTuple):
+    """One pipeline run on one kind of synthetic image"""
+
+    pipeline: str
+    # None for pipelines that generate their own input, eg: Kmeans
+    megapixels: Optional[float]
+    dtype: Optional[str]
+    channels: Optional[int]
+
+    @property
+    def key(self) -> str:
+        """Identifies the case across benchmark runs"""
+        if self.megapixels is None:
+            return self.pipeline
+        return f"{self.pipeline}/{self.megapixels}MP/{self.dtype}/{self.channels}ch"
+
+
+def get_pipeline_names() -> List[str]:
+    """Return the names of the builtin pipelines, eg: ``GaussianBlur``"""
+    from models.transform_windows import collect_builtin_transforms
+
+    return [transform.__name__ for transform in collect_builtin_transforms()]
+
+
+def takes_image(name: str) -> bool:
+    """Return True if builtin pipeline ``name`` starts by loading an image"""
+    from models import support_transforms as supt
+    from models.transform_windows import _TRANS_WINDOWS
+
+    for transform, transforms in _TRANS_WINDOWS.items():
+        if transform.__name__ == name:
+            return transforms[0] is supt.LoadImage
+    raise ValueError(f"Unknown builtin pipeline: {name}")
+
+
+def iter_cases(
+    names: List[str], sizes=SIZES, dtypes=DTYPES, channels=CHANNELS
+) -> Iterator[Case]:
+    """Yield the cases of every pipeline in ``names``"""
+    for name in names:
+        if not takes_image(name):
+            yield Case(name, None, None, None)
+            continue
+        for megapixels in sizes:
+            for dtype in dtypes:
+                for num_channels in channels:
+                    yield Case(name, megapixels, dtype, num_channels)
+
+
+def make_image(megapixels: float, dtype: str, channels: int, seed: int = 0) -> np.ndarray:
+    """Return a reproducible 4:3 test image of about ``megapixels``
+
+    The image has smooth gradients, hard edged shapes and noise, so edge,
+    line and corner detectors have something to find.
+    """
+    height = int(round((megapixels * 1e6 * 3 / 4) ** 0.5))
+    width = int(round(height * 4 / 3))
+    rng = np.random.default_rng(seed)
+
+    ramp_x = np.linspace(0, 255, width, dtype=np.float32)
+    ramp_y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[..., 0] = ramp_x
+    img[..., 1] = ramp_y
+    img[..., 2] = (ramp_x + ramp_y) / 2
+
+    scale = max(1, min(height, width) // 100)
+    for _ in range(40):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(2, 20)) * scale
+        if rng.random() < 0.5:
+            cv2.circle(img, (x, y), size, color, -1)
+        else:
+            cv2.rectangle(img, (x, y), (x + size, y + size), color, -1)
+    cv2.add(img, rng.integers(0, 16, img.shape, dtype=np.uint8), dst=img)
+
+    if channels == 1:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if dtype == "float32":
+        img = img.astype(np.float32)
+        img *= 1 / 255
+    return img
+
+
+def run_case(case: Case, repeat: int = 5, warmup: int = 1, max_seconds: float = 30) -> dict:
+    """Benchmark ``case`` in this process and return its results
+
+    Runs ``warmup`` untimed runs, then up to ``repeat`` timed runs, stopping
+    early once ``max_seconds`` have been spent on timed runs (at least one run
+    is always timed).
+    """
+    from models.pipeline import Pipeline
+    from models.transform_windows import _TRANS_WINDOWS, get_transform_window
+    from views.display import DisplayConverter
+
+    transform = next(t for t in _TRANS_WINDOWS if t.__name__ == case.pipeline)
+    pipeline = Pipeline(get_transform_window(transform, None))
+    transforms = pipeline.windows[0].transforms
+
+    if case.megapixels is None:
+        img, transform_index = None, 0
+    else:
+        img = make_image(case.megapixels, case.dtype, case.channels)
+        # Skip the loader; the image goes to the first real transform
+        transform_index = 1
+    # Leave the memory used to build the image out of the peak where possible
+    _reset_peak_rss()
+    rss_before = _get_peak_rss()
+
+    # Like an ImageViewer, reuse one converter across redraws
+    converter = DisplayConverter()
+    latencies, display, stages = [], [], {}
+    spent = 0.0
+    for i in range(warmup + repeat):
+        pipeline.clear_cache()
+        start = time.perf_counter()
+        img_out, _ = pipeline.run_pipeline(transform_index=transform_index, img_in=img)
+        end = time.perf_counter()
+        converter.to_qimage(img_out)
+        shown = time.perf_counter()
+        if i < warmup:
+            continue
+
+        latencies.append(end - start)
+        display.append(shown - end)
+        for t in transforms[transform_index:]:
+            if t.stats is not None:
+                stages.setdefault(t.__class__.__name__, []).append(t.stats.wall_time)
+        spent += shown - start
+        if spent > max_seconds:
+            break
+
+    errors = [
+        f"{t.__class__.__name__}: {t.error.strip().splitlines()[-1]}"
+        for t in transforms
+        if t.error is not None
+    ]
+    return {
+        "key": case.key,
+        **case._asdict(),
+        "shape": None if img is None else list(img.shape),
+        "transforms": [t.__class__.__name__ for t in transforms],
+        "runs": len(latencies),
+        "latency": _summarize(latencies),
+        "display": _summarize(display),
+        "stages": {name: _summarize(times) for name, times in stages.items()},
+        "rss_before": rss_before,
+        "peak_rss": _get_peak_rss(),
+        "errors": errors,
+    }
+
+
+def run_benchmark(
+    cases: List[Case],
+    repeat: int = 5,
+    warmup: int = 1,
+    max_seconds: float = 30,
+    isolate: bool = True,
+) -> Iterator[dict]:
+    """Run every case and yield its results in order
+
+    Args:
+        cases (list): Cases to run, see ``iter_cases``
+        isolate (bool, optional): Run each case in a new process so its peak
+            RSS is its own. If False, all cases run in this process; outside
+            Linux, where the peak can't be reset, ``peak_rss`` is then the
+            largest seen so far.
+    """
+    if not isolate:
+        for case in cases:
+            yield run_case(case, repeat, warmup, max_seconds)
+        return
+
+    # Spawned rather than forked so the peak RSS doesn't start at this process's
+    context = multiprocessing.get_context("spawn")
+    level = logging.getLogger().getEffectiveLevel()
+    for case in cases:
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(level,),
+        ) as executor:
+            yield executor.submit(run_case, case, repeat, warmup, max_seconds).result()
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[str]:
+    """Return a line for each case whose median latency regressed
+
+    A case regressed if its median is more than ``threshold`` times the
+    median of the same case in ``baseline``.
+    """
+    previous = {result["key"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result["key"])
+        if old is None or not old["latency"]["median"]:
+            continue
+        ratio = result["latency"]["median"] / old["latency"]["median"]
+        if ratio > threshold:
+            regressions.append(
+                f"{result['key']}: {old['latency']['median'] * 1000:.1f} ms -> "
+                f"{result['latency']['median'] * 1000:.1f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def get_environment() -> dict:
+    """Return the versions and machine the benchmark ran on"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "cv2_threads": cv2.getNumThreads(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def _init_worker(level: int):
+    logging.basicConfig(format=config.get_log_format(), level=level)
+
+
+def _summarize(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {"median": None, "p95": None, "min": None}
+    return {
+        "median": float(np.median(seconds)),
+        "p95": float(np.percentile(seconds, 95)),
+        "min": float(np.min(seconds)),
+    }
+
+
+def _reset_peak_rss():
+    """Restart the peak RSS from the current RSS; only supported on Linux"""
+    try:
+        with open("/proc/self/clear_refs", "w") as fp:
+            fp.write("5")
+    except OSError:
+        log.debug("Can't reset the peak RSS; it includes building the image")
+
+
+def _get_peak_rss() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes"""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _split(value: str, convert=str) -> list:
+    return [convert(item) for item in value.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Benchmark entrypoint; returns the number of regressed cases"""
+    parser = argparse.ArgumentParser("OpenCV Playground Benchmark")
+    parser.add_argument(
+        "--transforms",
+        default=None,
+        help="Comma separated builtin pipelines, eg: GaussianBlur,Canny. "
+        "Default is all of them",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in SIZES),
+        help="Comma separated image sizes in megapixels",
+    )
+    parser.add_argument(
+        "--dtypes", default=",".join(DTYPES), help="Comma separated image dtypes"
+    )
+    parser.add_argument(
+        "--channels",
+        default=",".join(str(c) for c in CHANNELS),
+        help="Comma separated channel counts; 1 is gray, 3 is BGR",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=30,
+        help="Stop timing a case after this many seconds, even if fewer than "
+        "--repeat runs were made",
+    )
+    parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="Run every case in this process; faster, but peak RSS is shared",
+    )
+    parser.add_argument(
+        "--output", default=None, help="JSON file to write. Default prints it"
+    )
+    parser.add_argument(
+        "--compare", default=None, help="Previous JSON output to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Median latency ratio over the --compare baseline that counts "
+        "as a regression",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="CRITICAL",
+        choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
+        help="Log Level. Transform errors, eg: unsupported dtypes, are "
+        "recorded in the results either way",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format=config.get_log_format(), level=args.log_level)
+
+    names = _split(args.transforms) if args.transforms else get_pipeline_names()
+    cases = list(
+        iter_cases(
+            names,
+            _split(args.sizes, float),
+            _split(args.dtypes),
+            _split(args.channels, int),
+        )
+    )
+    results = []
+    for i, result in enumerate(
+        run_benchmark(cases, args.repeat, args.warmup, args.max_seconds, not args.no_isolate)
+    ):
+        results.append(result)
+        latency = result["latency"]
+        peak = result["peak_rss"]
+        print(
+            f"[{i + 1}/{len(cases)}] {result['key']}: "
+            f"median {latency['median'] * 1000:.1f} ms, "
+            f"p95 {latency['p95'] * 1000:.1f} ms, "
+            f"display {result['display']['median'] * 1000:.1f} ms"
+            + (f", peak RSS {peak / 2 ** 20:.0f} MB" if peak is not None else "")
+            + (" (errors)" if result["errors"] else ""),
+            file=sys.stderr,
+        )
+
+    report = json.dumps(
+        {"environment": get_environment(), "results": results}, indent=2
+    )
+    if args.output:
+        Path(args.output).write_text(report)
+    else:
+        print(report)
+
+    if not args.compare:
+        return 0
+    baseline = json.loads(Path(args.compare).read_text())["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return len(regressions)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,19 +2,25 @@ import logging
 from pathlib import Path
 import os
 
-from jinja2 import Environment, FileSystemLoader
-from jinja2.exceptions import TemplateNotFound
-
 log = logging.getLogger(__name__)
 
 ROOT = Path(__file__)
 RENDERED_DIR = ROOT.parent.joinpath("rendered_docs/")
 TEMPLATE_DIR = ROOT.parent.joinpath("templates/")
-print(RENDERED_DIR)
-print(TEMPLATE_DIR)
 
-# Create Jinja2 environment for templates
-env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+# Jinja2 environment for templates, created on first render
+_env = None
+
+
+def _get_env():
+    """Return the Jinja2 environment, creating it and the doc folders if needed"""
+    global _env
+    if _env is None:
+        from jinja2 import Environment, FileSystemLoader
+
+        _create_rendered_docs()
+        _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+    return _env
 
 def _create_rendered_docs():
     """Create rendered_docs folder if it doesn't exist"""
@@ -30,6 +36,9 @@ def _create_rendered_docs():
 
 def get_template(template_name):
     """Helper to get a template, falling back to error template if not found"""
+    from jinja2.exceptions import TemplateNotFound
+
+    env = _get_env()
     try:
         return env.get_template(template_name)
     except TemplateNotFound:
@@ -43,9 +52,10 @@ def render_local_doc(folder, doc_fname):
     seems to be a bug which doesn't load local resources when that method is
     used. It works properly when loaded from a local file.
     """
+    from jinja2.exceptions import TemplateNotFound
+
     try:
-        template = env.get_template(doc_fname)
-        log.error(f"Template not found: {template}")
+        template = _get_env().get_template(doc_fname)
         html = template.render()
     except TemplateNotFound:
         # Create a simple error template if none exists
@@ -53,10 +63,7 @@ def render_local_doc(folder, doc_fname):
         log.error(f"Template not found: {doc_fname}")
 
     path = folder.joinpath(doc_fname)
-    print(path)
     with open(path, "w", encoding="utf-8") as fout:
         fout.write(html)
         log.debug("Wrote Doc: %s", path)
 
-# Create rendered docs folder if it doesn't exist
-_create_rendered_docs()
@@ -1,14 +1,14 @@
 import argparse
 import logging
-from logging import config
 from pathlib import Path
 from typing import Union, Optional
 
-from PySide6 import QtCore, QtWidgets  # Updated import
+# Imported first so --profile-startup times include the imports below
+from .utils.startup_profile import StartupProfiler
+from .utils.config_manager import config
 
-from .doc_viewer import DocWindow  # GUI related import
-from .main import MainWindow  # GUI related import
-from .pipeline_launcher import LOG_FORMAT
+# Qt, the main window and the doc viewer are imported when first needed so
+# that parsing arguments and reporting errors stays fast
 
 def get_file_path(rel_path: Union[str, Path]) -> Path:
     """
@@ -25,20 +25,32 @@ def get_file_path(rel_path: Union[str, Path]) -> Path:
     return current_file_path.parent.joinpath(relative_path)
 
 
-def run_playground(args: argparse.Namespace) -> None:
+def run_playground(args: argparse.Namespace, profiler: Optional[StartupProfiler] = None) -> None:
     """Run the playground"""
+    if profiler is None:
+        profiler = StartupProfiler()
     img_path = args.image
     if img_path is None:
         pass
     else:
         _validate_image_path(img_path)
-        
+
+    from PySide6 import QtCore, QtWidgets  # GUI related import
+    profiler.mark("Qt imports")
+
     app = QtWidgets.QApplication.instance()  # GUI related code
     if app is None:
         app = QtWidgets.QApplication([])  # GUI related code
+    profiler.mark("QApplication")
+
+    from .main import MainWindow  # GUI related import
+    profiler.mark("main window imports")
+
     main_window = MainWindow(img_path, args.no_docs, args.disable_info_widgets)  # GUI related code
     main_window.setAttribute(QtCore.Qt.WidgetAttribute.WA_AcceptTouchEvents, False)  # GUI related code
     main_window.show()  # GUI related code
+    profiler.mark("main window")
+    profiler.watch_first_paint(main_window)
     app.exec()  # Updated to use PySide6 style
 
 
@@ -53,7 +65,10 @@ def docview() -> None:
     )
 
     args = parser.parse_args()
-    
+
+    from PySide6 import QtWidgets  # GUI related import
+    from .doc_viewer import DocWindow  # GUI related import
+
     app = QtWidgets.QApplication.instance()  # GUI related code
     if app is None:
         app = QtWidgets.QApplication([])  # GUI related code
@@ -82,7 +97,9 @@ def main() -> None:
         --no-docs: Do not load the doc window (default: False)
         --disable-info-widgets: Disable all info widgets (default: False)
         --log-level: Set the logging level (default: INFO, choices: CRITICAL, ERROR, WARNING, INFO, DEBUG)
+        --profile-startup: Print import and first paint timings (default: False)
     """
+    profiler = StartupProfiler()
     parser = argparse.ArgumentParser("OpenCV Playground")
     parser.add_argument(
         "--image", type=str, help="Path to image to load into playground", default=None
@@ -106,8 +123,16 @@ def main() -> None:
         choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
         help="Log Level",
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print import and first paint timings",
+        default=False,
+    )
     args = parser.parse_args()
-    
+    profiler.enabled = args.profile_startup
+    profiler.mark("argument parsing")
+
     # Use default log level from config if not specified in args
     if args.log_level == "INFO":
         log_level = config.get_default_log_level()
@@ -115,10 +140,10 @@ def main() -> None:
         log_level = args.log_level
     
     log_level = logging.getLevelName(log_level)
-    logging.basicConfig(format=LOG_FORMAT, level=log_level)
+    logging.basicConfig(format=config.get_log_format(), level=log_level)
     logging.info("Starting OpenCV Playground")
     
     if args.image is not None:
         _validate_image_path(args.image)
         
-    run_playground(args)  # GUI related code
+    run_playground(args, profiler)  # GUI related code
@@ -1,22 +1,21 @@
+import logging
 import os
+import sys
+
+# Imported first so --profile-startup times include the imports below
+from utils.startup_profile import StartupProfiler
+
 from PySide6.QtGui import QGuiApplication, QKeySequence, QAction  # GUI related import
 from PySide6.QtWidgets import QMainWindow, QApplication, QSplitter, QWidget, QFileDialog  # GUI related import
 from PySide6.QtCore import QTimer, __version__ as PYSIDE_VERSION_STR  # GUI related import
 from PySide6 import QtCore  # GUI related import
-import sys
 
-try:
-    from views.playground import Playground
-    from utils.config_manager import config
-    assert hasattr(Playground, '__init__'), "Playground class not found in playground module"
-except (ImportError, AssertionError) as e:
-    raise ImportError(f"Failed to import Playground class: {e}")
+from utils.config_manager import config
 
-# Print the Qt version using PySide6
-print(f"Using PySide6 version: {PYSIDE_VERSION_STR}")
+log = logging.getLogger(__name__)
 
 def is_valid_image(file_path):
-    return config.is_valid_image(file_path)
+    return config.is_valid_image(file_path) or config.is_valid_video(file_path)
 
 def open_image_file_dialog(parent=None):
     """
@@ -33,7 +32,8 @@ def open_image_file_dialog(parent=None):
         parent,
         "Open Image",
         default_dir,
-        "Image Files (*.png *.jpg *.jpeg *.bmp *.tif *.tiff);;All Files (*)"
+        "Image Files (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.npy);;"
+        "Videos (*.mp4 *.avi *.mov *.mkv *.webm);;All Files (*)"
     )
     if file_path:
         # Save the directory for next time
@@ -50,6 +50,7 @@ def handle_image_loading(playground_widget, file_path, status_bar):
 
     if not hasattr(playground_widget, 'load_image'):
         status_bar.showMessage("Reloading Playground widget")  # GUI related code
+        from views.playground import Playground
         new_widget = Playground("", False, False)
         central_splitter = playground_widget.parent().centralWidget()  # GUI related code
         central_splitter.replaceWidget(0, new_widget)  # GUI related code
@@ -107,6 +108,7 @@ class MainWindow(QMainWindow):  # GUI related class
         self.setWindowTitle(config.get_window_title())
         
         # Create a QSplitter to allow resizing between playground and side widget
+        from views.playground import Playground
         self.playground_widget = Playground(img_path, no_docs, disable_info_widgets)  # GUI related code
         self.side_widget = QWidget()  # New side area (customize as needed)  # GUI related code
         splitter = QSplitter(QtCore.Qt.Horizontal)  # GUI related code
@@ -234,6 +236,27 @@ def some_function_with_combobox():
 
 # Application entry point
 def main():
+    # Headless batch processing: `python main.py batch --help`
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    # Headless benchmarks: `python main.py benchmark --help`
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        from benchmark import main as benchmark_main
+        sys.exit(benchmark_main(sys.argv[2:]))
+    # Headless param sweeps: `python main.py sweep --help`
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep":
+        from sweep import main as sweep_main
+        sys.exit(sweep_main(sys.argv[2:]))
+    # Headless param tuning: `python main.py optimize --help`
+    if len(sys.argv) > 1 and sys.argv[1] == "optimize":
+        from optimize import main as optimize_main
+        sys.exit(optimize_main(sys.argv[2:]))
+
+    profiler = StartupProfiler(enabled="--profile-startup" in sys.argv)
+    profiler.mark("python + Qt imports")
+    log.debug("Using PySide6 version: %s", PYSIDE_VERSION_STR)
+
     # Set high DPI attributes before creating QApplication
     if hasattr(QtCore.Qt, 'HighDpiScaleFactorRoundingPolicy') and config.is_high_dpi_scaling_enabled():
         QGuiApplication.setHighDpiScaleFactorRoundingPolicy(
@@ -248,13 +271,19 @@ def main():
         QGuiApplication.setAttribute(QtCore.Qt.AA_UseHighDpiPixmaps)
     
     app = QApplication(sys.argv)  # GUI related code
-    
-    img_path = sys.argv[1] if len(sys.argv) > 1 else None
+    profiler.mark("QApplication")
+
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    img_path = positional[0] if positional else None
     no_docs = "--no-docs" in sys.argv
     disable_info_widgets = "--disable-info" in sys.argv
-    
+
+    import views.playground  # noqa: F401
+    profiler.mark("playground imports")
     window = MainWindow(img_path, no_docs, disable_info_widgets)  # GUI related code
-    
+    profiler.mark("main window")
+    profiler.watch_first_paint(window)
+
     sys.exit(app.exec())  # Remove underscore  # GUI related code
 
 if __name__ == "__main__":
@@ -1,16 +1,14 @@
-import sys
-sys.path.append("opencv_pg/models/base_transform.py")
-
 import logging
+import threading
 import traceback
 
 import numpy as np
 import copy
 
-from PySide6 import QtCore
-
-# Fix the import to use relative import instead of direct path
 from .params import Param
+from .frames import freeze_extra, readonly_view
+from . import batching
+from .stats import StatsRecorder
 
 log = logging.getLogger(__name__)
 
@@ -41,6 +39,51 @@ def _break_result_into_parts(result):
     return result, None
 
 
+def _same_value(a, b):
+    """Return True if ``a`` and ``b`` hold identical data
+
+    Arrays are first compared by identity and by the memory they view, which
+    is free, before falling back to an element-wise comparison. Containers are
+    compared recursively.
+
+    Args:
+        a (any): First value
+        b (any): Second value
+
+    Returns:
+        bool: True if both values are the same
+    """
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        if not (isinstance(a, np.ndarray) and isinstance(b, np.ndarray)):
+            return False
+        if a.shape != b.shape or a.dtype != b.dtype:
+            return False
+        if (
+            a.__array_interface__["data"][0] == b.__array_interface__["data"][0]
+            and a.strides == b.strides
+        ):
+            return True
+        return np.array_equal(a, b)
+    if isinstance(a, (tuple, list)):
+        return (
+            type(a) is type(b)
+            and len(a) == len(b)
+            and all(_same_value(x, y) for x, y in zip(a, b))
+        )
+    if isinstance(a, dict):
+        return (
+            isinstance(b, dict)
+            and a.keys() == b.keys()
+            and all(_same_value(a[key], b[key]) for key in a)
+        )
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
 class DeclarativeFieldBase(type):
     """Base MetaClass for setting up fields and making Param's properties
 
@@ -59,10 +102,13 @@ class DeclarativeFieldBase(type):
         # Create accessor methods that will be applied to each class
         # Will be accessing the _value prop of the underlying Param
         def _getter(self, name):
-            return getattr(getattr(self, f"_{name}"), "_value")
+            return getattr(self, f"_{name}").get_value(self.preview_scale)
 
         def _setter(self, name, value):
-            setattr(getattr(self, f"_{name}"), "_value", value)
+            param = getattr(self, f"_{name}")
+            if not _same_value(param._value, value):
+                self.dirty = True
+            setattr(param, "_value", value)
 
         def _make_prop(self, name, value):
             """Creates instance `_name` attr and `name` property for it"""
@@ -97,6 +143,34 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
     # Will use __name__.html if not set
     doc_filename = None
 
+    # Set False for transforms whose output is not fully determined by their
+    # inputs and params (eg: random generators), so results are never reused
+    # from the cache. The last result is still reused until the transform is
+    # marked ``dirty`` or given new inputs.
+    cacheable = True
+
+    # Incoming images are read-only views shared with the previous transform.
+    # Set True if ``draw`` writes into ``img_in`` so it receives its own copy.
+    mutates_input = False
+
+    # Size of the images being processed relative to full resolution. Set by
+    # the Pipeline; Params with ``preview_scaling`` are scaled to match.
+    preview_scale = 1.0
+
+    # Region (x, y, width, height) of the source image being processed, in
+    # full resolution pixels, or None for the whole image. Set by the Pipeline.
+    roi = None
+
+    # Names of the two arguments of ``draw`` and of the two items it returns.
+    # A GraphPipeline connects transforms by these names.
+    inputs = ("image", "extra")
+    outputs = ("image", "extra")
+
+    # Input ports explicitly wired by a GraphPipeline. Empty in a linear
+    # Pipeline, where ``extra_in`` is whatever the previous transform returned,
+    # so transforms must only treat it as their second port when it's wired.
+    wired_inputs = frozenset()
+
     def __init__(self, **kwargs):
         super().__init__()
         self.params = []
@@ -106,6 +180,20 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
         self.last_in = None
         self.extra_in = None
         self.enabled = True
+        # True until the next _draw if a param or anything else that affects
+        # the output changed since the last one
+        self.dirty = True
+        # Incremented whenever _draw returns different output objects
+        self.output_generation = 0
+        # DrawStats of the last _draw, None if it didn't run the transform
+        self.stats = None
+        # Inputs _draw was last given and ((preview_scale, roi), img_out,
+        # extra_out) it returned, to skip runs that would return the same
+        self._received = (None, None)
+        self._last_result = None
+        # One cached result per preview_scale and one for the latest roi, see
+        # _get_cached_result
+        self._cache = {}
 
         for name, value in self._params:
             # Create all the fields and accessors
@@ -171,7 +259,8 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
         return cls.doc_filename
 
     def start_pipeline(self):
-        """Starts the pipeline from this transform"""
+        """Marks this transform dirty and starts the pipeline from it"""
+        self.dirty = True
         self.window.start_pipeline(self.index)
 
     def get_transform(self, index):
@@ -185,6 +274,90 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
         """
         return self.window.transforms[index]
 
+    def get_params_state(self):
+        """Return a snapshot of the state of all of this transform's Params"""
+        return copy.deepcopy([param.get_state() for param in self.params])
+
+    def clear_cache(self):
+        """Forget the cached results so the next draw always runs the transform"""
+        self._cache = {}
+        self._last_result = None
+        self.dirty = True
+
+    def _get_cached_result(self, img_in, extra_in, params_state):
+        """Return cached (img_out, extra_out) for these inputs, or None
+
+        Args:
+            img_in (np.ndarray): Incoming image
+            extra_in (object): Incoming extra object
+            params_state (list): Result of ``get_params_state``
+
+        Returns:
+            tuple or None: (np.ndarray, object) from the last run at the current
+                ``preview_scale`` and ``roi`` if the inputs and params are
+                identical to that run, else None
+        """
+        entry = self._cache.get(self._cache_key()) if self.cacheable else None
+        if entry is None:
+            return None
+        roi, cached_img, cached_extra, cached_params, img_out, extra_out = entry
+        if roi != self.roi:
+            return None
+        if not _same_value(params_state, cached_params):
+            return None
+        if not _same_value(img_in, cached_img):
+            return None
+        if not _same_value(extra_in, cached_extra):
+            return None
+        return img_out, extra_out
+
+    def _store_cached_result(self, img_in, extra_in, params_state, img_out, extra_out):
+        """Stores the result of a run so it can be reused by ``_draw``"""
+        if self.cacheable:
+            self._cache[self._cache_key()] = (
+                self.roi, img_in, extra_in, params_state, img_out, extra_out
+            )
+
+    def _cache_key(self):
+        # Keep the full image results of every scale, but only the latest
+        # region as it changes with every pan of the viewer
+        return "roi" if self.roi is not None else self.preview_scale
+
+    def get_source_size(self):
+        """Return (rows, cols) of the full resolution image this transform
+        creates, or None if it processes an incoming image
+
+        Used by the Pipeline to choose the preview scale.
+        """
+        return None
+
+    def halo(self):
+        """Return how many pixels around an output pixel its value depends on
+
+        Override for transforms whose output pixels only depend on a local
+        neighbourhood of the input, eg: filters, so the Pipeline can process
+        only the visible region of an image plus the halo of each transform.
+        The default None means the whole image is needed, or that the image
+        geometry changes.
+        """
+        return None
+
+    def get_init_kwargs(self):
+        """Return the keyword arguments needed to recreate this transform
+
+        Override for transforms whose ``__init__`` takes required arguments,
+        eg: the path of an image loader. Param values are saved separately.
+        """
+        return {}
+
+    def has_widgets(self):
+        """Return True if widgets have been created for this transform's params
+
+        Transforms run headless (eg: batch processing) never get widgets, so
+        ``update_widgets_state`` must not be called for them.
+        """
+        return any(param.widget is not None for param in self.params)
+
     def get_info_widget(self):
         """Optionally return a widget that provides info about the transform.
 
@@ -204,11 +377,18 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
     def _draw(self, img_in, extra_in):
         """Performs the transform, possibly storing the inputs for later use
 
+        If the transform isn't ``dirty`` and is given the same input objects
+        as last time, which upstream transforms return while their own
+        inputs don't change, its last result is returned without even
+        comparing the Params. Otherwise, if the inputs and the Param values
+        are identical to a cached run, the cached result is returned without
+        running ``draw`` again.
+
         Args:
             img (np.array): Image to operate on
             extra_in (object, None): Can be anything that needs to be passed
                 down from the previous transform such as calculation results.
-                Must be able to ``deepcopy`` it.
+                It is shared by reference; see ``frames.freeze_extra``.
 
         Returns:
             (np.ndarray, object), : Output image, any object
@@ -216,35 +396,138 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
 
         # Starting the pipeline here; inputs are None, so use last stored
         if img_in is None or len(img_in.shape) == 0:
-            img_out = np.copy(self.last_in)
-            extra_out = copy.deepcopy(self.extra_in)
+            img_in = self.last_in
+            extra_in = self.extra_in
+            same_input = True
         # We were passed something so store it
         else:
-            self.last_in = np.copy(img_in)
-            self.extra_in = copy.deepcopy(extra_in)
-            img_out = np.copy(img_in)
-            extra_out = copy.deepcopy(extra_in)
+            same_input = (
+                img_in is self._received[0] and extra_in is self._received[1]
+            )
+            self._received = (img_in, extra_in)
+            self.last_in = readonly_view(img_in)
+            self.extra_in = freeze_extra(extra_in)
+            img_in, extra_in = self.last_in, self.extra_in
 
         # Bypass since disabled
         if not self.enabled:
-            return img_out, extra_out
+            self.stats = None
+            return img_in, extra_in
 
         # Run transform; on error return the inputs
+        img_out, extra_out = img_in, extra_in
+        recorder = StatsRecorder()
+        result_key = (self.preview_scale, self.roi)
         try:
-            self.update_widgets_state()
-            out = self.draw(img_out, extra_out)
+            # Widgets may only be touched from the GUI thread; worker threads
+            # rely on Pipeline.update_widgets_state being called beforehand
+            if self.has_widgets() and threading.current_thread() is threading.main_thread():
+                self.update_widgets_state()
+            last = self._last_result
+            if not self.dirty and same_input and last is not None and last[0] == result_key:
+                self.stats = recorder.finish(img_in, last[1], cached=True)
+                return last[1], last[2]
+            # Cleared before taking the snapshot, so a change made from another
+            # thread at any point after it marks the transform dirty again
+            self.dirty = False
+            params_state = self.get_params_state()
+            cached = self._get_cached_result(img_in, extra_in, params_state)
+            if cached is not None:
+                self.error = None
+                self.stats = recorder.finish(img_in, cached[0], cached=True)
+                self._set_last_result(result_key, *cached)
+                return cached
+            img_out = np.copy(img_in) if self.mutates_input else img_in
+            out = self.draw(img_out, extra_in)
             img_out, extra_out = _break_result_into_parts(out)
+            img_out = readonly_view(img_out)
+            extra_out = freeze_extra(extra_out)
+            # A change made since the snapshot may or may not have been read
+            # by draw, so the result is only cached under params_state if
+            # there was none; the next run sees the transform dirty regardless
+            if not self.dirty:
+                self._store_cached_result(
+                    img_in, extra_in, params_state, img_out, extra_out
+                )
+            self._set_last_result(result_key, img_out, extra_out)
             self.error = None
         except Exception as e:
             log.exception(e)
             self.error = traceback.format_exc()
+            self.clear_cache()
             # Make sure we return a valid image and extra_out
             if img_out is None or len(img_out.shape) == 0:
                 img_out = np.zeros((100, 100, 3), dtype=np.uint8)  # Create a small black image
 
+        self.stats = recorder.finish(img_in, img_out, cached=False)
         return img_out, extra_out
 
-    @QtCore.Slot(bool)
+    def _set_last_result(self, key, img_out, extra_out):
+        last = self._last_result
+        if last is None or img_out is not last[1] or extra_out is not last[2]:
+            self.output_generation += 1
+        self._last_result = (key, img_out, extra_out)
+
+    def apply(self, img_in, extra_in=None):
+        """Run this transform on ``img_in`` without touching its state
+
+        Unlike ``_draw`` nothing is stored or cached and errors are raised, so
+        the same transform may process many images (eg: tiles) concurrently.
+
+        Args:
+            img_in (np.ndarray): Image to operate on
+            extra_in (object, optional): Extra object from the previous transform
+
+        Returns:
+            (np.ndarray, object): Output image, any object
+        """
+        if not self.enabled:
+            return img_in, extra_in
+        img_in = readonly_view(img_in)
+        if self.mutates_input:
+            img_in = np.copy(img_in)
+        img_out, extra_out = _break_result_into_parts(self.draw(img_in, extra_in))
+        return readonly_view(img_out), freeze_extra(extra_out)
+
+    def apply_batch(self, imgs_in, extras_in=None):
+        """Run this transform on a stack of frames without touching its state
+
+        The batch counterpart of ``apply``; see ``draw_batch`` and
+        ``batching.run_batch``.
+
+        Args:
+            imgs_in (np.ndarray or list): (N, H, W[, C]) stack of frames, or a
+                list of frames that can't be stacked
+            extras_in (list, optional): Extra object of each frame. Default is
+                None for every frame.
+
+        Returns:
+            (np.ndarray or list, list): Output frames, as returned by
+                ``draw_batch``, and the extra of each frame
+        """
+        if extras_in is None:
+            extras_in = [None] * len(imgs_in)
+        if not self.enabled:
+            return imgs_in, list(extras_in)
+        if isinstance(imgs_in, np.ndarray):
+            imgs_in = np.copy(imgs_in) if self.mutates_input else readonly_view(imgs_in)
+        else:
+            imgs_in = [
+                np.copy(img) if self.mutates_input else readonly_view(img)
+                for img in imgs_in
+            ]
+        imgs_out, extras_out = self.draw_batch(imgs_in, list(extras_in))
+        if len(imgs_out) != len(imgs_in) or len(extras_out) != len(imgs_in):
+            raise batching.BatchError(
+                f"{self.__class__.__name__}.draw_batch returned {len(imgs_out)} "
+                f"frames and {len(extras_out)} extras for {len(imgs_in)} frames"
+            )
+        if isinstance(imgs_out, np.ndarray):
+            imgs_out = readonly_view(imgs_out)
+        else:
+            imgs_out = [readonly_view(img) for img in imgs_out]
+        return imgs_out, [freeze_extra(extra) for extra in extras_out]
+
     def handle_enabled_changed(self, enabled):
         """Sets whether transform should be enabled then reruns pipeline
 
@@ -260,11 +543,14 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
         Must return either:
             - np.ndarray - an image
             - (np.ndarray, object) - an image and any additional object you want
-                passed onto the next transform. Must be able to ``deepcopy`` it.
+                passed onto the next transform. It is made immutable with
+                ``frames.freeze_extra`` and shared by reference.
 
         Args:
-            img_in (np.ndarray): Copy of image from previous transform
-            extra_in (object): Any object that can be deepcopied
+            img_in (np.ndarray): Read-only image from previous transform. Set
+                ``mutates_input = True`` on the class to get a writeable copy.
+            extra_in (object): Immutable extra object from previous transform.
+                Copy anything you need to modify.
 
         Returns:
             np.ndarray, object (optional): Your modified image or optionally
@@ -273,12 +559,38 @@ class BaseTransform(metaclass=DeclarativeFieldBase):
         """
         raise NotImplementedError
 
+    def draw_batch(self, imgs_in, extras_in):
+        """Override with a vectorized ``draw`` of many frames at once
+
+        The default runs ``draw`` on each frame, spread over a thread pool.
+        Transforms whose work is per pixel can instead process the whole
+        stack in one call, eg: with OpenCV on ``batching.flatten_stack``.
+        The output of each frame must be identical to that of ``draw``.
+
+        Args:
+            imgs_in (np.ndarray or list): Read-only (N, H, W[, C]) stack, or a
+                list of frames, eg: from the default ``draw_batch``. Overrides
+                usually stack lists with ``batching.stack_frames`` and call
+                this for frames that can't be stacked.
+            extras_in (list): Immutable extra object of each frame
+
+        Returns:
+            (np.ndarray or list, list): N output frames, stacked or as a
+                list, and N extra objects
+        """
+
+        def draw(img_in, extra_in):
+            return _break_result_into_parts(self.draw(img_in, extra_in))
+
+        return batching.map_frames(draw, imgs_in, extras_in)
+
     def update_widgets_state(self):
         """Override to update the state of the widgets within this transform
 
         This can be used to conditionally change/activate/decativate one widget
         based on the state of another widget. This is called just prior to the
-        ``draw`` method.
+        ``draw`` method when running on the main thread, otherwise before the
+        run is handed to a worker thread.
 
         # NOTE: Might be able to decouple these Transforms and widgets more
         # by emitting signals from the transform and connecting them to the
@@ -0,0 +1,212 @@
+"""Run a Pipeline over a stack of frames at once
+
+Batch inspection pushes many frames of the same size through the same
+transforms. Rather than running the pipeline once per frame, the frames are
+stacked into an (N, H, W[, C]) array and every transform processes the whole
+stack with ``BaseTransform.draw_batch``. Transforms whose work is per pixel,
+eg: AddWeighted, InRangeRaw or CvtColor, override it to process the stack in
+a single call; the others run ``draw`` on each frame, spread over a thread
+pool, and pass the frames on as a list rather than copying them into a
+stack. The next transform that vectorizes stacks them again.
+
+Per pixel OpenCV functions are run on the stack viewed as one tall image of
+N * H rows (see ``flatten_stack``), which gives exactly the per frame result.
+Large stacks are processed a few frames at a time (see ``map_chunks``), so
+the data stays in the CPU cache between the steps of a transform.
+"""
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# A stack of frames, or a list of them if they can't be stacked
+Frames = Union[np.ndarray, List[np.ndarray]]
+
+# Bytes of input processed at once by map_chunks
+CHUNK_BYTES = 4 * 1024 * 1024
+
+_executor = None
+
+
+class BatchError(ValueError):
+    """Raised when a transform returns the wrong number of frames"""
+
+
+def get_workers() -> int:
+    """Return how many threads frames are drawn on by the default ``draw_batch``
+
+    ``[Performance] processing_threads``, but no more than there are CPUs:
+    OpenCV already spreads large images over every CPU.
+    """
+    return max(1, min(config.get_processing_threads(), multiprocessing.cpu_count()))
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool frames are drawn on by the default ``draw_batch``"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_workers(), thread_name_prefix="frame"
+        )
+    return _executor
+
+
+def stack_frames(frames: Sequence[np.ndarray]) -> Frames:
+    """Return ``frames`` as one (N, ...) array, or as a list if they can't be
+
+    Frames can be stacked if they are all arrays of the same shape and dtype.
+    An array is returned as is.
+    """
+    if isinstance(frames, np.ndarray):
+        return frames
+    frames = list(frames)
+    if frames and all(
+        isinstance(frame, np.ndarray)
+        and frame.shape == frames[0].shape
+        and frame.dtype == frames[0].dtype
+        for frame in frames
+    ):
+        return np.stack(frames)
+    return frames
+
+
+def stack_extras(extras: Sequence, imgs: Frames) -> Optional[np.ndarray]:
+    """Return ``extras`` stacked if each is an image like the frames of ``imgs``
+
+    Used by transforms taking a second image as their extra input, eg:
+    AddWeighted. Returns None if ``imgs`` isn't a stack or any extra isn't
+    an array with the shape and dtype of a frame.
+    """
+    if not isinstance(imgs, np.ndarray):
+        return None
+    for extra in extras:
+        if not (
+            isinstance(extra, np.ndarray)
+            and extra.shape == imgs.shape[1:]
+            and extra.dtype == imgs.dtype
+        ):
+            return None
+    return np.stack(extras)
+
+
+def flatten_stack(imgs: np.ndarray) -> np.ndarray:
+    """Return the (N, H, W[, C]) stack ``imgs`` as one (N * H, W[, C]) image
+
+    A view if ``imgs`` is contiguous. Per pixel OpenCV functions give the
+    same result on it as on each frame; see ``unflatten_stack``.
+    """
+    imgs = np.ascontiguousarray(imgs)
+    return imgs.reshape((-1,) + imgs.shape[2:])
+
+
+def unflatten_stack(img: np.ndarray, count: int) -> np.ndarray:
+    """Return the output of a per pixel function on ``flatten_stack`` as N frames"""
+    return img.reshape((count, -1) + img.shape[1:])
+
+
+def map_chunks(func: Callable, imgs: np.ndarray, *others: np.ndarray) -> np.ndarray:
+    """Return ``func`` applied to consecutive chunks of frames of the stacks
+
+    Each call gets the same frames of ``imgs`` and of every stack in
+    ``others`` and returns a stack of the outputs of those frames, eg::
+
+        map_chunks(
+            lambda chunk: unflatten_stack(
+                cv2.cvtColor(flatten_stack(chunk), code), len(chunk)
+            ),
+            imgs,
+        )
+
+    Chunks hold about ``CHUNK_BYTES`` of ``imgs`` and at least one frame.
+
+    Returns:
+        np.ndarray: outputs of every frame as one stack
+    """
+    count = len(imgs)
+    size = max(1, CHUNK_BYTES // max(1, imgs[:1].nbytes))
+    out = None
+    for start in range(0, count, size):
+        stop = min(count, start + size)
+        result = func(imgs[start:stop], *(other[start:stop] for other in others))
+        if out is None:
+            if stop == count:
+                return result
+            out = np.empty((count,) + result.shape[1:], dtype=result.dtype)
+        out[start:stop] = result
+    return out
+
+
+def map_frames(
+    draw: Callable, imgs: Frames, extras: Sequence
+) -> Tuple[Frames, List]:
+    """Call ``draw(img, extra)`` for every frame, concurrently
+
+    Frames are split into one run of consecutive frames per worker, so
+    there is one task per worker rather than per frame.
+
+    Args:
+        draw (callable): Returns (img_out, extra_out) for one frame. Must be
+            safe to call from several threads at once, like
+            ``BaseTransform.apply``.
+        imgs (Frames): Frames to draw
+        extras (list): Extra object of each frame
+
+    Returns:
+        (list, list): Output frame and extra of each frame
+    """
+    def draw_frames(start, stop):
+        return [draw(imgs[i], extras[i]) for i in range(start, stop)]
+
+    count = len(imgs)
+    workers = min(count, get_workers())
+    if workers <= 1:
+        results = draw_frames(0, count)
+    else:
+        size = math.ceil(count / workers)
+        futures = [
+            get_executor().submit(draw_frames, start, min(count, start + size))
+            for start in range(0, count, size)
+        ]
+        results = [result for future in futures for result in future.result()]
+    return [img for img, _ in results], [extra for _, extra in results]
+
+
+def run_batch(
+    pipeline, imgs: Sequence[np.ndarray], extras: Optional[Sequence] = None
+) -> Tuple[Frames, List]:
+    """Run ``pipeline`` on every frame of ``imgs`` at once
+
+    The pipeline's source transform (eg: LoadImage), if any, is skipped;
+    ``imgs`` are used in its place. Transforms are run with
+    ``BaseTransform.apply_batch``, so the pipeline's own state and cache are
+    left alone. Each output frame is identical to running that frame alone.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run
+        imgs (np.ndarray or list): (N, H, W[, C]) stack, or a list of frames
+            which is stacked if they all have the same shape and dtype
+        extras (list, optional): Extra input of each frame. Default is None
+            for every frame.
+
+    Returns:
+        (Frames, list): Output frames, as a stack if the last transform
+            returned one, else as a list, and the extra output of each frame
+
+    Raises:
+        Exception: whatever a transform raises; unlike ``run_pipeline``,
+            errors aren't swallowed
+    """
+    if not isinstance(imgs, np.ndarray):
+        imgs = list(imgs)
+    for transform in pipeline.get_processing_transforms():
+        imgs, extras = transform.apply_batch(imgs, extras)
+    if extras is None:
+        extras = [None] * len(imgs)
+    return imgs, list(extras)
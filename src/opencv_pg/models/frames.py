@@ -0,0 +1,119 @@
+"""Immutable payloads that are passed by reference between transforms
+
+Images and extras are shared between transforms instead of being copied at
+every hop. To make that safe, everything handed to the next transform is made
+read-only here; a transform that needs to modify what it receives must copy it
+first.
+"""
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def readonly_view(img):
+    """Return a non-writeable view of ``img`` without copying its data
+
+    Images are handed from transform to transform as read-only views so that
+    they can be shared instead of copied. Any accidental in-place write raises
+    instead of corrupting an upstream result.
+
+    Args:
+        img (np.ndarray, None): Image to protect
+
+    Returns:
+        np.ndarray or None: read-only view of ``img``
+    """
+    if not isinstance(img, np.ndarray) or not img.flags.writeable:
+        return img
+    view = img.view()
+    view.flags.writeable = False
+    return view
+
+
+def as_point_set(points):
+    """Return ``points`` as a read-only, contiguous float32 array
+
+    Only copies if ``points`` is not already contiguous float32.
+
+    Args:
+        points (array_like): Points of any shape, eg: (N, 2) or (N, 1, 2)
+
+    Returns:
+        np.ndarray: read-only float32 array
+    """
+    return readonly_view(np.ascontiguousarray(points, dtype=np.float32))
+
+
+class Contours(tuple):
+    """A tuple of contours stored in one packed array
+
+    Behaves like the tuple of (n, 1, 2) arrays returned by ``cv2.findContours``
+    and can be passed straight to cv2 functions such as ``drawContours`` or
+    ``fillPoly``. Every item is a read-only view into ``points``, so the whole
+    set is a single allocation that can be shared between transforms.
+
+    Args:
+        contours (iterable): Iterable of arrays reshapeable to (n, 2)
+
+    Attributes:
+        points (np.ndarray): (N, 2) read-only array of every contour's points
+        offsets (np.ndarray): (len + 1, ) start index of each contour in
+            ``points``; contour ``i`` is ``points[offsets[i]:offsets[i + 1]]``
+    """
+
+    def __new__(cls, contours):
+        contours = [np.asarray(cont).reshape(-1, 2) for cont in contours]
+        dtype = np.result_type(*contours) if contours else np.int32
+
+        offsets = np.zeros(len(contours) + 1, dtype=np.intp)
+        np.cumsum([len(cont) for cont in contours], out=offsets[1:])
+
+        points = np.empty((offsets[-1], 2), dtype=dtype)
+        for cont, start, stop in zip(contours, offsets[:-1], offsets[1:]):
+            points[start:stop] = cont
+        points.flags.writeable = False
+        offsets.flags.writeable = False
+
+        views = [
+            points[start:stop].reshape(-1, 1, 2)
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        self = super().__new__(cls, views)
+        self.points = points
+        self.offsets = offsets
+        return self
+
+    def __getnewargs__(self):
+        return (tuple(self),)
+
+
+def _is_contour(obj):
+    """Return True if obj looks like a single cv2 contour: (n, 1, 2) array"""
+    return isinstance(obj, np.ndarray) and obj.ndim == 3 and obj.shape[1:] == (1, 2)
+
+
+def freeze_extra(extra):
+    """Return an immutable version of a transform's extra output
+
+    - arrays become read-only views
+    - sequences of contours become ``Contours``
+    - other lists/tuples become tuples with their items frozen
+    - anything else is returned as is and must not be modified downstream
+
+    Args:
+        extra (object): extra object returned by ``BaseTransform.draw``
+
+    Returns:
+        object: immutable extra that can be shared by reference
+    """
+    if extra is None or isinstance(extra, Contours):
+        return extra
+    if isinstance(extra, np.ndarray):
+        return readonly_view(extra)
+    if isinstance(extra, (tuple, list)):
+        if extra and all(_is_contour(item) for item in extra):
+            return Contours(extra)
+        return tuple(freeze_extra(item) for item in extra)
+    return extra
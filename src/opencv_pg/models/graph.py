@@ -0,0 +1,392 @@
+"""Pipelines whose transforms form a directed acyclic graph
+
+A Pipeline is a chain: every transform gets the image and extra of the one
+before it. A GraphPipeline instead wires each transform's inputs to any
+earlier transform's outputs, so a pipeline can branch and merge, eg::
+
+    graph = GraphPipeline()
+    graph.add("load", LoadImage(path))
+    graph.add("blur", GaussianBlur(), image="load")
+    graph.add("edges", Canny(), image="load")
+    graph.add("blend", AddWeighted(), image="blur", image2="edges")
+
+Ports are named by the transforms' ``inputs`` and ``outputs``: the two
+arguments of ``draw`` and the two items it returns. ``"node"`` connects to
+the node's first output, ``"node.port"`` to a specific one.
+
+Nodes whose inputs are ready run concurrently on a thread pool, so
+independent branches are processed in parallel. Only dirty nodes run: those
+whose params changed, and those downstream of a node whose outputs changed.
+Everything else keeps its outputs without even a cache lookup.
+"""
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set
+
+from utils.config_manager import config
+
+from .base_transform import BaseTransform
+from .signals import Signal
+from .window import PipelineCancelled
+
+log = logging.getLogger(__name__)
+
+_executor = None
+
+
+class GraphError(ValueError):
+    """Raised when nodes are wired wrongly, eg: into a cycle"""
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool graph nodes run on
+
+    It is separate from the scheduler's pool, whose threads wait on the nodes.
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, config.get_processing_threads())
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="node")
+    return _executor
+
+
+class Node:
+    """A transform in a GraphPipeline
+
+    Stands in for the transform's Window, so a param change reaches the graph
+    through ``BaseTransform.start_pipeline``.
+
+    Attributes:
+        name (str): Name of the node in its graph
+        transform (BaseTransform): Transform run by the node
+        inputs (dict): {input port: (node name, output port)}
+        outputs (dict): {output port: value} of the last run
+        dirty (bool): True if the node must run again
+        updated (Signal): Emitted, on the thread that ran the node, when a run
+            changes ``outputs``
+        output_generation (int): Incremented whenever ``outputs`` change
+    """
+
+    def __init__(self, graph: "GraphPipeline", name: str, transform: BaseTransform):
+        self.graph = graph
+        self.name = name
+        self.transform = transform
+        self.inputs = {}
+        self.outputs = {port: None for port in transform.outputs}
+        self.dirty = True
+        self.updated = Signal()
+        self.output_generation = 0
+        transform.window = self
+        transform.index = 0
+
+    @property
+    def transforms(self) -> List[BaseTransform]:
+        """The node's transform, in the shape of ``Window.transforms``"""
+        return [self.transform]
+
+    def start_pipeline(self, transform_index: int = 0):
+        """Run the graph from this node; called when a param changes"""
+        self.graph.request_run(self.name)
+
+    def get_sources(self) -> Set[str]:
+        """Return the names of the nodes this node's inputs come from"""
+        return {source for source, _ in self.inputs.values()}
+
+    def run(self):
+        """Run the transform on the current outputs of the upstream nodes
+
+        Returns:
+            bool: True if the outputs changed
+        """
+        values = [
+            self.graph.get_output(*self.inputs[port]) if port in self.inputs else None
+            for port in self.transform.inputs
+        ]
+        img_out, extra_out = self.transform._draw(*values)
+        outputs = dict(zip(self.transform.outputs, (img_out, extra_out)))
+        # Cached results come back as the same objects; see Window.draw
+        changed = any(outputs[port] is not self.outputs.get(port) for port in outputs)
+        self.outputs = outputs
+        if changed:
+            self.output_generation += 1
+            self.updated.emit()
+        return changed
+
+
+class GraphPipeline:
+    """An image processing pipeline whose transforms form a DAG
+
+    Offers ``request_run``, ``run_pipeline`` and ``update_widgets_state`` like
+    a Pipeline, so a PipelineScheduler can drive it. Previews are rendered at
+    ``preview_max_dimension`` like a Pipeline's, but regions aren't
+    supported: the whole image is always processed.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.scheduler = None
+        self.stream = None
+        self.preview_max_dimension = None
+        self.preview_scale = 1.0
+        self.roi = None
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "GraphPipeline":
+        """Return a chain of the transforms of ``pipeline``, wired like it runs
+
+        Nodes are named ``"<window index>-<transform index>"``. The extra
+        output is chained into each transform's second input as is, so the
+        transforms don't count it as wired; see ``BaseTransform.wired_inputs``.
+        """
+        graph = cls()
+        previous = None
+        for window in pipeline.windows:
+            for transform in window.transforms:
+                name = f"{window.index}-{transform.index}"
+                graph.add(name, transform)
+                if previous is not None:
+                    for port, source_port in zip(
+                        transform.inputs, previous.transform.outputs
+                    ):
+                        graph._connect(name, port, previous.name, source_port)
+                previous = graph.nodes[name]
+        return graph
+
+    def add(self, name: str, transform: BaseTransform, **inputs) -> Node:
+        """Add ``transform`` as node ``name`` and connect its ``inputs``
+
+        Args:
+            name (str): Unique node name
+            transform (BaseTransform): Transform to run
+            inputs: {input port: "node" or "node.port"} of nodes already added
+
+        Returns:
+            Node: the new node
+        """
+        if name in self.nodes:
+            raise GraphError(f"There already is a node named {name}")
+        if "." in name:
+            raise GraphError(f"Node names can't contain '.': {name}")
+        node = Node(self, name, transform)
+        self.nodes[name] = node
+        for port, source in inputs.items():
+            source_name, _, source_port = source.partition(".")
+            self.connect(name, port, source_name, source_port or None)
+        return node
+
+    def connect(self, name: str, port: str, source: str, source_port: str = None):
+        """Feed output ``source_port`` of node ``source`` into ``port`` of ``name``
+
+        Args:
+            source_port (str, optional): Default is the source's first output
+
+        Raises:
+            GraphError: if a node or port doesn't exist, or on a cycle
+        """
+        self._connect(name, port, source, source_port)
+        node = self.nodes[name]
+        node.transform.wired_inputs = node.transform.wired_inputs | {port}
+
+    def _connect(self, name: str, port: str, source: str, source_port: str = None):
+        """``connect`` without adding ``port`` to the transform's wired_inputs"""
+        node, source_node = self._get_node(name), self._get_node(source)
+        if port not in node.transform.inputs:
+            raise GraphError(
+                f"{name} has no input {port}; it has {node.transform.inputs}"
+            )
+        if source_port is None:
+            source_port = source_node.transform.outputs[0]
+        if source_port not in source_node.transform.outputs:
+            raise GraphError(
+                f"{source} has no output {source_port}; it has "
+                f"{source_node.transform.outputs}"
+            )
+        previous = node.inputs.get(port)
+        node.inputs[port] = (source, source_port)
+        try:
+            self.get_order()
+        except GraphError:
+            if previous is None:
+                del node.inputs[port]
+            else:
+                node.inputs[port] = previous
+            raise
+        node.dirty = True
+
+    def get_output(self, name: str, port: str = None):
+        """Return output ``port`` of node ``name`` from the last run
+
+        Args:
+            port (str, optional): Default is the node's first output
+        """
+        node = self._get_node(name)
+        return node.outputs.get(port or node.transform.outputs[0])
+
+    def get_consumers(self, name: str) -> List[Node]:
+        """Return the nodes with an input connected to node ``name``"""
+        return [node for node in self.nodes.values() if name in node.get_sources()]
+
+    def get_order(self) -> List[Node]:
+        """Return the nodes sorted so every node comes after its sources
+
+        Raises:
+            GraphError: if the nodes form a cycle
+        """
+        remaining = {name: len(node.get_sources()) for name, node in self.nodes.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(self.nodes[name])
+            for consumer in self.get_consumers(name):
+                remaining[consumer.name] -= 1
+                if remaining[consumer.name] == 0:
+                    ready.append(consumer.name)
+        if len(order) != len(self.nodes):
+            cycle = sorted(set(self.nodes) - {node.name for node in order})
+            raise GraphError(f"Nodes {cycle} form a cycle")
+        return order
+
+    def mark_dirty(self, name: str):
+        """Make node ``name`` run on the next run"""
+        self._get_node(name).dirty = True
+
+    def set_scheduler(self, scheduler):
+        """Route ``request_run`` through ``scheduler``; see Pipeline.set_scheduler"""
+        self.scheduler = scheduler
+
+    def set_preview_max_dimension(self, max_dimension: Optional[int]):
+        """See ``Pipeline.set_preview_max_dimension``"""
+        self.preview_max_dimension = max_dimension
+
+    def get_preview_scale(self) -> float:
+        """Return the scale preview runs are rendered at, 1.0 for full size"""
+        sizes = [
+            node.transform.get_source_size()
+            for node in self.nodes.values()
+            if not node.inputs
+        ]
+        sizes = [size for size in sizes if size]
+        if not self.preview_max_dimension or not sizes:
+            return 1.0
+        longest = max(max(size) for size in sizes)
+        if longest <= self.preview_max_dimension:
+            return 1.0
+        return self.preview_max_dimension / longest
+
+    def get_visible_rect(self):
+        """Regions aren't supported; always None"""
+        return None
+
+    def request_run(self, name: str = None):
+        """Mark node ``name`` dirty and run the graph
+
+        Runs immediately unless a scheduler is set; see Pipeline.request_run.
+        """
+        if name is not None:
+            self.mark_dirty(name)
+        if self.stream is not None and self.stream.is_running():
+            self.update_widgets_state()
+        elif self.scheduler is None:
+            self.run_pipeline()
+        else:
+            self.scheduler.request_run(0, 0)
+
+    def run_pipeline(
+        self,
+        win_index: int = 0,
+        transform_index: int = 0,
+        cancel_event=None,
+        preview=False,
+        region=None,
+    ) -> Dict[str, dict]:
+        """Run every dirty node and the nodes downstream of changed outputs
+
+        ``win_index``, ``transform_index`` and ``region`` are accepted for
+        compatibility with Pipeline and ignored; dirty flags decide what runs.
+
+        Args:
+            cancel_event (threading.Event, optional): When set, no more nodes
+                are started and ``PipelineCancelled`` is raised once the running
+                ones finish. Nodes that didn't run stay dirty.
+            preview (bool, optional): If True, render at the preview scale
+
+        Returns:
+            dict: {node name: outputs}
+        """
+        scale = self.get_preview_scale() if preview else 1.0
+        if scale != self.preview_scale:
+            self.preview_scale = scale
+            for node in self.nodes.values():
+                node.transform.preview_scale = scale
+                node.dirty = True
+
+        order = self.get_order()
+        waiting = {node.name: len(node.get_sources()) for node in order}
+        ready = [node for node in order if waiting[node.name] == 0]
+        running = {}
+
+        def settle(node):
+            for consumer in self.get_consumers(node.name):
+                waiting[consumer.name] -= 1
+                if waiting[consumer.name] == 0:
+                    ready.append(consumer)
+
+        def run(node):
+            if node.run():
+                for consumer in self.get_consumers(node.name):
+                    consumer.dirty = True
+
+        try:
+            while ready or running:
+                while ready:
+                    node = ready.pop(0)
+                    if not node.dirty:
+                        settle(node)
+                        continue
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise PipelineCancelled()
+                    # Cleared first, so a param changed mid run marks it again
+                    node.dirty = False
+                    running[get_executor().submit(run, node)] = node
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        node.dirty = True
+                        raise
+                    settle(node)
+        finally:
+            # Let the nodes in flight finish before reporting the outcome
+            if running:
+                wait(running)
+                for node in running.values():
+                    node.dirty = True
+        return {node.name: node.outputs for node in order}
+
+    def update_widgets_state(self):
+        """See ``Pipeline.update_widgets_state``"""
+        for node in self.nodes.values():
+            transform = node.transform
+            if not transform.has_widgets():
+                continue
+            try:
+                transform.update_widgets_state()
+            except Exception as e:
+                log.exception(e)
+
+    def clear_cache(self):
+        """Clear cached results and make every node run on the next run"""
+        for node in self.nodes.values():
+            node.transform.clear_cache()
+            node.dirty = True
+
+    def _get_node(self, name: str) -> Node:
+        try:
+            return self.nodes[name]
+        except KeyError:
+            raise GraphError(f"There is no node named {name}") from None
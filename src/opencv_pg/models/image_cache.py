@@ -0,0 +1,97 @@
+"""Process wide cache of decoded images
+
+Every PipeWindow starts with its own loader for the same image, so without a
+cache each one decodes the file again. Images are keyed by path, modification
+time and size, so an edited file is decoded afresh, and the least recently
+used ones are evicted once ``[Performance] image_cache_size`` MB is exceeded.
+Cached images are read-only and shared by every loader that asks for them.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from utils.config_manager import config
+
+from .frames import readonly_view
+
+log = logging.getLogger(__name__)
+
+_cache = None
+
+
+class ImageCache:
+    """LRU cache of decoded images bounded by their total size in bytes
+
+    Args:
+        max_bytes (int): Total size of the cached images; images larger than
+            this are never cached
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, path: str, read: Callable[[str], Optional[np.ndarray]]
+    ) -> Optional[np.ndarray]:
+        """Return the image at ``path``, calling ``read(path)`` on a miss
+
+        Args:
+            path (str): Path of the image file
+            read (callable): Decodes the file; its result is cached unless it
+                is None. Must always decode the same way for a given path.
+
+        Returns:
+            np.ndarray or None: read-only image
+        """
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            img = self._images.get(key)
+            if img is not None:
+                self._images.move_to_end(key)
+                return img
+
+        img = readonly_view(read(path))
+        if img is None or img.nbytes > self.max_bytes:
+            return img
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = img
+                self._nbytes += img.nbytes
+            self._evict()
+        return img
+
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._images.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached images"""
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._images)
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes:
+            key, img = self._images.popitem(last=False)
+            self._nbytes -= img.nbytes
+            log.debug("Evicted %s from the image cache", key[0])
+
+
+def get_image_cache() -> ImageCache:
+    """Return the cache shared by all image loaders in this process"""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache(config.get_image_cache_size() * 1024 * 1024)
+    return _cache
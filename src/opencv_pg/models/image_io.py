@@ -0,0 +1,177 @@
+"""Reading images without decoding them into private memory
+
+``open_memmap`` maps NPY, raw and uncompressed TIFF files with ``np.memmap``,
+so the OS page cache holds a single copy of the pixels that is shared by every
+loader, window and batch worker opening the same file, and only the parts that
+are actually read are paged in.
+"""
+import logging
+import struct
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Extensions open_memmap understands
+MEMMAP_EXTENSIONS = (".npy", ".raw", ".tif", ".tiff")
+
+# TIFF tags used to locate the pixel data
+_WIDTH = 256
+_LENGTH = 257
+_BITS_PER_SAMPLE = 258
+_COMPRESSION = 259
+_PHOTOMETRIC = 262
+_STRIP_OFFSETS = 273
+_SAMPLES_PER_PIXEL = 277
+_STRIP_BYTE_COUNTS = 279
+_PLANAR_CONFIG = 284
+_TILE_WIDTH = 322
+_SAMPLE_FORMAT = 339
+
+# TIFF field type: (struct format, size)
+_FIELD_TYPES = {1: ("B", 1), 3: ("H", 2), 4: ("I", 4), 16: ("Q", 8)}
+
+# SampleFormat tag value: numpy dtype kind
+_SAMPLE_KINDS = {1: "u", 2: "i", 3: "f"}
+
+_PHOTOMETRIC_GRAY = 1
+_PHOTOMETRIC_RGB = 2
+
+
+class MemmapError(ValueError):
+    """Raised when a file can't be memory mapped, eg: a compressed TIFF"""
+
+
+def open_memmap(
+    path: Union[str, Path],
+    shape: Optional[Tuple[int, ...]] = None,
+    dtype=None,
+    offset: int = 0,
+) -> np.ndarray:
+    """Return a read-only memory mapped array of the image at ``path``
+
+    Color images are returned in BGR order like ``cv2.imread``; for RGB TIFFs
+    this is a reversed view, so still nothing is copied. Unlike ``cv2.imread``,
+    gray images keep a single channel and 16 bit images keep their depth.
+
+    Args:
+        path (str, Path): ``.npy``, uncompressed ``.tif``/``.tiff`` or any
+            other file of raw pixels
+        shape (tuple, optional): (rows, cols) or (rows, cols, channels) of a
+            raw file; required for raw files
+        dtype (str, np.dtype, optional): dtype of a raw file. Default uint8.
+        offset (int, optional): Bytes to skip at the start of a raw file
+
+    Raises:
+        MemmapError: if the file's layout can't be mapped
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        img = np.load(path, mmap_mode="r")
+    elif suffix in (".tif", ".tiff"):
+        img = _open_tiff(path)
+    else:
+        if shape is None:
+            raise MemmapError(f"The shape of raw image {path} must be given")
+        img = np.memmap(
+            path, dtype=dtype or np.uint8, mode="r", offset=offset, shape=tuple(shape)
+        )
+    if img.ndim not in (2, 3):
+        raise MemmapError(f"{path} is not an image; it has shape {img.shape}")
+    return img
+
+
+def read_image(path: Union[str, Path]) -> Optional[np.ndarray]:
+    """Return the image at ``path``, memory mapped if possible
+
+    Falls back to ``cv2.imread``; returns None if the image can't be read.
+    """
+    if Path(path).suffix.lower() in (".npy", ".tif", ".tiff"):
+        try:
+            return open_memmap(path)
+        except (MemmapError, OSError) as e:
+            log.debug("Decoding %s instead of mapping it: %s", path, e)
+    return cv2.imread(str(path))
+
+
+def _open_tiff(path: Path) -> np.ndarray:
+    """Map the first image of an uncompressed, strip based TIFF"""
+    with open(path, "rb") as fp:
+        header = fp.read(8)
+        if header[:2] == b"II":
+            order = "<"
+        elif header[:2] == b"MM":
+            order = ">"
+        else:
+            raise MemmapError(f"{path} is not a TIFF file")
+        magic, ifd_offset = struct.unpack(order + "HI", header[2:8])
+        if magic != 42:
+            raise MemmapError(f"{path} is not a classic TIFF (BigTIFF isn't supported)")
+        tags = _read_ifd(fp, order, ifd_offset)
+
+    def tag(code, default=None):
+        if code not in tags:
+            if default is None:
+                raise MemmapError(f"{path} is missing TIFF tag {code}")
+            return default
+        return tags[code]
+
+    if tag(_COMPRESSION, (1,))[0] != 1:
+        raise MemmapError(f"{path} is compressed")
+    if _TILE_WIDTH in tags:
+        raise MemmapError(f"{path} is tiled")
+    if tag(_PLANAR_CONFIG, (1,))[0] != 1:
+        raise MemmapError(f"{path} stores color planes separately")
+    photometric = tag(_PHOTOMETRIC)[0]
+    if photometric not in (_PHOTOMETRIC_GRAY, _PHOTOMETRIC_RGB):
+        raise MemmapError(f"{path} has unsupported photometric {photometric}")
+
+    cols, rows = tag(_WIDTH)[0], tag(_LENGTH)[0]
+    channels = tag(_SAMPLES_PER_PIXEL, (1,))[0]
+    bits = set(tag(_BITS_PER_SAMPLE, (1,)))
+    kind = _SAMPLE_KINDS.get(tag(_SAMPLE_FORMAT, (1,))[0])
+    if len(bits) != 1 or kind is None or next(iter(bits)) % 8:
+        raise MemmapError(f"{path} has unsupported samples")
+    dtype = np.dtype(f"{order}{kind}{next(iter(bits)) // 8}")
+
+    # The strips must follow each other to form a single array
+    offsets, counts = tag(_STRIP_OFFSETS), tag(_STRIP_BYTE_COUNTS)
+    for i in range(1, len(offsets)):
+        if offsets[i] != offsets[i - 1] + counts[i - 1]:
+            raise MemmapError(f"{path} has non contiguous strips")
+
+    shape = (rows, cols) if channels == 1 else (rows, cols, channels)
+    img = np.memmap(path, dtype=dtype, mode="r", offset=offsets[0], shape=shape)
+    if photometric == _PHOTOMETRIC_RGB and channels >= 3:
+        # RGB(A) to BGR as a view, dropping alpha like cv2.imread
+        img = img[..., 2::-1]
+    return img
+
+
+def _read_ifd(fp, order: str, offset: int) -> dict:
+    """Return {tag: tuple of values} of the TIFF IFD at ``offset``"""
+    fp.seek(offset)
+    (count,) = struct.unpack(order + "H", fp.read(2))
+    entries = fp.read(12 * count)
+    tags = {}
+    for i in range(count):
+        code, field_type, num, value = struct.unpack(
+            order + "HHI4s", entries[12 * i : 12 * i + 12]
+        )
+        if field_type not in _FIELD_TYPES:
+            continue
+        fmt, size = _FIELD_TYPES[field_type]
+        if num * size <= 4:
+            data = value[: num * size]
+        else:
+            (data_offset,) = struct.unpack(order + "I", value)
+            position = fp.tell()
+            fp.seek(data_offset)
+            data = fp.read(num * size)
+            fp.seek(position)
+        tags[code] = struct.unpack(f"{order}{num}{fmt}", data)
+    return tags
@@ -0,0 +1,320 @@
+"""Tune Params of a pipeline to maximize (or minimize) a metric
+
+The Params to tune and the values they may take are given as SweepAxis, and
+the score of a set of values is a metric of the pipeline's output, eg: the
+IoU of an InRange mask with a labelled one (``sweep.MaskIoU``), or the number
+of lines HoughLinesP finds (``"extra_count"``). Evaluations run in parallel
+on an ``sweep.EvaluationPool``.
+
+Methods:
+    - ``"coordinate"``: starting from the current values, tries every value
+      of one Param at a time, keeping the best, until a pass over all Params
+      improves nothing. Few evaluations, but may stop at a local optimum.
+    - ``"random"``: evaluates random combinations, in rounds of a few per
+      worker, until ``patience`` rounds improve nothing.
+
+Both also stop after ``max_evaluations``, ``max_seconds`` or once the score
+reaches ``goal``. The best values found are returned; ``sweep.apply_values``
+writes them into the pipeline.
+"""
+import logging
+import math
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from . import sweep
+from .pipeline import Pipeline
+
+log = logging.getLogger(__name__)
+
+COORDINATE = "coordinate"
+RANDOM = "random"
+METHODS = (COORDINATE, RANDOM)
+
+# Name the objective is stored under in SweepResult.metrics
+OBJECTIVE = "objective"
+
+# Why an optimization stopped
+CONVERGED = "converged"
+EXHAUSTED = "exhausted"
+NO_IMPROVEMENT = "no improvement"
+MAX_EVALUATIONS = "max evaluations"
+MAX_SECONDS = "max seconds"
+GOAL = "goal reached"
+CANCELLED = "cancelled"
+
+
+class OptimizeResult(NamedTuple):
+    """Outcome of ``optimize``"""
+
+    axes: tuple
+    # Best values found, in the order of ``axes``, None if every run failed
+    best_values: Optional[tuple]
+    best_score: Optional[float]
+    # Score of the values the pipeline had when the optimization started
+    initial_score: Optional[float]
+    # SweepResult of every evaluation, in the order they finished
+    history: list
+    seconds: float
+    # One of CONVERGED, EXHAUSTED, NO_IMPROVEMENT, MAX_EVALUATIONS,
+    # MAX_SECONDS, GOAL or CANCELLED
+    stopped: str
+
+    @property
+    def evaluations(self) -> int:
+        return len(self.history)
+
+
+def get_current_values(pipeline: Pipeline, axes: Sequence[sweep.SweepAxis]) -> tuple:
+    """Return the value of each of ``axes`` in ``pipeline``, snapped to the axis
+
+    Values that aren't one of the axis' values are replaced by the closest
+    one, or the first if they can't be compared.
+    """
+    values = []
+    for axis in axes:
+        transform = pipeline.get_transform(axis.win_index, axis.transform_index)
+        value = sweep.get_param_value(transform, axis.name)
+        if value not in axis.values:
+            try:
+                value = min(axis.values, key=lambda v: abs(v - value))
+            except TypeError:
+                value = axis.values[0]
+        values.append(value)
+    return tuple(values)
+
+
+class _Search:
+    """Tracks the evaluations of an optimization and when it must stop"""
+
+    def __init__(
+        self,
+        pool,
+        axes,
+        maximize,
+        max_evaluations,
+        max_seconds,
+        goal,
+        min_delta,
+        cancel_event,
+        callback,
+    ):
+        self.pool = pool
+        self.axes = axes
+        self.sign = 1 if maximize else -1
+        self.max_evaluations = max_evaluations
+        self.max_seconds = max_seconds
+        self.goal = goal
+        self.min_delta = min_delta
+        self.cancel_event = cancel_event
+        self.callback = callback
+        self.start = time.perf_counter()
+        # {values: score or None}
+        self.scores = {}
+        self.history = []
+        self.best_values = None
+        self.best_score = None
+        self.stopped = None
+
+    def get_score(self, result) -> Optional[float]:
+        if result.error is not None:
+            return None
+        score = result.metrics.get(OBJECTIVE)
+        if score is None:
+            return None
+        score = float(score)
+        return None if math.isnan(score) else score
+
+    def is_better(self, score, than) -> bool:
+        if score is None:
+            return False
+        if than is None:
+            return True
+        return self.sign * (score - than) > self.min_delta
+
+    def check_stop(self) -> bool:
+        """Set ``stopped`` and return True if no more evaluations may run"""
+        if self.stopped is not None:
+            return True
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.stopped = CANCELLED
+        elif self.goal is not None and self.best_score is not None and (
+            self.sign * (self.best_score - self.goal) >= 0
+        ):
+            self.stopped = GOAL
+        elif self.max_evaluations is not None and len(self.history) >= self.max_evaluations:
+            self.stopped = MAX_EVALUATIONS
+        elif self.max_seconds is not None and (
+            time.perf_counter() - self.start >= self.max_seconds
+        ):
+            self.stopped = MAX_SECONDS
+        return self.stopped is not None
+
+    def evaluate(self, candidates: List[tuple]) -> bool:
+        """Evaluate the ``candidates`` not evaluated yet, updating the best
+
+        Returns:
+            bool: True if the best score improved
+        """
+        candidates = [
+            values for values in dict.fromkeys(candidates) if values not in self.scores
+        ]
+        if self.max_evaluations is not None:
+            candidates = candidates[: max(0, self.max_evaluations - len(self.history))]
+        if not candidates:
+            return False
+        improved = False
+        combinations = [(len(self.scores) + i, values) for i, values in enumerate(candidates)]
+        for values in candidates:
+            self.scores[values] = None
+        for result in self.pool.evaluate(combinations, self.cancel_event):
+            score = self.get_score(result)
+            self.scores[result.values] = score
+            self.history.append(result)
+            if self.is_better(score, self.best_score):
+                self.best_values, self.best_score = result.values, score
+                improved = True
+            if self.callback is not None:
+                self.callback(result)
+        return improved
+
+
+def _coordinate_descent(search: _Search, initial: tuple):
+    axes = search.axes
+    search.evaluate([initial])
+    while not search.check_stop():
+        improved = False
+        for position, axis in enumerate(axes):
+            if search.check_stop():
+                return
+            base = list(search.best_values or initial)
+            candidates = []
+            for value in axis.values:
+                base[position] = value
+                candidates.append(tuple(base))
+            improved |= search.evaluate(candidates)
+        if not improved:
+            search.stopped = CONVERGED
+            return
+
+
+def _random_search(search: _Search, initial: tuple, patience: int, batch_size: int, seed):
+    rng = random.Random(seed)
+    total = sweep.count_combinations(search.axes)
+    search.evaluate([initial])
+    rounds_without_improvement = 0
+    while not search.check_stop():
+        remaining = total - len(search.scores)
+        if remaining <= 0:
+            search.stopped = EXHAUSTED
+            return
+        candidates = set()
+        # Sampling with retries rather than enumerating the whole product
+        attempts = 0
+        while len(candidates) < min(batch_size, remaining) and attempts < batch_size * 20:
+            attempts += 1
+            values = tuple(rng.choice(axis.values) for axis in search.axes)
+            if values not in search.scores:
+                candidates.add(values)
+        if not candidates:
+            search.stopped = EXHAUSTED
+            return
+        if search.evaluate(sorted(candidates, key=repr)):
+            rounds_without_improvement = 0
+        else:
+            rounds_without_improvement += 1
+            if rounds_without_improvement >= patience:
+                search.stopped = NO_IMPROVEMENT
+                return
+
+
+def optimize(
+    pipeline: Pipeline,
+    axes: Sequence[sweep.SweepAxis],
+    objective,
+    maximize: bool = True,
+    method: str = COORDINATE,
+    max_evaluations: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    goal: Optional[float] = None,
+    patience: int = 10,
+    min_delta: float = 0.0,
+    workers: Optional[int] = None,
+    max_dimension: Optional[int] = None,
+    output_window: int = -1,
+    seed=None,
+    cancel_event=None,
+    callback: Optional[Callable] = None,
+) -> OptimizeResult:
+    """Search the values of ``axes`` that give the best ``objective``
+
+    ``pipeline`` itself isn't modified; apply the result with
+    ``sweep.apply_values(pipeline, result.axes, result.best_values)``.
+
+    Args:
+        pipeline (Pipeline): Pipeline to tune
+        axes (list): SweepAxis of each Param to tune, with the values to try
+        objective (str or callable): Metric to optimize, see ``sweep.get_metric``.
+            Must be picklable to run on workers, eg: a MaskIoU.
+        maximize (bool, optional): False to minimize the objective
+        method (str, optional): One of METHODS
+        max_evaluations (int, optional): Stop after this many evaluations
+        max_seconds (float, optional): Stop starting evaluations after this long
+        goal (float, optional): Stop once the score is at least this good
+        patience (int, optional): Rounds of random search without improvement
+            before stopping
+        min_delta (float, optional): Smallest change of the score that counts
+            as an improvement
+        workers (int, optional): See ``sweep.EvaluationPool``
+        max_dimension (int, optional): See ``sweep.EvaluationPool``
+        output_window (int, optional): See ``sweep.EvaluationPool``
+        seed (optional): Seed of the random search
+        cancel_event (threading.Event, optional): When set, the search stops
+            and the best values so far are returned
+        callback (callable, optional): Called with every SweepResult as it
+            arrives, on the calling thread
+
+    Returns:
+        OptimizeResult: best values and every evaluation
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}; expected one of {METHODS}")
+    axes = tuple(axes)
+    initial = get_current_values(pipeline, axes)
+    with sweep.EvaluationPool(
+        pipeline,
+        axes,
+        {OBJECTIVE: objective},
+        workers,
+        thumbnail_size=None,
+        max_dimension=max_dimension,
+        output_window=output_window,
+    ) as pool:
+        search = _Search(
+            pool,
+            axes,
+            maximize,
+            max_evaluations,
+            max_seconds,
+            goal,
+            min_delta,
+            cancel_event,
+            callback,
+        )
+        if method == COORDINATE:
+            _coordinate_descent(search, initial)
+        else:
+            batch_size = max(1, pool.workers) * 4
+            _random_search(search, initial, patience, batch_size, seed)
+        search.check_stop()
+
+    return OptimizeResult(
+        axes=axes,
+        best_values=search.best_values,
+        best_score=search.best_score,
+        initial_score=search.scores.get(initial),
+        history=search.history,
+        seconds=time.perf_counter() - search.start,
+        stopped=search.stopped,
+    )
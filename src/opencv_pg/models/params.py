@@ -1,31 +1,42 @@
-import sys
-# Remove incorrect path manipulation
-# sys.path.append("opencv_pg/models/views")
+"""Params hold the values a transform operates on
 
+Params only depend on NumPy. Their widgets, and the Qt modules they need, are
+imported when the view layer first asks for a widget via ``get_widget``, so
+transforms can be imported and run without PySide6.
+"""
 import copy
 import logging
 
 import numpy as np
-# Fix the incorrect import path
-from views.widgets.slider_spinbox import DynamicSliderSpinBox
-
-from PySide6 import QtWidgets, QtCore, QtGui
-
-from views.widgets.sliders import (
-    IntQSlider,
-    FloatQSlider,
-    SliderContainer,
-    SliderPair,
-)
-from views.widgets.array import (
-    ArrayEditor,
-    ArrayEditorWithStructElement,
-    ArraySize,
-)
-from .table_model import TableModel
 
 log = logging.getLogger(__name__)
 
+# Values for Param.preview_scaling
+PREVIEW_LINEAR = "linear"
+PREVIEW_ODD = "odd"
+
+
+def _scale_value(value, scale, mode):
+    """Return ``value`` scaled by ``scale`` according to ``mode``
+
+    Only positive numbers are scaled; zero and negative values usually have a
+    special meaning in cv2 (eg: thickness -1 fills). Ints stay ints >= 1 and
+    ``PREVIEW_ODD`` rounds down to the nearest odd int, eg: for kernel sizes.
+    Tuples and lists are scaled element-wise.
+    """
+    if isinstance(value, (tuple, list)):
+        return type(value)(_scale_value(v, scale, mode) for v in value)
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.number)):
+        return value
+    if value <= 0:
+        return value
+    scaled = value * scale
+    if mode == PREVIEW_ODD:
+        return max(1, int(scaled) // 2 * 2 + 1)
+    if isinstance(value, (int, np.integer)):
+        return max(1, int(round(scaled)))
+    return scaled
+
 
 class Param:
     """Base class for all Transform Param's
@@ -37,9 +48,15 @@ class Param:
             each word capitalized.
         help_text (str, optional): Tooltip text to display when cursor is
             hovered over the Param's label. Default is ''.
+        preview_scaling (str, optional): How the value is scaled when the
+            pipeline renders a downscaled preview: ``PREVIEW_LINEAR`` for
+            sizes in pixels, ``PREVIEW_ODD`` for odd kernel sizes. Default is
+            None, the value doesn't depend on the image size.
     """
 
-    def __init__(self, default=None, label=None, read_only=False, help_text=""):
+    def __init__(
+        self, default=None, label=None, read_only=False, help_text="", preview_scaling=None
+    ):
         self._value = default
         super().__init__()
         self.label = label
@@ -47,6 +64,18 @@ class Param:
         self.widget = None
         self.help_text = help_text
         self.read_only = read_only
+        self.preview_scaling = preview_scaling
+
+    def get_value(self, scale=1.0):
+        """Return the value to use for an image rendered at ``scale``
+
+        Args:
+            scale (float): Size of the image being processed relative to the
+                full resolution image
+        """
+        if scale == 1.0 or self.preview_scaling is None:
+            return self._value
+        return _scale_value(self._value, scale, self.preview_scaling)
 
     def _get_widget(self, parent=None):
         """Return widget for this Param
@@ -76,6 +105,23 @@ class Param:
         lbl.setEnabled(enabled)
         self.widget.setEnabled(enabled)
 
+    def get_state(self):
+        """Return the state that determines this Param's effect on a transform
+
+        Used to detect whether a transform's result can be reused, so anything
+        a transform reads from its Param must be part of the state.
+        """
+        return self._value
+
+    def set_state(self, state):
+        """Restore a state previously returned by ``get_state``
+
+        Does not update the widget or run the pipeline.
+        """
+        self._value = state
+        if self._transform is not None:
+            self._transform.dirty = True
+
     def _store_value_and_start(self, value):
         """Store the changed value and run the pipeline
 
@@ -98,6 +144,7 @@ class BaseSlider(Param):
         step (Int, Float): Step size of the slider
         editable_range (Bool): If True, allows editing the min/max by double
             clicking the respective min/max label.
+        preview_scaling (str, optional): See ``Param``
     """
 
     slider_class = None
@@ -111,8 +158,14 @@ class BaseSlider(Param):
         label=None,
         editable_range=True,
         help_text="",
+        preview_scaling=None,
     ):
-        super().__init__(default=default, label=label, help_text=help_text)
+        super().__init__(
+            default=default,
+            label=label,
+            help_text=help_text,
+            preview_scaling=preview_scaling,
+        )
         self.min = min_val
         self.max = max_val
         self.default = default
@@ -128,7 +181,11 @@ class BaseSlider(Param):
         raise ValueError(f"Default must be between {_min} and {_max}. Got {default}.")
 
     def _get_widget(self, parent=None):
-        widget = self.slider_class(QtCore.Qt.Horizontal, parent=parent)
+        from PySide6 import QtCore
+        from views.widgets import sliders
+
+        slider_class = getattr(sliders, self.slider_class)
+        widget = slider_class(QtCore.Qt.Horizontal, parent=parent)
         widget.setMinimum(self.min)
         widget.setMaximum(self.max)
         widget.setInterval(self.step)
@@ -136,7 +193,7 @@ class BaseSlider(Param):
         # Use a lambda to ensure proper binding of the change handler.
         widget.valueChanged.connect(lambda value: self._handle_value_changed(value))
         
-        container = SliderContainer(widget, editable_range=self.editable_range)
+        container = sliders.SliderContainer(widget, editable_range=self.editable_range)
         
         # The container now has a value_spinbox instead of slider_text
         return container
@@ -163,28 +220,21 @@ class BaseSlider(Param):
         self.widget.slider.setMaximum(value)
 
     def _handle_value_changed(self, value):
-        """Runs the pipeline - subclasses override with @Slot and call super"""
+        """Runs the pipeline"""
         self._store_value_and_start(value)
 
 
 class IntSlider(BaseSlider):
     """A slider that operates on Integers"""
 
-    slider_class = IntQSlider
-
-    @QtCore.Slot(int)
-    def _handle_value_changed(self, value):
-        super()._handle_value_changed(value)
+    # Name of the slider widget in views.widgets.sliders
+    slider_class = "IntQSlider"
 
 
 class FloatSlider(BaseSlider):
     """A slider that operates on Floats"""
 
-    slider_class = FloatQSlider
-
-    @QtCore.Slot(float)
-    def _handle_value_changed(self, value):
-        super()._handle_value_changed(value)
+    slider_class = "FloatQSlider"
 
 
 class ComboBox(Param):
@@ -215,6 +265,8 @@ class ComboBox(Param):
         return self.options_map[default]
 
     def _get_widget(self, parent=None):
+        from PySide6 import QtWidgets
+
         options_inverse = {v: k for k, v in self.options_map.items()}
         widget = QtWidgets.QComboBox(parent=parent)
         for item in self.options:
@@ -224,7 +276,6 @@ class ComboBox(Param):
         widget.currentTextChanged.connect(lambda text: self._handle_value_changed(text))
         return widget
 
-    @QtCore.Slot(str)
     def _handle_value_changed(self, value):
         self._store_value_and_start(self.options_map[value])
 
@@ -253,6 +304,8 @@ class ColorPicker(Param):
         return default
 
     def _get_widget(self, parent=None):
+        from PySide6 import QtWidgets
+
         btn = QtWidgets.QPushButton(text="Choose Color")
         btn.setIcon(self._get_color_icon())
         # Connect using lambda to adapt the parameters
@@ -261,15 +314,18 @@ class ColorPicker(Param):
 
     def _get_color_icon(self, x=10, y=10):
         """Return the current color as an RGB tuple"""
+        from PySide6 import QtGui
+
         pixmap = QtGui.QPixmap(x, y)
         b, g, r = self._value
         # Replace qRgb with QColor which is the expected type for fill()
         color = QtGui.QColor(r, g, b)
         return QtGui.QIcon(pixmap)
 
-    @QtCore.Slot()
     def _handle_clicked(self):
         """Open color picker and store result. Picker is asssumed to be RGB"""
+        from PySide6 import QtGui, QtWidgets
+
         initial = QtGui.QColor()
         b, g, r = self._value
         initial.setRgb(r, g, b, 255)
@@ -297,6 +353,8 @@ class ReadOnlyLabel(Param):
         return default
 
     def _get_widget(self, parent=None):
+        from PySide6 import QtWidgets
+
         return QtWidgets.QLabel(str(self))
 
     def __str__(self):
@@ -306,13 +364,29 @@ class ReadOnlyLabel(Param):
 class SpinBox(Param):
     """A SpinBox Param"""
 
-    def __init__(self, min_val, max_val, default=None, step=1, label=None, help_text=""):
-        super().__init__(default=default, label=label, help_text=help_text)
+    def __init__(
+        self,
+        min_val,
+        max_val,
+        default=None,
+        step=1,
+        label=None,
+        help_text="",
+        preview_scaling=None,
+    ):
+        super().__init__(
+            default=default,
+            label=label,
+            help_text=help_text,
+            preview_scaling=preview_scaling,
+        )
         self.min = min_val
         self.max = max_val
         self.step = step
 
     def _get_widget(self, parent=None):
+        from views.widgets.slider_spinbox import DynamicSliderSpinBox
+
         is_float = not isinstance(self._value, int)
         widget = DynamicSliderSpinBox(self.min, self.max, self._value, self.step, is_float, parent)
         widget.valueChanged(lambda value: self._store_value_and_start(value))
@@ -334,6 +408,8 @@ class CheckBox(Param):
         return default
 
     def _get_widget(self, parent=None):
+        from PySide6 import QtWidgets
+
         sb = QtWidgets.QCheckBox(parent=parent)
         sb.setCheckState(self._get_checked_state(self._value))
         # Wrap the slot to ensure it's bound correctly
@@ -342,12 +418,15 @@ class CheckBox(Param):
 
     def _get_checked_state(self, value):
         """Return the appropriate QtCore.Qt.CheckState based on bool val"""
+        from PySide6 import QtCore
+
         if value:
             return QtCore.Qt.CheckState.Checked
         return QtCore.Qt.CheckState.Unchecked
 
-    @QtCore.Slot(int)
     def _handle_value_changed(self, value):
+        from PySide6 import QtCore
+
         if value == QtCore.Qt.CheckState.Unchecked:
             value = False
         elif value == QtCore.Qt.CheckState.Checked:
@@ -399,6 +478,8 @@ class Dimensions2D(Param):
         return default
 
     def _get_widget(self, parent=None):
+        from views.widgets.array import ArraySize
+
         widget = ArraySize(
             parent=parent, prefix=self.prefix, min_val=self.min, max_val=self.max
         )
@@ -408,7 +489,6 @@ class Dimensions2D(Param):
         )
         return widget
 
-    @QtCore.Slot(int, int)
     def _handle_value_changed(self, rows, cols):
         self._store_value_and_start((rows, cols))
 
@@ -463,6 +543,10 @@ class Array(Param):
             raise ValueError("Matrix default must be a numpy array, got %s" % type(default))
 
     def _get_widget(self, parent=None):
+        from views.widgets.array import ArrayEditor, ArrayEditorWithStructElement
+
+        from .table_model import TableModel
+
         model = TableModel(np.ones(self._value.shape))
         if not self._editable_array:
             model.editable = False
@@ -481,7 +565,15 @@ class Array(Param):
             widget.anchorChanged.connect(lambda row, col: self._handle_anchor_changed(row, col))
         return widget
 
-    # Remove the @QtCore.Slot decorator that's causing the type mismatch
+    def get_state(self):
+        """Include the anchor since transforms read it alongside the array"""
+        return (self._value, self.anchor)
+
+    def set_state(self, state):
+        self._value, self.anchor = state
+        if self._transform is not None:
+            self._transform.dirty = True
+
     def _handle_value_changed(self, array):
         self._store_value_and_start(array)
 
@@ -526,6 +618,9 @@ class SliderPairParam(Param):
         return {"top": _min, "bot": _max}
 
     def _get_widget(self, parent=None):
+        from PySide6 import QtCore
+        from views.widgets.sliders import IntQSlider, SliderPair
+
         slider1 = IntQSlider(QtCore.Qt.Horizontal, parent=parent)
         slider2 = IntQSlider(QtCore.Qt.Horizontal, parent=parent)
         self._setup_slider(slider1, self.min)
@@ -562,6 +657,8 @@ class NumberParam:
         self.step = step
 
     def get_widget(self):
+        from PySide6 import QtWidgets
+
         widget = QtWidgets.QSpinBox()
         widget.setMinimum(self.min_value)
         widget.setMaximum(self.max_value)
@@ -1,8 +1,9 @@
 import logging
-from typing import List, Union
+from typing import List, Tuple, Union
 
-from .window import Window
+from .window import PipelineCancelled, Window
 from .base_transform import BaseTransform
+from . import batching, spec, stats, tiling
 
 Windows = List[Window]
 Transforms = List[BaseTransform]
@@ -15,18 +16,292 @@ class Pipeline:
 
     def __init__(self, items: Union[Windows, Transforms, BaseTransform, Window]):
         self.windows = self._create_windows(items)
+        self.scheduler = None
+        # StreamRunner feeding frames through this pipeline, if any
+        self.stream = None
+        # Longest side of preview runs; None renders previews at full size
+        self.preview_max_dimension = None
+        self.preview_scale = 1.0
+        self.roi = None
         self._init_pipeline()
 
-    def run_pipeline(self, win_index: int = 0, transform_index: int = 0):
-        """Run pipeline from Window ``win_index`` and Transform ``transform_index``"""
-        img_out = None
-        extra_out = None
+    def set_scheduler(self, scheduler):
+        """Route ``request_run`` through ``scheduler`` instead of running now
+
+        Args:
+            scheduler (PipelineScheduler, None): Scheduler, or None to run
+                requests synchronously
+        """
+        self.scheduler = scheduler
+
+    def set_preview_max_dimension(self, max_dimension):
+        """Render preview runs with the longest image side at most ``max_dimension``
+
+        Args:
+            max_dimension (int, None): Longest side in pixels, or None to
+                render previews at full resolution
+        """
+        self.preview_max_dimension = max_dimension
+
+    def get_source_size(self):
+        """Return (rows, cols) of the full resolution source image, or None
+        if the first transform doesn't create one (eg: LoadImage does)
+        """
+        return self.windows[0].transforms[0].get_source_size()
+
+    def get_preview_scale(self) -> float:
+        """Return the scale preview runs are rendered at, 1.0 for full size"""
+        if not self.preview_max_dimension:
+            return 1.0
+        size = self.get_source_size()
+        if not size or max(size) <= self.preview_max_dimension:
+            return 1.0
+        return self.preview_max_dimension / max(size)
+
+    def get_halo(self):
+        """Return how many pixels around a region the transforms need
+
+        Returns:
+            int or None: Sum of the ``halo`` of every enabled transform after
+                the source, or None if any of them needs the whole image
+        """
+        total = 0
+        for transform in self.get_processing_transforms():
+            halo = transform.halo()
+            if halo is None:
+                return None
+            total += halo
+        return total
+
+    def get_processing_transforms(self) -> Transforms:
+        """Return the enabled transforms that process an incoming image
+
+        That is every enabled transform in order, except a source that creates
+        the image such as LoadImage.
+        """
+        transforms = [t for window in self.windows for t in window.transforms]
+        if transforms[0].get_source_size() is not None:
+            transforms = transforms[1:]
+        return [t for t in transforms if t.enabled]
+
+    def get_visible_rect(self):
+        """Return the part of the source image that is on screen, or None
+
+        This is the union of every window's ``visible_rect``, clipped to the
+        image. None is returned when the whole image has to be processed
+        anyway: it is all visible, a transform is not local (see
+        ``BaseTransform.halo``), or processing the region at full resolution
+        would cost more than a downscaled preview of the whole image.
+        """
+        size = self.get_source_size()
+        rects = [window.visible_rect for window in self.windows]
+        if not size or any(rect is None for rect in rects):
+            return None
+        if self.get_halo() is None:
+            return None
+
+        rows, cols = size
+        x0 = max(0, min(x for x, _, _, _ in rects))
+        y0 = max(0, min(y for _, y, _, _ in rects))
+        x1 = min(cols, max(x + w for x, _, w, _ in rects))
+        y1 = min(rows, max(y + h for _, y, _, h in rects))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        if (x1 - x0) * (y1 - y0) >= rows * cols * self.get_preview_scale() ** 2:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def request_run(self, win_index: int = 0, transform_index: int = 0):
+        """Ask for a run from ``win_index``, ``transform_index``
+
+        Runs immediately unless a scheduler is set, in which case the request
+        may be merged with others and run later. While a stream is running the
+        request is dropped; its next frame picks up the change.
+        """
+        if self.stream is not None and self.stream.is_running():
+            # Frames run on the stream's thread, which can't touch widgets
+            self.update_widgets_state()
+        elif self.scheduler is None:
+            self.run_pipeline(win_index, transform_index)
+        else:
+            self.scheduler.request_run(win_index, transform_index)
+
+    def run_pipeline(
+        self,
+        win_index: int = 0,
+        transform_index: int = 0,
+        cancel_event=None,
+        img_in=None,
+        extra_in=None,
+        preview=False,
+        region=None,
+    ):
+        """Run pipeline from Window ``win_index`` and Transform ``transform_index``
+
+        Transforms whose inputs and params did not change since their last run
+        return their cached result instead of being recomputed. Those that
+        aren't ``dirty`` and are given the same input objects skip even the
+        comparison, so the windows after a changed transform only recompute
+        what depends on it.
+
+        A preview run processes a downscaled copy of the source image (see
+        ``set_preview_max_dimension``) and scales size dependent params to
+        match. Switching between preview and full resolution restarts the run
+        from the first transform; results of both are cached separately.
+
+        Passing a ``region`` processes only that part of the source image, at
+        full resolution, grown by the halo the transforms need around it (see
+        ``get_halo``). Outputs then cover ``Window.output.roi``; the pixels
+        outside ``region`` may be inaccurate.
+
+        Args:
+            cancel_event (threading.Event, optional): When set, the run stops
+                at the next transform boundary by raising ``PipelineCancelled``
+            img_in (np.ndarray, optional): Input for the first transform run.
+                Default is to reuse the input it was last given.
+            extra_in (object, optional): Extra input to go with ``img_in``
+            preview (bool, optional): If True, render at the preview scale
+            region (tuple, optional): (x, y, width, height) of the source
+                image to process, eg: from ``get_visible_rect``. Ignored with
+                ``img_in``.
+        """
+        if img_in is not None:
+            preview, region = False, None
+        scale = self.get_preview_scale() if preview and region is None else 1.0
+        if scale != self.preview_scale:
+            self._set_preview_scale(scale)
+            win_index = transform_index = 0
+        # Halos are measured at the scale being rendered
+        roi = self._get_roi(region) if region is not None else None
+        if roi != self.roi:
+            self._set_roi(roi)
+            win_index = transform_index = 0
+
+        img_out = img_in
+        extra_out = extra_in
         for window in self.windows[win_index:]:
-            img_out, extra_out = window.draw(img_out, extra_out, transform_index)
+            img_out, extra_out = window.draw(
+                img_out, extra_out, transform_index, cancel_event
+            )
             # Only want to start win_index at transform_index; every other at 0
             transform_index = 0
         return img_out, extra_out
 
+    def _set_preview_scale(self, scale: float):
+        self.preview_scale = scale
+        for window in self.windows:
+            for transform in window.transforms:
+                transform.preview_scale = scale
+
+    def _get_roi(self, region):
+        """Return ``region`` grown by the halo, or None for the whole image"""
+        halo = self.get_halo()
+        size = self.get_source_size()
+        if halo is None or not size:
+            return None
+        rows, cols = size
+        x, y, width, height = region
+        x0, y0 = max(0, x - halo), max(0, y - halo)
+        x1, y1 = min(cols, x + width + halo), min(rows, y + height + halo)
+        if (x0, y0, x1, y1) == (0, 0, cols, rows):
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _set_roi(self, roi):
+        self.roi = roi
+        for window in self.windows:
+            for transform in window.transforms:
+                transform.roi = roi
+
+    def run_tiled(self, src, dst=None, tile_size=None, workers=None):
+        """Run the pipeline on ``src`` tile by tile; see ``tiling.run_tiled``
+
+        Runs at full resolution, whatever the last run's preview scale or
+        region.
+        """
+        self._set_full_resolution()
+        return tiling.run_tiled(self, src, dst, tile_size, workers)
+
+    def _set_full_resolution(self):
+        """Undo the preview scale and region of the last run, eg: before
+        running transforms with ``apply``, which uses them as they are
+        """
+        if self.preview_scale != 1.0:
+            self._set_preview_scale(1.0)
+        if self.roi is not None:
+            self._set_roi(None)
+
+    def run_batch(self, imgs, extras=None):
+        """Run the pipeline on a stack of frames; see ``batching.run_batch``
+
+        Runs at full resolution, like ``run_tiled``.
+        """
+        self._set_full_resolution()
+        return batching.run_batch(self, imgs, extras)
+
+    def get_stats(self) -> List[Tuple[BaseTransform, "stats.DrawStats"]]:
+        """Return (transform, DrawStats) of the last draw of every transform
+
+        Transforms that didn't run, eg: disabled ones, are left out.
+        """
+        return [
+            (transform, transform.stats)
+            for window in self.windows
+            for transform in window.transforms
+            if transform.stats is not None
+        ]
+
+    def format_stats(self) -> str:
+        """Return ``get_stats`` as a text table, slowest stage first"""
+        rows = sorted(self.get_stats(), key=lambda row: -row[1].wall_time)
+        return stats.format_table(
+            [(transform.__class__.__name__, draw_stats) for transform, draw_stats in rows]
+        )
+
+    def update_widgets_state(self):
+        """Update every transform's widgets from its current param values
+
+        Must be called on the GUI thread; used before a run is handed to a
+        worker thread, where transforms skip ``update_widgets_state``.
+        """
+        for window in self.windows:
+            for transform in window.transforms:
+                if not transform.has_widgets():
+                    continue
+                try:
+                    transform.update_widgets_state()
+                except Exception as e:
+                    log.exception(e)
+
+    def clear_cache(self):
+        """Clear cached transform results so the next run recomputes everything"""
+        for window in self.windows:
+            window.clear_cache()
+
+    def to_spec(self) -> dict:
+        """Return a JSON serializable spec of this pipeline; see ``models.spec``"""
+        return spec.pipeline_to_spec(self)
+
+    @classmethod
+    def from_spec(cls, pipeline_spec: dict, image_path=None) -> "Pipeline":
+        """Return a new Pipeline built from ``pipeline_spec``
+
+        Args:
+            pipeline_spec (dict): As returned by ``to_spec``
+            image_path (str, optional): Image to load instead of the one
+                saved with the pipeline's image loaders
+        """
+        return cls(spec.windows_from_spec(pipeline_spec, image_path))
+
+    def save(self, path):
+        """Save this pipeline's spec as JSON to ``path``"""
+        spec.save_spec(self.to_spec(), path)
+
+    @classmethod
+    def load(cls, path, image_path=None) -> "Pipeline":
+        """Return the Pipeline saved at ``path``; see ``from_spec``"""
+        return cls.from_spec(spec.load_spec(path), image_path)
+
     def get_transform(self, win_index: int, trans_index: int) -> BaseTransform:
         """Returns Transform at ``win_index``, ``trans_index``
 
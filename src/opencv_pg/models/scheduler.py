@@ -0,0 +1,185 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6 import QtCore
+
+from utils.config_manager import config
+
+from .window import PipelineCancelled
+
+log = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """Return the thread pool shared by all schedulers
+
+    Its size is ``[Performance] processing_threads``; each pipeline has at most
+    one run in flight, so this bounds how many pipelines process at once.
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, config.get_processing_threads())
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pipeline"
+        )
+    return _executor
+
+
+class PipelineScheduler(QtCore.QObject):
+    """Coalesces run requests for a Pipeline and runs them on a worker thread
+
+    Param widgets request a run on every ``valueChanged``, so dragging a slider
+    produces far more requests than can be rendered. Requests made while a run
+    is pending are merged into it: the run starts from the earliest requested
+    position and uses whatever the param values are when it fires, so only the
+    latest state is rendered and the stale ones are dropped.
+
+    Runs happen on the shared thread pool so the GUI stays responsive. A request
+    that arrives while a run is in flight cancels it at the next transform
+    boundary; the next run restarts from the earlier of the two positions and
+    the transforms that already finished are served from their cache. Results
+    reach the views through ``Window.image_updated``, which PipeWindow forwards
+    to the GUI thread.
+
+    Requested runs are previews rendered with the longest image side at
+    ``[Performance] max_image_dimension`` (if ``downscale_large_images``), or
+    when the viewers are zoomed in, only the part of the image on screen (see
+    ``Pipeline.get_visible_rect``). Once no request has arrived for
+    ``settle_interval`` after such a partial run, the whole pipeline is
+    rendered again at full resolution; a new request cancels that pass.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run
+        interval (int, optional): Milliseconds to collect requests before
+            running. Default is ``[Performance] pipeline_debounce_interval``.
+        parent (QObject, optional): Qt parent
+        settle_interval (int, optional): Milliseconds without requests before
+            the full resolution pass. Default is ``[Performance]
+            preview_settle_interval``.
+    """
+
+    # Emitted from the worker thread; connected queued to _handle_run_done
+    _run_done = QtCore.Signal(object)
+
+    # Emitted on the GUI thread when a run completes without being cancelled
+    finished = QtCore.Signal()
+
+    def __init__(self, pipeline, interval=None, parent=None, settle_interval=None):
+        super().__init__(parent)
+        if interval is None:
+            interval = config.get_pipeline_debounce_interval()
+        if settle_interval is None:
+            settle_interval = config.get_preview_settle_interval()
+        self.pipeline = pipeline
+        if config.should_downscale_large_images():
+            self.pipeline.set_preview_max_dimension(config.get_max_image_dimension())
+        self._pending = None
+        self._running = None
+        self._running_partial = False
+        self._cancel_event = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._run_pending)
+        self._settle_timer = QtCore.QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(settle_interval)
+        self._settle_timer.timeout.connect(self._run_full_resolution)
+        self._run_done.connect(self._handle_run_done, QtCore.Qt.QueuedConnection)
+
+    def request_run(self, win_index=0, transform_index=0):
+        """Schedule a run from Window ``win_index`` and Transform ``transform_index``"""
+        self._settle_timer.stop()
+        self._add_pending((win_index, transform_index))
+        if self._running is not None:
+            # Restart the in-flight run once it stops at a transform boundary
+            self._add_pending(self._running)
+            self._cancel_event.set()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def has_pending(self):
+        """Return True if a run is waiting to be started"""
+        return self._pending is not None
+
+    def is_running(self):
+        """Return True if a run is in flight on a worker thread"""
+        return self._running is not None
+
+    def flush(self):
+        """Start the pending run now, if there is one and none is in flight"""
+        self._timer.stop()
+        self._run_pending()
+
+    def cancel(self):
+        """Drop the pending run and cancel the one in flight, if any"""
+        self._timer.stop()
+        self._settle_timer.stop()
+        self._pending = None
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def _add_pending(self, start):
+        if self._pending is None or start < self._pending:
+            self._pending = start
+
+    @QtCore.Slot()
+    def _run_pending(self):
+        if self._pending is None or self._running is not None:
+            return
+        # Any requests this triggers are merged into the run started below
+        self.pipeline.update_widgets_state()
+        start = self._pending
+        self._pending = None
+        self._submit(start, preview=True, region=self.pipeline.get_visible_rect())
+
+    @QtCore.Slot()
+    def _run_full_resolution(self):
+        if self._pending is not None or self._running is not None:
+            return
+        self._submit((0, 0), preview=False)
+
+    def _submit(self, start, preview, region=None):
+        self._running = start
+        self._running_partial = preview or region is not None
+        self._cancel_event = threading.Event()
+
+        win_index, transform_index = start
+        log.debug(
+            "Running pipeline from %s, %s (preview=%s, region=%s)",
+            win_index,
+            transform_index,
+            preview,
+            region,
+        )
+        future = get_executor().submit(
+            self.pipeline.run_pipeline,
+            win_index,
+            transform_index,
+            self._cancel_event,
+            preview=preview,
+            region=region,
+        )
+        future.add_done_callback(self._run_done.emit)
+
+    @QtCore.Slot(object)
+    def _handle_run_done(self, future):
+        self._running = None
+        self._cancel_event = None
+        try:
+            future.result()
+        except PipelineCancelled:
+            log.debug("Pipeline run cancelled")
+        except Exception as e:
+            log.exception(e)
+        else:
+            self.finished.emit()
+            partial = self.pipeline.preview_scale < 1 or self.pipeline.roi is not None
+            if self._running_partial and self._pending is None and partial:
+                self._settle_timer.start()
+
+        if self._pending is not None:
+            self._run_pending()
@@ -0,0 +1,38 @@
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class Signal:
+    """A minimal callback list used by models in place of a Qt signal
+
+    Keeps the models importable without PySide6. Callbacks run synchronously
+    on the thread that calls ``emit``, which may be a worker thread; views
+    must hand the call over to the GUI thread themselves, eg: by re-emitting a
+    Qt signal.
+    """
+
+    def __init__(self):
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def connect(self, callback):
+        """Call ``callback(*args)`` on every ``emit``"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def disconnect(self, callback=None):
+        """Remove ``callback``, or every callback if None"""
+        with self._lock:
+            if callback is None:
+                self._callbacks = []
+            else:
+                self._callbacks = [cb for cb in self._callbacks if cb != callback]
+
+    def emit(self, *args):
+        """Call every connected callback with ``args``"""
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(*args)
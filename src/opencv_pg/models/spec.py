@@ -0,0 +1,184 @@
+"""Versioned, JSON serializable description of a Pipeline
+
+A spec records the window layout, each transform's class, its enabled state,
+the arguments needed to construct it and the state of every Param, eg::
+
+    {
+        "version": 1,
+        "windows": [
+            {
+                "name": "Step 1",
+                "transforms": [
+                    {
+                        "class": "models.transforms.GaussianBlur",
+                        "enabled": true,
+                        "kwargs": {},
+                        "params": {"ksize": {"__tuple__": [5, 5]}, ...}
+                    }
+                ]
+            }
+        ]
+    }
+
+Rebuilding a pipeline from a spec only instantiates the transforms; no widgets
+are created, so it is cheap enough to do in every batch worker.
+"""
+import importlib
+import json
+import logging
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+from .base_transform import BaseTransform
+from .window import Window
+
+log = logging.getLogger(__name__)
+
+SPEC_VERSION = 1
+
+
+class SpecError(ValueError):
+    """Raised when a spec is malformed or from an unsupported version"""
+
+
+def _encode(value):
+    """Return ``value`` as JSON compatible data, tagging tuples and arrays"""
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": value.tolist(), "dtype": str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    return value
+
+
+def _decode(value):
+    """Inverse of ``_encode``"""
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if "__ndarray__" in value:
+            return np.array(value["__ndarray__"], dtype=value["dtype"])
+        if "__tuple__" in value:
+            return tuple(_decode(item) for item in value["__tuple__"])
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+
+def _class_path(cls) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _import_transform_class(path: str):
+    """Return the BaseTransform subclass at dotted ``path``"""
+    module_name, _, cls_name = path.rpartition(".")
+    try:
+        cls = getattr(importlib.import_module(module_name), cls_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise SpecError(f"Unable to import transform {path}: {e}") from e
+    if not (isinstance(cls, type) and issubclass(cls, BaseTransform)):
+        raise SpecError(f"{path} is not a BaseTransform")
+    return cls
+
+
+def transform_to_spec(transform: BaseTransform) -> dict:
+    """Return the spec of a single transform"""
+    return {
+        "class": _class_path(transform.__class__),
+        "enabled": transform.enabled,
+        "kwargs": _encode(transform.get_init_kwargs()),
+        "params": {
+            name: _encode(transform._get_param(name).get_state())
+            for name, _ in transform._params
+        },
+    }
+
+
+def transform_from_spec(spec: dict, image_path=None) -> BaseTransform:
+    """Return a new transform built from ``spec``
+
+    Args:
+        spec (dict): As returned by ``transform_to_spec``
+        image_path (str, optional): Replaces the ``path`` init argument of
+            image loaders, eg: LoadImage
+
+    Raises:
+        SpecError: if the class can't be imported or a param doesn't exist
+    """
+    cls = _import_transform_class(spec["class"])
+    kwargs = _decode(spec.get("kwargs", {}))
+    if image_path is not None and "path" in kwargs:
+        kwargs["path"] = str(image_path)
+    transform = cls(**kwargs)
+    transform.enabled = spec.get("enabled", True)
+    for name, state in spec.get("params", {}).items():
+        try:
+            param = transform._get_param(name)
+        except AttributeError as e:
+            raise SpecError(f"{spec['class']} has no param {name}") from e
+        param.set_state(_decode(state))
+    return transform
+
+
+def pipeline_to_spec(pipeline) -> dict:
+    """Return the spec of ``pipeline``
+
+    Args:
+        pipeline (Pipeline): Pipeline to describe
+
+    Returns:
+        dict: JSON serializable spec
+    """
+    return {
+        "version": SPEC_VERSION,
+        "windows": [
+            {
+                "name": window.name,
+                "transforms": [transform_to_spec(t) for t in window.transforms],
+            }
+            for window in pipeline.windows
+        ],
+    }
+
+
+def windows_from_spec(spec: dict, image_path=None) -> List[Window]:
+    """Return the Windows described by a pipeline ``spec``
+
+    Args:
+        spec (dict): As returned by ``pipeline_to_spec``
+        image_path (str, optional): See ``transform_from_spec``
+
+    Raises:
+        SpecError: if the spec is malformed or from a newer version
+    """
+    version = spec.get("version")
+    if not isinstance(version, int) or version > SPEC_VERSION:
+        raise SpecError(f"Unsupported pipeline spec version: {version}")
+    if not spec.get("windows"):
+        raise SpecError("Pipeline spec has no windows")
+
+    return [
+        Window(
+            [transform_from_spec(t, image_path) for t in window["transforms"]],
+            name=window.get("name", ""),
+        )
+        for window in spec["windows"]
+    ]
+
+
+def save_spec(spec: dict, path: Union[str, Path]):
+    """Write ``spec`` to ``path`` as JSON"""
+    with open(path, "w") as fp:
+        json.dump(spec, fp, indent=2)
+
+
+def load_spec(path: Union[str, Path]) -> dict:
+    """Read a spec written by ``save_spec``"""
+    with open(path) as fp:
+        return json.load(fp)
@@ -0,0 +1,119 @@
+"""Timing and memory measurements of transform runs
+
+Every ``BaseTransform._draw`` call is measured and stored in the transform's
+``stats``; ``Pipeline.get_stats`` collects them for the whole pipeline.
+
+Bytes allocated are the size of output arrays that don't share memory with
+the input. For the peak of all Python and numpy allocations made during the
+call, start ``tracemalloc``; since it is process wide, the peak also includes
+other threads running at the same time.
+"""
+import time
+import tracemalloc
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class DrawStats(NamedTuple):
+    """Measurements of one ``BaseTransform._draw`` call"""
+
+    # Seconds from start to finish
+    wall_time: float
+    # Seconds of CPU used by the calling thread; excludes cv2's own threads
+    cpu_time: float
+    in_shape: Optional[tuple]
+    in_dtype: Optional[str]
+    out_shape: Optional[tuple]
+    out_dtype: Optional[str]
+    # Bytes of the output image that are not a view of the input
+    allocated: int
+    # Peak bytes traced by tracemalloc during the call, None if not tracing
+    peak_allocated: Optional[int]
+    # True if the result came from the transform's cache
+    cached: bool
+
+    def format(self) -> str:
+        """Return a one line summary, eg: for a tooltip"""
+        text = (
+            f"{self.wall_time * 1000:.1f} ms wall, {self.cpu_time * 1000:.1f} ms cpu, "
+            f"{_format_image(self.in_shape, self.in_dtype)} -> "
+            f"{_format_image(self.out_shape, self.out_dtype)}, "
+            f"{_format_bytes(self.allocated)} allocated"
+        )
+        if self.peak_allocated is not None:
+            text += f", {_format_bytes(self.peak_allocated)} peak"
+        if self.cached:
+            text += " (cached)"
+        return text
+
+
+class StatsRecorder:
+    """Measures a single call; create it right before the call"""
+
+    def __init__(self):
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            self._traced = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+
+    def finish(self, img_in, img_out, cached: bool) -> DrawStats:
+        """Return the stats of the call that turned ``img_in`` into ``img_out``"""
+        wall_time = time.perf_counter() - self._wall
+        cpu_time = time.thread_time() - self._cpu
+        peak = None
+        if self._tracing and tracemalloc.is_tracing():
+            peak = max(0, tracemalloc.get_traced_memory()[1] - self._traced)
+
+        allocated = 0
+        if not cached and isinstance(img_out, np.ndarray):
+            if not (
+                isinstance(img_in, np.ndarray) and np.may_share_memory(img_in, img_out)
+            ):
+                allocated = img_out.nbytes
+        return DrawStats(
+            wall_time,
+            cpu_time,
+            *_describe(img_in),
+            *_describe(img_out),
+            allocated,
+            peak,
+            cached,
+        )
+
+
+def format_table(rows: List[Tuple[str, DrawStats]]) -> str:
+    """Return ``rows`` of (name, stats) as an aligned text table with a total"""
+    if not rows:
+        return ""
+    width = max(len(name) for name, _ in rows)
+    lines = [f"{name:<{width}}  {stats.format()}" for name, stats in rows]
+    wall = sum(stats.wall_time for _, stats in rows)
+    allocated = sum(stats.allocated for _, stats in rows)
+    lines.append(
+        f"{'Total':<{width}}  {wall * 1000:.1f} ms wall, "
+        f"{_format_bytes(allocated)} allocated"
+    )
+    return "\n".join(lines)
+
+
+def _describe(img):
+    if not isinstance(img, np.ndarray):
+        return None, None
+    return img.shape, str(img.dtype)
+
+
+def _format_image(shape, dtype) -> str:
+    if shape is None:
+        return "None"
+    return f"{'x'.join(str(s) for s in shape)} {dtype}"
+
+
+def _format_bytes(nbytes: int) -> str:
+    if nbytes >= 1024 * 1024:
+        return f"{nbytes / (1024 * 1024):.1f} MB"
+    if nbytes >= 1024:
+        return f"{nbytes / 1024:.1f} KB"
+    return f"{nbytes} B"
@@ -0,0 +1,150 @@
+"""Run a Pipeline continuously over the frames of a VideoSource
+
+Decoding, processing and display overlap: while frame N is processed, frame
+N+1 is decoded on another thread, and N-1 is shown by the views, which receive
+``Window.image_updated`` on the GUI thread.
+
+When processing can't keep up with a live source, only the newest decoded
+frame is kept and the others are counted as dropped, so the display lags the
+source by at most a frame instead of falling further and further behind.
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class StreamStats:
+    """Frame counters of a StreamRunner
+
+    Attributes:
+        decoded (int): Frames read from the source
+        processed (int): Frames run through the pipeline
+        dropped (int): Decoded frames replaced by a newer one before being
+            processed
+        started (float): ``time.perf_counter()`` when the stream started
+    """
+
+    def __init__(self):
+        self.decoded = 0
+        self.processed = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+
+    def get_fps(self) -> float:
+        """Return the average number of frames processed per second"""
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (
+            f"StreamStats(decoded={self.decoded}, processed={self.processed}, "
+            f"dropped={self.dropped}, fps={self.get_fps():.1f})"
+        )
+
+
+class StreamRunner:
+    """Feeds the frames of a pipeline's VideoSource through the pipeline
+
+    While the stream runs, ``Pipeline.request_run`` doesn't start runs of its
+    own: param changes are picked up by the next frame.
+
+    Args:
+        pipeline (Pipeline): Pipeline whose first transform is a VideoSource
+        realtime (bool, optional): If True, files are read at their frame rate
+            and frames are dropped when processing is too slow, like a live
+            camera. If False, every frame is processed as fast as possible.
+    """
+
+    def __init__(self, pipeline, realtime=True):
+        self.pipeline = pipeline
+        self.source = pipeline.windows[0].transforms[0]
+        if not hasattr(self.source, "read_frame"):
+            raise TypeError(
+                f"Pipeline must start with a VideoSource, got "
+                f"{self.source.__class__.__name__}"
+            )
+        self.realtime = realtime
+        self.stats = StreamStats()
+        self._frame = None
+        self._ended = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        pipeline.stream = self
+
+    def start(self):
+        """Start decoding and processing frames; does nothing if running"""
+        if self.is_running():
+            return
+        self.stats = StreamStats()
+        self._frame = None
+        self._ended = False
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._decode, name="stream-decode", daemon=True),
+            threading.Thread(target=self._process, name="stream-process", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the stream and wait up to ``timeout`` seconds for it to finish"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+
+    def is_running(self) -> bool:
+        """Return True while frames are being decoded or processed"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _decode(self):
+        interval = 1 / self.source.fps if self.realtime and self.source.fps > 0 else 0
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            if interval:
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    # Fell behind; don't try to catch up with a burst
+                    next_time = time.perf_counter()
+
+            frame = self.source.read_frame()
+            with self._condition:
+                if frame is None:
+                    self._ended = True
+                    self._condition.notify_all()
+                    return
+                self.stats.decoded += 1
+                if not self.realtime:
+                    # Wait for the previous frame to be taken instead of dropping it
+                    while self._frame is not None and not self._stop.is_set():
+                        self._condition.wait()
+                elif self._frame is not None:
+                    self.stats.dropped += 1
+                self._frame = frame
+                self._condition.notify_all()
+
+    def _process(self):
+        while True:
+            with self._condition:
+                while self._frame is None and not self._ended and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set() or self._frame is None:
+                    return
+                frame, self._frame = self._frame, None
+                self._condition.notify_all()
+
+            self.source.set_frame(frame)
+            try:
+                self.pipeline.run_pipeline()
+            except Exception as e:
+                log.exception(e)
+            self.stats.processed += 1
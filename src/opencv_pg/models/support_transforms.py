@@ -5,9 +5,21 @@ import cv2
 import numpy as np
 # from cv2.typing import Point
 
+from utils.config_manager import config
+
 from . import cv2_constants as cvc
+from . import image_io
+from .image_cache import get_image_cache
 from . import params
 from .base_transform import BaseTransform
+from .batching import (
+    flatten_stack,
+    map_chunks,
+    stack_extras,
+    stack_frames,
+    unflatten_stack,
+)
+from .frames import as_point_set
 
 log = logging.getLogger(__name__)
 
@@ -47,24 +59,197 @@ class LoadImage(BaseTransform):
             path (str): path to image file
         """
         super().__init__()
+        self.img = None
+        self.path = None
+        self.load(path)
+
+    def load(self, path: str):
+        """Replace the image returned by this transform with the one at path
+
+        Args:
+            path (str): path to image file
+        """
         if path is None or not path:
             log.error("No file path provided for image loading")
             raise ValueError("Image path cannot be None or empty")
-        
+
         p = Path(path)
         if not p.exists():
             raise FileNotFoundError(f"File not found: {path}")
-        self.img = cv2.imread(path)
+        self.img = self._read(str(path))
+        self.path = str(path)
+        self.clear_cache()
+
+    def _read(self, path: str):
+        # Decoded images are shared with the other loaders of the same file
+        return get_image_cache().get(path, cv2.imread)
+
+    def get_init_kwargs(self):
+        return {"path": self.path}
+
+    def get_source_size(self):
+        if self.img is None:
+            return None
+        return self.img.shape[:2]
 
     def draw(self, img, extra):
+        if self.roi is not None:
+            x, y, width, height = self.roi
+            return np.ascontiguousarray(self.img[y : y + height, x : x + width])
+        if self.preview_scale < 1:
+            return cv2.resize(
+                self.img,
+                None,
+                fx=self.preview_scale,
+                fy=self.preview_scale,
+                interpolation=cv2.INTER_AREA,
+            )
         return self.img
 
 
+class MemmapImage(LoadImage):
+    def __init__(self, path: str, shape=None, dtype=None, offset: int = 0):
+        """Returns a memory mapped image at path instead of decoding it
+
+        Downstream transforms receive read-only views of the file's pages,
+        which the OS shares between every window and process using the same
+        file. See ``image_io.open_memmap`` for the supported formats.
+
+        Args:
+            path (str): path to image file
+            shape (tuple, optional): (rows, cols[, channels]) of a raw file
+            dtype (str, optional): dtype of a raw file. Default uint8.
+            offset (int, optional): bytes to skip at the start of a raw file
+        """
+        self.shape = tuple(shape) if shape is not None else None
+        self.dtype = dtype
+        self.offset = offset
+        super().__init__(path)
+
+    def _read(self, path: str):
+        return image_io.open_memmap(path, self.shape, self.dtype, self.offset)
+
+    def get_init_kwargs(self):
+        return {
+            "path": self.path,
+            "shape": self.shape,
+            "dtype": None if self.dtype is None else str(np.dtype(self.dtype)),
+            "offset": self.offset,
+        }
+
+    def draw(self, img, extra):
+        if self.roi is None and self.preview_scale < 1:
+            # Decimate before resizing so that most of the file is never read
+            step = max(1, int(1 / self.preview_scale) // 2)
+            rows, cols = self.img.shape[:2]
+            dsize = (
+                max(1, round(cols * self.preview_scale)),
+                max(1, round(rows * self.preview_scale)),
+            )
+            decimated = np.ascontiguousarray(self.img[::step, ::step])
+            return cv2.resize(decimated, dsize, interpolation=cv2.INTER_AREA)
+        return super().draw(img, extra)
+
+
+class VideoSource(LoadImage):
+    # A new frame is set without any input or param changing
+    cacheable = False
+
+    def __init__(self, path: str, loop: bool = True):
+        """Returns the current frame of a video file, image sequence or camera
+
+        Frames are advanced by ``read_frame`` and ``set_frame``; see
+        ``models.stream.StreamRunner`` to run a pipeline over them.
+
+        Args:
+            path (str): Video file, printf style image sequence, eg:
+                ``frames/img_%04d.png``, camera device, eg: ``/dev/video0``,
+                or camera index, eg: ``0``
+            loop (bool, optional): Restart files from the first frame once
+                they end. Default True.
+        """
+        self.loop = loop
+        self.capture = None
+        self.fps = 0.0
+        self.frame_index = -1
+        super().__init__(path)
+
+    def load(self, path: str):
+        """Open the video source at path and show its first frame"""
+        if path is None or not str(path):
+            raise ValueError("Video path cannot be None or empty")
+        path = str(path)
+        capture = cv2.VideoCapture(int(path) if path.isdigit() else path)
+        if not capture.isOpened():
+            if not path.isdigit() and "%" not in path and not Path(path).exists():
+                raise FileNotFoundError(f"File not found: {path}")
+            raise ValueError(f"Unable to open video source: {path}")
+
+        if self.capture is not None:
+            self.capture.release()
+        self.capture = capture
+        self.path = path
+        self.fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_index = -1
+        frame = self.read_frame()
+        if frame is None:
+            raise ValueError(f"No frames in video source: {path}")
+        self.set_frame(frame)
+
+    def is_camera(self) -> bool:
+        """Return True if this is a live source that can't be rewound"""
+        return self.path.isdigit() or self.path.startswith("/dev/")
+
+    def read_frame(self):
+        """Return the next frame from the source, or None once it has ended
+
+        Only reads; call ``set_frame`` to make it the frame this transform
+        returns.
+        """
+        ok, frame = self.capture.read()
+        if not ok and self.loop and not self.is_camera():
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return frame if ok else None
+
+    def set_frame(self, frame):
+        """Make ``frame`` the image returned by this transform"""
+        self.img = frame
+        self.frame_index += 1
+        self.dirty = True
+
+    def get_init_kwargs(self):
+        return {"path": self.path, "loop": self.loop}
+
+
+def create_image_loader(path: str) -> LoadImage:
+    """Return the loader to use for the image at path
+
+    Videos and cameras get a VideoSource. NPY files are always memory mapped.
+    TIFFs are when ``[Performance] memory_map_images`` is enabled and their
+    layout allows it; everything else is decoded by LoadImage.
+    """
+    suffix = Path(path).suffix.lower()
+    video_extensions = config.get_valid_video_extensions()
+    if suffix in video_extensions or str(path).startswith("/dev/video"):
+        return VideoSource(path)
+    if suffix == ".npy":
+        return MemmapImage(path)
+    if suffix in (".tif", ".tiff") and config.should_memory_map_images():
+        try:
+            return MemmapImage(path)
+        except image_io.MemmapError as e:
+            log.info("Decoding %s instead of mapping it: %s", path, e)
+    return LoadImage(path)
+
+
 class DrawLinesByPointAndAngle(BaseTransform):
     """Draws infinte lines from direction and magnitude"""
 
     color = params.ColorPicker(default=(0, 0, 255))
-    thickness = params.IntSlider(min_val=1, max_val=100, default=2)
+    thickness = params.IntSlider(
+        min_val=1, max_val=100, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
     line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
@@ -126,7 +311,9 @@ class DrawLinesByEndpoints(BaseTransform):
     """Draws lines between points"""
 
     color = params.ColorPicker(default=(0, 0, 255))
-    thickness = params.IntSlider(min_val=1, max_val=100, default=2)
+    thickness = params.IntSlider(
+        min_val=1, max_val=100, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
     line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
@@ -156,7 +343,9 @@ class DrawCircles(BaseTransform):
     """Draws circles"""
 
     color = params.ColorPicker(default=(0, 0, 255))
-    thickness = params.IntSlider(min_val=1, max_val=100, default=2)
+    thickness = params.IntSlider(
+        min_val=1, max_val=100, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
     line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
@@ -187,8 +376,12 @@ class DrawCirclesFromPoints(BaseTransform):
     """Draws circles from incoming Points"""
 
     color = params.ColorPicker(default=(0, 0, 255))
-    radius = params.IntSlider(min_val=1, max_val=50, default=2)
-    thickness = params.IntSlider(min_val=-1, max_val=20, default=-1)
+    radius = params.IntSlider(
+        min_val=1, max_val=50, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
+    thickness = params.IntSlider(
+        min_val=-1, max_val=20, default=-1, preview_scaling=params.PREVIEW_LINEAR
+    )
     line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
@@ -228,14 +421,22 @@ class DrawCornerSubPix(BaseTransform):
     """Draws points for CornerSubPix and its original contour points"""
 
     good_feat_color = params.ColorPicker(default=(0, 0, 255))
-    good_feat_radius = params.IntSlider(min_val=1, max_val=50, default=3)
-    good_feat_thickness = params.IntSlider(min_val=-1, max_val=20, default=-1)
+    good_feat_radius = params.IntSlider(
+        min_val=1, max_val=50, default=3, preview_scaling=params.PREVIEW_LINEAR
+    )
+    good_feat_thickness = params.IntSlider(
+        min_val=-1, max_val=20, default=-1, preview_scaling=params.PREVIEW_LINEAR
+    )
     good_feat_line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
     corners_color = params.ColorPicker(default=(0, 255, 0))
-    corners_radius = params.IntSlider(min_val=1, max_val=50, default=1)
-    corners_thickness = params.IntSlider(min_val=-1, max_val=20, default=-1)
+    corners_radius = params.IntSlider(
+        min_val=1, max_val=50, default=1, preview_scaling=params.PREVIEW_LINEAR
+    )
+    corners_thickness = params.IntSlider(
+        min_val=-1, max_val=20, default=-1, preview_scaling=params.PREVIEW_LINEAR
+    )
     corners_line_type = params.ComboBox(
         options=list(cvc.LINES.keys()), options_map=cvc.LINES, default="8-Connected"
     )
@@ -257,6 +458,9 @@ class DrawCornerSubPix(BaseTransform):
 class ClusterGenerator(BaseTransform):
     """Generates clusters of points"""
 
+    # New random points are expected on every run
+    cacheable = False
+
     img_size = params.Dimensions2D(min_val=100, max_val=800, default=(250, 250))
     clusters = params.IntSlider(min_val=1, max_val=10, default=5)
     points_per_cluster = params.IntSlider(min_val=1, max_val=50, default=25)
@@ -279,14 +483,18 @@ class ClusterGenerator(BaseTransform):
             center = np.random.randint(0, self.img_size[0], 2)
             cluster_points = np.random.normal(center, self.sigma, (self.points_per_cluster, 2))
             points.append(cluster_points)
-        return np.vstack(points)
+        return as_point_set(np.vstack(points))
 
 
 class DrawKMeansPoints(BaseTransform):
     """Draws points for Kmeans"""
 
-    point_size = params.IntSlider(min_val=1, max_val=25, default=2)
-    center_point_size = params.IntSlider(min_val=1, max_val=25, default=4)
+    point_size = params.IntSlider(
+        min_val=1, max_val=25, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
+    center_point_size = params.IntSlider(
+        min_val=1, max_val=25, default=4, preview_scaling=params.PREVIEW_LINEAR
+    )
     center_color = params.ColorPicker(default=(0, 255, 0))
     h = params.IntSlider(
         min_val=0,
@@ -329,10 +537,24 @@ class DrawKMeansPoints(BaseTransform):
 class BitwiseAnd(BaseTransform):
     """Perform a cv2.bitwise_and"""
 
+    inputs = ("image", "other")
+
     def draw(self, img_in, extra_in):
         """Perform a cv2.bitwise_and"""
         return cv2.bitwise_and(img_in, extra_in)
 
+    def draw_batch(self, imgs_in, extras_in):
+        imgs_in = stack_frames(imgs_in)
+        others = stack_extras(extras_in, imgs_in)
+        if others is None:
+            return super().draw_batch(imgs_in, extras_in)
+
+        def bitwise_and(chunk, other):
+            out = cv2.bitwise_and(flatten_stack(chunk), flatten_stack(other))
+            return unflatten_stack(out, len(chunk))
+
+        return map_chunks(bitwise_and, imgs_in, others), [None] * len(imgs_in)
+
 
 class CvtColor(BaseTransform):
     """Convert from BGR to a different color space"""
@@ -345,6 +567,18 @@ class CvtColor(BaseTransform):
         """Convert from BGR to a different color space"""
         return cv2.cvtColor(img_in, cvc.COLOR_BGR2[self.color_range])
 
+    def draw_batch(self, imgs_in, extras_in):
+        """Convert every frame at once; the conversions are per pixel"""
+        imgs_in = stack_frames(imgs_in)
+        if not isinstance(imgs_in, np.ndarray):
+            return super().draw_batch(imgs_in, extras_in)
+        code = cvc.COLOR_BGR2[self.color_range]
+
+        def cvt_color(chunk):
+            return unflatten_stack(cv2.cvtColor(flatten_stack(chunk), code), len(chunk))
+
+        return map_chunks(cvt_color, imgs_in), [None] * len(imgs_in)
+
 
 class DisplayHarris(BaseTransform):
     """Displays top N points of Harris Corners"""
@@ -401,6 +635,7 @@ class DrawContours(BaseTransform):
         max_val=10,
         default=2,
         help_text="-1 -> Filled; otherwise draw lines at specified thickness",
+        preview_scaling=params.PREVIEW_LINEAR,
     )
     line_type = params.ComboBox(
         options=["4-Connected", "8-Connected", "Anti Aliased"],
@@ -438,6 +673,8 @@ class DrawPyrDown(BaseTransform):
 class DrawSplit(BaseTransform):
     """Display Transform for Split"""
 
+    inputs = ("image", "channels")
+
     def draw(self, img_in, extra_in):
         """Display Transform for Split"""
         return extra_in
@@ -446,6 +683,8 @@ class DrawSplit(BaseTransform):
 class DrawMerge(BaseTransform):
     """Display Transform for Merge"""
 
+    inputs = ("image", "merged")
+
     def draw(self, img_in, extra_in):
         """Display Transform for Merge"""
         return extra_in
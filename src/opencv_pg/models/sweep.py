@@ -0,0 +1,567 @@
+"""Run a pipeline over every combination of some Params' values
+
+A sweep varies one or more Params, each over a range of values (an axis),
+and runs the pipeline once for every combination in their Cartesian product.
+Each run yields a thumbnail of the output and scalar metrics of it, eg: the
+fraction of edge pixels Canny finds, or the number of circles HoughCircles
+returns. Results can be written to CSV with ``write_csv``.
+
+Combinations are spread over a process pool in chunks. Each worker builds
+its own copy of the pipeline from its spec and runs it once. After that, a
+combination only reruns from the first swept transform on, and a transform
+whose Params and inputs didn't change returns its last result (see
+``BaseTransform._draw``). Axes are iterated in pipeline order, so the
+stages between swept transforms rerun as rarely as possible.
+
+The pipeline that is swept is never modified. EvaluationPool keeps the
+workers alive between batches of combinations, eg: for ``models.optimize``.
+"""
+import csv
+import importlib
+import itertools
+import math
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from utils.config_manager import config
+
+from . import params
+from .pipeline import Pipeline
+
+# Longest side of the thumbnails returned with each result
+THUMBNAIL_SIZE = 160
+
+# Chunks of combinations per worker; more balance the load, fewer reuse more
+_CHUNKS_PER_WORKER = 4
+
+# Evaluator built by _init_worker in each worker process
+_worker_evaluator = None
+
+
+class SweepError(ValueError):
+    """Raised when a Param can't be swept or an axis is malformed"""
+
+
+def _mean(img, extra):
+    return float(np.mean(img))
+
+
+def _nonzero(img, extra):
+    return np.count_nonzero(img) / img.size if img.size else 0.0
+
+
+def _extra_count(img, extra):
+    try:
+        return len(extra)
+    except TypeError:
+        return None
+
+
+# Scalar metrics of an output, by name: f(img_out, extra_out) -> number
+METRICS = {
+    "mean": _mean,
+    "nonzero": _nonzero,
+    "extra_count": _extra_count,
+}
+
+
+class SweepAxis(NamedTuple):
+    """A Param of a transform and the values it is swept over"""
+
+    win_index: int
+    transform_index: int
+    name: str
+    values: tuple
+
+    @property
+    def label(self) -> str:
+        """``"<window>.<transform>.<param>"``, as accepted by ``parse_axis``"""
+        return f"{self.win_index}.{self.transform_index}.{self.name}"
+
+
+class SweepResult(NamedTuple):
+    """Outcome of one combination of a sweep"""
+
+    # Position of the combination in the sweep's product
+    index: int
+    # Value of each axis, in the order the axes were given
+    values: tuple
+    # {metric name: value}; empty on error
+    metrics: Dict[str, Optional[float]]
+    # Downscaled output, None on error
+    thumbnail: Optional[np.ndarray]
+    seconds: float
+    error: Optional[str] = None
+
+
+def is_sweepable(param: params.Param) -> bool:
+    """Return True if ``get_param_values`` can enumerate ``param``"""
+    if param.read_only:
+        return False
+    return isinstance(
+        param,
+        (params.BaseSlider, params.SliderPairParam, params.ComboBox, params.CheckBox),
+    )
+
+
+def get_sweepable_params(transform) -> List[str]:
+    """Return the names of the Params of ``transform`` that can be swept"""
+    return [
+        name for name, _ in transform._params if is_sweepable(transform._get_param(name))
+    ]
+
+
+def get_param_values(param: params.Param, steps: Optional[int] = None) -> tuple:
+    """Return the values ``param`` can take
+
+    Sliders go from their ``min`` to their ``max`` by ``step``, ComboBoxes
+    through their options and CheckBoxes are False then True. Slider pairs
+    take every (top, bot) pair of their slider values with top <= bot; see
+    ``set_param_value``.
+
+    Args:
+        param (Param): Param to enumerate
+        steps (int, optional): Return at most this many values, evenly spread
+            over the range and including both ends. For slider pairs, at most
+            this many values of each slider.
+
+    Raises:
+        SweepError: if the Param isn't sweepable, see ``is_sweepable``
+    """
+    if isinstance(param, (params.BaseSlider, params.SliderPairParam)):
+        step = param.step or 1
+        count = int(math.floor((param.max - param.min) / step + 1e-9)) + 1
+        if isinstance(param, params.FloatSlider):
+            values = [round(param.min + i * step, 10) for i in range(count)]
+        else:
+            values = [int(param.min + i * step) for i in range(count)]
+        if isinstance(param, params.SliderPairParam):
+            ends = _spread(values, steps)
+            return tuple((top, bot) for top in ends for bot in ends if top <= bot)
+    elif isinstance(param, params.ComboBox):
+        values = [param.options_map[option] for option in param.options]
+    elif isinstance(param, params.CheckBox):
+        values = [False, True]
+    else:
+        raise SweepError(f"Can't sweep a {param.__class__.__name__} param")
+    return tuple(_spread(values, steps))
+
+
+def _spread(values: list, steps: Optional[int]) -> list:
+    """Return at most ``steps`` of ``values``, evenly spread and with both ends"""
+    if steps is None or not 0 < steps < len(values):
+        return values
+    picks = np.linspace(0, len(values) - 1, steps).round().astype(int)
+    return [values[i] for i in sorted(set(picks.tolist()))]
+
+
+def get_param_value(transform, name: str):
+    """Return the value of Param ``name`` of ``transform`` as a sweep value
+
+    That is its value, except for slider pairs whose {"top", "bot"} dict is
+    returned as a (top, bot) tuple, which can be hashed and compared.
+    """
+    value = getattr(transform, name)
+    if isinstance(transform._get_param(name), params.SliderPairParam):
+        return (value["top"], value["bot"])
+    return value
+
+
+def set_param_value(transform, name: str, value):
+    """Set Param ``name`` of ``transform`` to sweep value ``value``
+
+    The inverse of ``get_param_value``; marks the transform dirty.
+    """
+    if isinstance(transform._get_param(name), params.SliderPairParam):
+        value = {"top": value[0], "bot": value[1]}
+    setattr(transform, name, value)
+
+
+def make_axis(
+    pipeline: Pipeline,
+    win_index: int,
+    transform_index: int,
+    name: str,
+    values: Optional[Sequence] = None,
+    steps: Optional[int] = None,
+) -> SweepAxis:
+    """Return an axis sweeping Param ``name`` of a transform of ``pipeline``
+
+    Args:
+        values (sequence, optional): Values to sweep. Default is every value
+            of the Param, see ``get_param_values``
+        steps (int, optional): See ``get_param_values``; ignored with ``values``
+
+    Raises:
+        SweepError: if the transform or Param doesn't exist or can't be swept
+    """
+    try:
+        transform = pipeline.get_transform(win_index, transform_index)
+        param = transform._get_param(name)
+    except (IndexError, AttributeError) as e:
+        raise SweepError(
+            f"No param {name} in window {win_index}, transform {transform_index}"
+        ) from e
+    if values is None:
+        values = get_param_values(param, steps)
+    if not values:
+        raise SweepError(f"No values to sweep {name} over")
+    return SweepAxis(win_index, transform_index, name, tuple(values))
+
+
+def parse_axis(pipeline: Pipeline, text: str, steps: Optional[int] = None) -> SweepAxis:
+    """Return the axis described by ``text``
+
+    ``text`` is ``<window>.<transform>.<param>``, optionally followed by
+    ``=start:stop:step`` (inclusive) or ``=value,value,...``, eg:
+    ``0.1.threshold1=50:200:25``. Without values the Param's whole range is
+    swept, at most ``steps`` values of it. Slider pairs can only be given
+    without values.
+    """
+    position, _, spec = text.partition("=")
+    try:
+        win_index, transform_index, name = position.split(".")
+        win_index, transform_index = int(win_index), int(transform_index)
+    except ValueError:
+        raise SweepError(
+            f"Expected <window>.<transform>.<param>[=values], got {text}"
+        ) from None
+
+    values = None
+    if spec:
+        try:
+            if ":" in spec:
+                start, stop, step = (float(part) for part in spec.split(":"))
+                count = int(math.floor((stop - start) / step + 1e-9)) + 1
+                values = [round(start + i * step, 10) for i in range(count)]
+            else:
+                values = [float(part) for part in spec.split(",")]
+        except (ValueError, ZeroDivisionError):
+            raise SweepError(f"Malformed values in {text}") from None
+        values = [int(v) if float(v).is_integer() else v for v in values]
+    return make_axis(pipeline, win_index, transform_index, name, values, steps)
+
+
+def get_metric(metric) -> Callable:
+    """Return ``metric`` if it is callable, else the metric of that name
+
+    Names are those in METRICS or ``module:attr`` of a callable to import.
+    """
+    if callable(metric):
+        return metric
+    if metric in METRICS:
+        return METRICS[metric]
+    if ":" not in metric:
+        raise SweepError(f"Unknown metric {metric}; builtins are {list(METRICS)}")
+    module_name, attr = metric.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class MaskIoU:
+    """Metric: intersection over union of the output's nonzero pixels and a mask
+
+    Eg: how well an InRange mask matches a hand labelled one. The mask is
+    resized to the output, so preview runs can be scored too.
+
+    Args:
+        target (str or np.ndarray): Ground truth mask or the path to it;
+            nonzero pixels are foreground
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._mask = None
+
+    def __call__(self, img, extra):
+        if self._mask is None:
+            target = self.target
+            if not isinstance(target, np.ndarray):
+                target = cv2.imread(str(target), cv2.IMREAD_GRAYSCALE)
+                if target is None:
+                    raise SweepError(f"Unable to read target mask: {self.target}")
+            self._mask = target if target.ndim == 2 else target.any(axis=2)
+        mask = self._mask
+        if mask.shape != img.shape[:2]:
+            mask = cv2.resize(
+                mask.astype(np.uint8),
+                (img.shape[1], img.shape[0]),
+                interpolation=cv2.INTER_NEAREST,
+            )
+        mask = mask != 0
+        found = img != 0 if img.ndim == 2 else (img != 0).any(axis=2)
+        union = np.count_nonzero(found | mask)
+        return np.count_nonzero(found & mask) / union if union else 1.0
+
+
+def make_thumbnail(img: np.ndarray, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """Return ``img`` downscaled so its longest side is at most ``size``"""
+    rows, cols = img.shape[:2]
+    scale = size / max(rows, cols, 1)
+    if scale >= 1:
+        return np.array(img)
+    dsize = (max(1, round(cols * scale)), max(1, round(rows * scale)))
+    try:
+        return cv2.resize(img, dsize, interpolation=cv2.INTER_AREA)
+    except cv2.error:
+        # Not every dtype can be resized by OpenCV, eg: int32 with INTER_AREA
+        step = max(1, int(1 / scale))
+        return np.ascontiguousarray(img[::step, ::step])
+
+
+class _Evaluator:
+    """Runs combinations of values of ``axes`` on its own copy of a pipeline"""
+
+    def __init__(
+        self,
+        spec: dict,
+        axes: List[SweepAxis],
+        metrics: Dict[str, object],
+        thumbnail_size: Optional[int],
+        max_dimension: Optional[int],
+        output_window: int,
+    ):
+        self.pipeline = Pipeline.from_spec(spec)
+        self.pipeline.set_preview_max_dimension(max_dimension)
+        self.preview = max_dimension is not None
+        self.axes = axes
+        self.metrics = {name: get_metric(metric) for name, metric in metrics.items()}
+        self.thumbnail_size = thumbnail_size
+        self.output_window = output_window
+        self.start = min((axis.win_index, axis.transform_index) for axis in axes)
+        self._ran = False
+
+    def evaluate(self, index: int, values: tuple) -> SweepResult:
+        """Run the pipeline with each axis' Param set to its value in ``values``"""
+        start = time.perf_counter()
+        try:
+            apply_values(self.pipeline, self.axes, values)
+            # The stages before the first swept transform only run once
+            win_index, transform_index = self.start if self._ran else (0, 0)
+            self.pipeline.run_pipeline(win_index, transform_index, preview=self.preview)
+            self._ran = True
+
+            errors = [
+                f"{t.__class__.__name__}: {t.error.strip().splitlines()[-1]}"
+                for window in self.pipeline.windows
+                for t in window.transforms
+                if t.error is not None
+            ]
+            if errors:
+                raise RuntimeError("; ".join(errors))
+            window = self.pipeline.windows[self.output_window]
+            img_out, extra_out = window.last_out, window.extra_out
+            if img_out is None:
+                raise RuntimeError("The pipeline returned no image")
+            metrics = {name: metric(img_out, extra_out) for name, metric in self.metrics.items()}
+            thumbnail = None
+            if self.thumbnail_size:
+                thumbnail = make_thumbnail(img_out, self.thumbnail_size)
+        except Exception as e:
+            return SweepResult(index, values, {}, None, time.perf_counter() - start, str(e))
+        return SweepResult(index, values, metrics, thumbnail, time.perf_counter() - start)
+
+
+def _init_worker(*args):
+    global _worker_evaluator
+    _worker_evaluator = _Evaluator(*args)
+
+
+def _evaluate_in_worker(chunk: List[tuple]) -> List[SweepResult]:
+    return [_worker_evaluator.evaluate(index, values) for index, values in chunk]
+
+
+def apply_values(pipeline: Pipeline, axes: Sequence[SweepAxis], values: Sequence):
+    """Set the Param of each of ``axes`` in ``pipeline`` to its value in ``values``
+
+    The transforms are marked dirty; run the pipeline to see the result.
+    """
+    for axis, value in zip(axes, values):
+        transform = pipeline.get_transform(axis.win_index, axis.transform_index)
+        set_param_value(transform, axis.name, value)
+
+
+def count_combinations(axes: Sequence[SweepAxis]) -> int:
+    """Return the number of combinations a sweep over ``axes`` runs"""
+    return math.prod(len(axis.values) for axis in axes)
+
+
+class EvaluationPool:
+    """Runs a pipeline with given values of ``axes`` on worker processes
+
+    The workers are started once and reused by every ``evaluate`` call,
+    each keeping its copy of the pipeline and its stored results. Use it as
+    a context manager, or call ``close``.
+
+    Args:
+        pipeline (Pipeline): Pipeline to evaluate; left untouched
+        axes (list): SweepAxis of each Param to vary
+        metrics (list or dict, optional): Metrics to compute, see
+            ``get_metric``: a list of names, or {name: metric} to name
+            callables. Default is every builtin in METRICS.
+        workers (int, optional): Number of worker processes; 0 runs in this
+            process. Default is ``[Performance] processing_threads``.
+        thumbnail_size (int, optional): Longest side of the thumbnails; None
+            for no thumbnails
+        max_dimension (int, optional): Run at the preview scale that fits the
+            source in this many pixels, see ``Pipeline.set_preview_max_dimension``.
+            Default runs at full resolution.
+        output_window (int, optional): Index of the window whose output is
+            measured. Default is the last one.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        axes: Sequence[SweepAxis],
+        metrics=None,
+        workers: Optional[int] = None,
+        thumbnail_size: Optional[int] = THUMBNAIL_SIZE,
+        max_dimension: Optional[int] = None,
+        output_window: int = -1,
+    ):
+        if not axes:
+            raise SweepError("A sweep needs at least one axis")
+        if metrics is None:
+            metrics = list(METRICS)
+        if not isinstance(metrics, dict):
+            metrics = {name: name for name in metrics}
+        for metric in metrics.values():
+            get_metric(metric)
+        if workers is None:
+            workers = config.get_processing_threads()
+        self.axes = list(axes)
+        self.workers = workers
+        self._init_args = (
+            pipeline.to_spec(),
+            self.axes,
+            metrics,
+            thumbnail_size,
+            max_dimension,
+            output_window,
+        )
+        self._evaluator = None
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the workers, abandoning the combinations not yet started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def evaluate(self, combinations: Sequence[tuple], cancel_event=None) -> Iterator[SweepResult]:
+        """Evaluate each (index, values) in ``combinations``
+
+        Results are yielded as chunks of combinations finish, not in order.
+        Consecutive combinations go to the same worker, so order them to
+        change as few transforms as possible from one to the next.
+
+        Args:
+            cancel_event (threading.Event, optional): When set, no more
+                combinations are started and the generator ends
+        """
+        if self.workers <= 0:
+            if self._evaluator is None:
+                self._evaluator = _Evaluator(*self._init_args)
+            for index, values in combinations:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield self._evaluator.evaluate(index, values)
+            return
+
+        if self._executor is None:
+            # Spawned rather than forked: the GUI runs sweeps while Qt's threads run
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=self._init_args,
+            )
+        chunk_size = max(
+            1, math.ceil(len(combinations) / (self.workers * _CHUNKS_PER_WORKER))
+        )
+        pending = {
+            self._executor.submit(_evaluate_in_worker, combinations[i : i + chunk_size])
+            for i in range(0, len(combinations), chunk_size)
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                for future in done:
+                    yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def run_sweep(
+    pipeline: Pipeline,
+    axes: Sequence[SweepAxis],
+    metrics=None,
+    workers: Optional[int] = None,
+    thumbnail_size: Optional[int] = THUMBNAIL_SIZE,
+    max_dimension: Optional[int] = None,
+    output_window: int = -1,
+    cancel_event=None,
+) -> Iterator[SweepResult]:
+    """Run ``pipeline`` for every combination of the values of ``axes``
+
+    Results are yielded as chunks of combinations finish, not in order; see
+    ``SweepResult.index``. The other arguments are those of EvaluationPool.
+
+    Args:
+        cancel_event (threading.Event, optional): When set, no more
+            combinations are started and the sweep ends
+    """
+    # Vary the last transforms fastest, so earlier ones rerun the least
+    order = sorted(
+        range(len(axes)), key=lambda i: (axes[i].win_index, axes[i].transform_index)
+    )
+    combinations = []
+    for index, combination in enumerate(
+        itertools.product(*(axes[i].values for i in order))
+    ):
+        values = [None] * len(axes)
+        for position, value in zip(order, combination):
+            values[position] = value
+        combinations.append((index, tuple(values)))
+
+    with EvaluationPool(
+        pipeline, axes, metrics, workers, thumbnail_size, max_dimension, output_window
+    ) as pool:
+        yield from pool.evaluate(combinations, cancel_event)
+
+
+def write_csv(path, axes: Sequence[SweepAxis], results: Sequence[SweepResult]):
+    """Write one row per result to ``path``: axis values, metrics, time, error
+
+    Rows are in the order of the sweep's product.
+    """
+    metric_names = []
+    for result in results:
+        for name in result.metrics:
+            if name not in metric_names:
+                metric_names.append(name)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [axis.label for axis in axes] + metric_names + ["seconds", "error"]
+        )
+        for result in sorted(results, key=lambda result: result.index):
+            writer.writerow(
+                list(result.values)
+                + [result.metrics.get(name, "") for name in metric_names]
+                + [f"{result.seconds:.6f}", result.error or ""]
+            )
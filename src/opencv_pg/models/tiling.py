@@ -0,0 +1,169 @@
+"""Run a Pipeline over an image tile by tile
+
+Images too large to push through a pipeline at once, eg: slide scans, are
+split into tiles. Each tile is read with enough overlap for the transforms'
+kernels (see ``BaseTransform.halo``), run through the transforms, cropped back
+to the tile and written into the output. Only a few tiles are in memory at a
+time, so with a memory mapped source and destination (eg: ``np.load(path,
+mmap_mode="r")`` and ``np.lib.format.open_memmap``) the image never has to
+fit in memory.
+
+Only pipelines whose transforms are all local, ie: have a halo and keep the
+image geometry, can be tiled.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# (x, y, width, height)
+Rect = Tuple[int, int, int, int]
+
+
+class TilingError(ValueError):
+    """Raised when a pipeline can't be run tile by tile"""
+
+
+def iter_tiles(rows: int, cols: int, tile_size: int) -> Iterator[Rect]:
+    """Yield the rects of the tiles covering a ``rows`` x ``cols`` image
+
+    Tiles are yielded row by row; those on the right and bottom edges may be
+    smaller than ``tile_size``.
+    """
+    for y in range(0, rows, tile_size):
+        for x in range(0, cols, tile_size):
+            yield (x, y, min(tile_size, cols - x), min(tile_size, rows - y))
+
+
+def grow_rect(rect: Rect, halo: int, rows: int, cols: int) -> Rect:
+    """Return ``rect`` grown by ``halo`` on every side, clipped to the image"""
+    x, y, width, height = rect
+    x0, y0 = max(0, x - halo), max(0, y - halo)
+    x1, y1 = min(cols, x + width + halo), min(rows, y + height + halo)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def get_halo(transforms) -> int:
+    """Return the total halo of ``transforms``
+
+    Raises:
+        TilingError: if a transform needs the whole image
+    """
+    total = 0
+    for transform in transforms:
+        halo = transform.halo()
+        if halo is None:
+            raise TilingError(
+                f"{transform.__class__.__name__} needs the whole image and "
+                "can't be run tile by tile"
+            )
+        total += halo
+    return total
+
+
+def run_tile(transforms, src: np.ndarray, tile: Rect, halo: int) -> np.ndarray:
+    """Return the output of ``transforms`` for the ``tile`` of ``src``
+
+    Args:
+        transforms (list): Transforms to apply in order
+        src (np.ndarray): Whole source image; only the tile and its halo are read
+        tile (Rect): Tile to compute
+        halo (int): Overlap read around the tile, see ``get_halo``
+
+    Returns:
+        np.ndarray: Output for exactly ``tile``
+    """
+    rows, cols = src.shape[:2]
+    x0, y0, width, height = grow_rect(tile, halo, rows, cols)
+    img = np.ascontiguousarray(src[y0 : y0 + height, x0 : x0 + width])
+    extra = None
+    for transform in transforms:
+        img, extra = transform.apply(img, extra)
+    if img.shape[:2] != (height, width):
+        raise TilingError(
+            f"Tile output is {img.shape[:2]}, expected {(height, width)}; "
+            "a transform changed the image size"
+        )
+    x, y, width, height = tile
+    return img[y - y0 : y - y0 + height, x - x0 : x - x0 + width]
+
+
+def run_tiled(
+    pipeline,
+    src: np.ndarray,
+    dst: Optional[np.ndarray] = None,
+    tile_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """Run ``pipeline`` on ``src`` tile by tile and return the stitched output
+
+    The pipeline's source transform (eg: LoadImage), if any, is skipped;
+    ``src`` is used in its place. Transforms are run with ``apply``, so the
+    pipeline's own state and cache are left alone, and tiles are processed
+    concurrently. The result is identical to running the whole image.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run, at full resolution
+        src (np.ndarray): Source image; may be a memory mapped array
+        dst (np.ndarray, optional): Array to write the output into, eg: a
+            memory mapped array. Must have the output's shape and dtype.
+            Default allocates one in memory.
+        tile_size (int, optional): Width and height of the tiles. Default is
+            ``[Performance] tile_size``.
+        workers (int, optional): Number of tiles processed at once. Default
+            is ``[Performance] processing_threads``.
+
+    Returns:
+        np.ndarray: ``dst``
+
+    Raises:
+        TilingError: if a transform isn't local or changes the image size
+    """
+    if tile_size is None:
+        tile_size = config.get_tile_size()
+    if workers is None:
+        workers = config.get_processing_threads()
+    workers = max(1, workers)
+
+    transforms = pipeline.get_processing_transforms()
+    halo = get_halo(transforms)
+    rows, cols = src.shape[:2]
+    tiles = iter_tiles(rows, cols, tile_size)
+
+    # The first tile tells the output's channels and dtype
+    first = next(tiles)
+    out = run_tile(transforms, src, first, halo)
+    if dst is None:
+        dst = np.empty((rows, cols) + out.shape[2:], dtype=out.dtype)
+    elif dst.shape != (rows, cols) + out.shape[2:] or dst.dtype != out.dtype:
+        raise TilingError(
+            f"dst is {dst.shape} {dst.dtype}, expected "
+            f"{(rows, cols) + out.shape[2:]} {out.dtype}"
+        )
+    _write_tile(dst, first, out)
+    log.debug("Running %s tiles of %s with a halo of %s", src.shape, tile_size, halo)
+
+    def process(tile):
+        _write_tile(dst, tile, run_tile(transforms, src, tile, halo))
+
+    # Tiles write disjoint parts of dst, so they need no locking. Submitting
+    # at most `workers` tiles ahead bounds how many are held in memory.
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tile") as pool:
+        pending = []
+        for tile in tiles:
+            pending.append(pool.submit(process, tile))
+            if len(pending) >= workers:
+                pending.pop(0).result()
+        for future in pending:
+            future.result()
+    return dst
+
+
+def _write_tile(dst: np.ndarray, tile: Rect, img: np.ndarray):
+    x, y, width, height = tile
+    dst[y : y + height, x : x + width] = img
@@ -5,8 +5,6 @@ from .import support_transforms as supt
 from .import transforms as tf
 from .base_transform import BaseTransform
 
-from docs.doc_writer import render_local_doc, RENDERED_DIR
-
 log = logging.getLogger(__name__)
 
 
@@ -94,14 +92,11 @@ _TRANS_WINDOWS = {
 
 
 def collect_builtin_transforms():
-    """Return list of Transform subclasses for the builtins tab"""
-    transforms = _TRANS_WINDOWS.keys()
-    for trans in transforms:
-        # Render this now so we can load it later
-        render_local_doc(RENDERED_DIR, trans.get_doc_filename())
+    """Return list of Transform subclasses for the builtins tab
 
-    transforms = sorted(transforms, key=lambda x: x.__name__)
-    return transforms
+    Docs are rendered when a transform is first displayed, not here.
+    """
+    return sorted(_TRANS_WINDOWS.keys(), key=lambda x: x.__name__)
 
 
 def init_load(path):
@@ -139,7 +134,7 @@ def get_transform_window(transform, img_path):
             loader = supt.BlankCanvas()
         else:
             try:
-                loader = _LOADER_CLASS(img_path)
+                loader = supt.create_image_loader(img_path)
             except FileNotFoundError:
                 log.warning(f"Image not found at {img_path}, using blank image fallback")
                 loader = supt.BlankCanvas()
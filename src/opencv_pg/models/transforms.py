@@ -4,8 +4,15 @@ from .base_transform import BaseTransform
 from . import params
 from . import cv2_constants as cvc
 from . import support_transforms as supt
+from .batching import (
+    flatten_stack,
+    map_chunks,
+    stack_extras,
+    stack_frames,
+    unflatten_stack,
+)
+from .frames import Contours, as_point_set
 
-from PySide6 import QtWidgets, QtCore
 import cv2
 import numpy as np
 
@@ -17,10 +24,26 @@ log = logging.getLogger(__name__)
 class GaussianBlur(BaseTransform):
     doc_filename = "GaussianBlur.html"
     
-    k_size_x = params.IntSlider(min_val=1, max_val=100, default=1, step=2)
-    k_size_y = params.IntSlider(min_val=1, max_val=100, default=1, step=2)
-    sigma_x = params.FloatSlider(min_val=0.1, max_val=10, default=1.0, step=0.1)
-    sigma_y = params.FloatSlider(min_val=0.0, max_val=10, default=0.0, step=0.1)
+    k_size_x = params.IntSlider(
+        min_val=1, max_val=100, default=1, step=2, preview_scaling=params.PREVIEW_ODD
+    )
+    k_size_y = params.IntSlider(
+        min_val=1, max_val=100, default=1, step=2, preview_scaling=params.PREVIEW_ODD
+    )
+    sigma_x = params.FloatSlider(
+        min_val=0.1,
+        max_val=10,
+        default=1.0,
+        step=0.1,
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
+    sigma_y = params.FloatSlider(
+        min_val=0.0,
+        max_val=10,
+        default=0.0,
+        step=0.1,
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
     border_type = params.ComboBox(
         options=[
             "BORDER_CONSTANT",
@@ -33,6 +56,9 @@ class GaussianBlur(BaseTransform):
         options_map=cvc.BORDERS,
     )
 
+    def halo(self):
+        return max(self.k_size_x, self.k_size_y) // 2
+
     def draw(self, img_in, extra_in):
         return cv2.GaussianBlur(
             src=img_in,
@@ -44,7 +70,12 @@ class GaussianBlur(BaseTransform):
 
 
 class MedianBlur(BaseTransform):
-    k_size = params.IntSlider(min_val=1, max_val=100, default=11, step=2)
+    k_size = params.IntSlider(
+        min_val=1, max_val=100, default=11, step=2, preview_scaling=params.PREVIEW_ODD
+    )
+
+    def halo(self):
+        return self.k_size // 2
 
     def draw(self, img_in, extra_in):
         return cv2.medianBlur(img_in, self.k_size)
@@ -53,10 +84,18 @@ class MedianBlur(BaseTransform):
 class CopyMakeBorder(BaseTransform):
     doc_filename = "copyMakeBorder.html"
 
-    top = params.IntSlider(min_val=0, max_val=50, default=30)
-    right = params.IntSlider(min_val=0, max_val=50, default=30)
-    bottom = params.IntSlider(min_val=0, max_val=50, default=30)
-    left = params.IntSlider(min_val=0, max_val=50, default=30)
+    top = params.IntSlider(
+        min_val=0, max_val=50, default=30, preview_scaling=params.PREVIEW_LINEAR
+    )
+    right = params.IntSlider(
+        min_val=0, max_val=50, default=30, preview_scaling=params.PREVIEW_LINEAR
+    )
+    bottom = params.IntSlider(
+        min_val=0, max_val=50, default=30, preview_scaling=params.PREVIEW_LINEAR
+    )
+    left = params.IntSlider(
+        min_val=0, max_val=50, default=30, preview_scaling=params.PREVIEW_LINEAR
+    )
     border_type = params.ComboBox(
         options=[
             "BORDER_CONSTANT",
@@ -103,27 +142,70 @@ class Normalize(BaseTransform):
         options_map=cvc.NORMS,
     )
 
+    def _get_alpha(self):
+        # The L1 and L2 norms grow with the number of pixels, so keep alpha
+        # relative to the full size image when rendering a preview
+        alpha = self.alpha
+        if self.norm_type == cv2.NORM_L1:
+            alpha *= self.preview_scale ** 2
+        elif self.norm_type == cv2.NORM_L2:
+            alpha *= self.preview_scale
+        return alpha
+
     def draw(self, img_in, extra_in):
         # cv2 seems to require dst; throws error when not provided
         ret = cv2.normalize(
             src=img_in,
             dst=None,
-            alpha=self.alpha,
+            alpha=self._get_alpha(),
             beta=self.beta,
             norm_type=self.norm_type,
             dtype=-1,
         )
         return ret
 
+    def draw_batch(self, imgs_in, extras_in):
+        """Normalize every frame by its own norm, as ``draw`` does
+
+        cv2.normalize on each frame beats NumPy on the whole stack, so only
+        the Params are read once and the frames written into one stack.
+        """
+        imgs_in = stack_frames(imgs_in)
+        if not isinstance(imgs_in, np.ndarray):
+            return super().draw_batch(imgs_in, extras_in)
+        alpha, beta, norm_type = self._get_alpha(), self.beta, self.norm_type
+        out = np.empty_like(imgs_in)
+        for img, dst in zip(imgs_in, out):
+            cv2.normalize(
+                src=img, dst=dst, alpha=alpha, beta=beta, norm_type=norm_type, dtype=-1
+            )
+        return out, [None] * len(imgs_in)
+
+    def _get_full_size(self):
+        """Return the number of values of the input of a full resolution run
+
+        ``last_in`` may be a downscaled preview or only a region of the
+        image. Regions are only run through transforms that keep the image
+        geometry (see ``BaseTransform.halo``), so the input then has the size
+        of the pipeline's source image.
+        """
+        rows, cols = self.last_in.shape[:2]
+        channels = self.last_in.size // (rows * cols)
+        if self.roi is not None:
+            rows, cols = self.window.pipeline.get_source_size()
+            return rows * cols * channels
+        return rows * cols * channels / self.preview_scale ** 2
+
     def update_widgets_state(self):
+        size = self._get_full_size()
         if self.norm_type == cv2.NORM_L1:
             self._beta.set_enabled(False)
-            limit = self.last_in.size * 255
+            limit = size * 255
             self._alpha.set_max(limit)
             self._alpha.set_step(limit // 500)
         elif self.norm_type == cv2.NORM_L2:
             self._beta.set_enabled(False)
-            limit = np.sqrt(self.last_in.size) * 255
+            limit = np.sqrt(size) * 255
             self._alpha.set_max(limit)
             self._alpha.set_step(limit // 500)
         elif self.norm_type in (cv2.NORM_INF, cv2.NORM_MINMAX):
@@ -133,11 +215,12 @@ class Normalize(BaseTransform):
                 self._beta.set_enabled(True)
             else:
                 self._beta.set_enabled(False)
-        self._alpha._value = self._alpha.widget.slider.value()
+        self.alpha = self._alpha.widget.slider.value()
 
 
 class Split(BaseTransform):
     doc_filename = "split.html"
+    outputs = ("image", "channels")
 
     def draw(self, img_in, extra_in):
         out = cv2.split(img_in)
@@ -145,6 +228,8 @@ class Split(BaseTransform):
 
     def get_info_widget(self):
         """Adds labels centered under the images describing the channel"""
+        from PySide6 import QtCore, QtWidgets
+
         wid = QtWidgets.QWidget()
         layout = QtWidgets.QHBoxLayout()
         left = QtWidgets.QLabel("Blue Channel", alignment=QtCore.Qt.AlignLeft)
@@ -159,6 +244,8 @@ class Split(BaseTransform):
 
 class Merge(BaseTransform):
     doc_filename = "merge.html"
+    inputs = ("image", "channels")
+    outputs = ("image", "merged")
 
     def draw(self, img_in, extra_in):
         """Since need to merge multiple channels to 1, first split, then merge"""
@@ -183,6 +270,10 @@ class Filter2D(BaseTransform):
         options_map=cvc.BORDERS,
     )
 
+    def halo(self):
+        # The anchor may be anywhere in the kernel
+        return max(self.kernel.shape) - 1
+
     def draw(self, img_in, extra_in):
         out = cv2.filter2D(
             src=img_in,
@@ -216,7 +307,9 @@ class Canny(BaseTransform):
 class HoughLines(BaseTransform):
     rho = params.FloatSlider(min_val=1, max_val=200, default=1.0)
     theta = params.FloatSlider(min_val=0.01, max_val=ROUND_PI, step=0.01, default=1)
-    threshold = params.IntSlider(min_val=0, max_val=250, default=1)
+    threshold = params.IntSlider(
+        min_val=0, max_val=250, default=1, preview_scaling=params.PREVIEW_LINEAR
+    )
     srn = params.IntSlider(min_val=0, max_val=300, default=0, step=1)
     stn = params.IntSlider(min_val=0, max_val=300, default=0, step=1)
     min_theta = params.FloatSlider(min_val=0, max_val=ROUND_PI, default=0, step=0.05)
@@ -247,9 +340,15 @@ class HoughLines(BaseTransform):
 class HoughLinesP(BaseTransform):
     rho = params.FloatSlider(min_val=1, max_val=500, default=1)
     theta = params.FloatSlider(min_val=0.01, max_val=ROUND_PI, step=0.01, default=1)
-    threshold = params.IntSlider(min_val=0, max_val=500, default=1)
-    min_length = params.IntSlider(min_val=0, max_val=500, default=100)
-    max_gap = params.IntSlider(min_val=0, max_val=500, default=100)
+    threshold = params.IntSlider(
+        min_val=0, max_val=500, default=1, preview_scaling=params.PREVIEW_LINEAR
+    )
+    min_length = params.IntSlider(
+        min_val=0, max_val=500, default=100, preview_scaling=params.PREVIEW_LINEAR
+    )
+    max_gap = params.IntSlider(
+        min_val=0, max_val=500, default=100, preview_scaling=params.PREVIEW_LINEAR
+    )
 
     def draw(self, img_in, extra_in):
         # Docs indicate image may be modified by the function
@@ -277,11 +376,23 @@ class HoughCircles(BaseTransform):
         default="HOUGH_GRADIENT",
     )
     dp = params.FloatSlider(min_val=1, max_val=5, default=1, step=0.01)
-    min_dist = params.IntSlider(min_val=1, max_val=500, default=50)
+    min_dist = params.IntSlider(
+        min_val=1, max_val=500, default=50, preview_scaling=params.PREVIEW_LINEAR
+    )
     param1 = params.IntSlider(min_val=1, max_val=200, default=1, step=1)
-    param2 = params.IntSlider(min_val=1, max_val=200, default=10, step=1)
-    min_radius = params.IntSlider(min_val=1, max_val=250, default=50)
-    max_radius = params.IntSlider(min_val=-1, max_val=250, default=100)
+    param2 = params.IntSlider(
+        min_val=1,
+        max_val=200,
+        default=10,
+        step=1,
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
+    min_radius = params.IntSlider(
+        min_val=1, max_val=250, default=50, preview_scaling=params.PREVIEW_LINEAR
+    )
+    max_radius = params.IntSlider(
+        min_val=-1, max_val=250, default=100, preview_scaling=params.PREVIEW_LINEAR
+    )
 
     def update_widgets_state(self):
         if self.method == cv2.HOUGH_GRADIENT_ALT:
@@ -320,7 +431,9 @@ class Dilate(BaseTransform):
     kernel = params.Array(
         use_struct=True, help_text="Right click in array to set anchor"
     )
-    iterations = params.IntSlider(min_val=1, max_val=100, default=1)
+    iterations = params.IntSlider(
+        min_val=1, max_val=100, default=1, preview_scaling=params.PREVIEW_LINEAR
+    )
     border_type = params.ComboBox(
         options=[
             "BORDER_CONSTANT",
@@ -341,6 +454,10 @@ class Dilate(BaseTransform):
         else:
             self._border_val.set_enabled(False)
 
+    def halo(self):
+        # The anchor may be anywhere in the kernel
+        return (max(self.kernel.shape) - 1) * self.iterations
+
     def draw(self, img_in, extra_in):
         kwargs = dict(
             src=img_in,
@@ -358,9 +475,17 @@ class Dilate(BaseTransform):
 class BilateralFilter(BaseTransform):
     doc_filename = "bilateralFilter.html"
 
-    d = params.IntSlider(min_val=0, max_val=12, default=5, label="Diameter")
+    d = params.IntSlider(
+        min_val=0,
+        max_val=12,
+        default=5,
+        label="Diameter",
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
     sigma_color = params.IntSlider(min_val=0, max_val=200, default=100)
-    sigma_space = params.IntSlider(min_val=0, max_val=200, default=100)
+    sigma_space = params.IntSlider(
+        min_val=0, max_val=200, default=100, preview_scaling=params.PREVIEW_LINEAR
+    )
     border_type = params.ComboBox(
         options=[
             "BORDER_CONSTANT",
@@ -374,6 +499,15 @@ class BilateralFilter(BaseTransform):
         options_map=cvc.BORDERS,
     )
 
+    def halo(self):
+        # Wrapping reads the opposite side of the whole image
+        if self.border_type == cv2.BORDER_WRAP:
+            return None
+        if self.d > 0:
+            return self.d // 2
+        # cv2 derives the diameter from sigma_space when d <= 0
+        return int(round(self.sigma_space * 1.5))
+
     def draw(self, img_in, extra_in):
         out = cv2.bilateralFilter(
             src=img_in,
@@ -405,6 +539,10 @@ class Sobel(BaseTransform):
         options_map=cvc.BORDERS,
     )
 
+    def halo(self):
+        # A k_size of 1 uses a 3x1 or 1x3 kernel
+        return max(1, self.k_size // 2)
+
     def draw(self, img_in, extra_in):
         out = cv2.Sobel(
             src=img_in,
@@ -422,7 +560,9 @@ class Sobel(BaseTransform):
 class Remap(BaseTransform):
     doc_filename = "remap.html"
 
-    r = params.IntSlider(min_val=1, max_val=50, default=30, step=1)
+    r = params.IntSlider(
+        min_val=1, max_val=50, default=30, step=1, preview_scaling=params.PREVIEW_LINEAR
+    )
     theta = params.IntSlider(min_val=1, max_val=90, default=20, step=1)
     interpolation_type = params.ComboBox(
         options=["INTER_NEAREST", "INTER_LINEAR", "INTER_CUBIC", "INTER_LANCZOS4",],
@@ -451,6 +591,8 @@ class Remap(BaseTransform):
             self._border_val.set_enabled(False)
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "Apply the mapping functions: \n"
             "map1(x,y)=x+r*cos(theta*x/num_cols) \n"
@@ -551,11 +693,9 @@ class BoxFilter(BaseTransform):
             ar = np.ones((rows, cols))
         self._kernel.widget.array.model().set_internal_model_data(ar)
 
-    @QtCore.Slot(int, int)
     def _handle_dimensions_changed(self, rows, cols):
         self.common_handler(rows, cols)
 
-    @QtCore.Slot(int)
     def _handle_checkbox_changed(self, state):
         rows, cols = self.kernel.shape
         self.common_handler(rows, cols)
@@ -575,8 +715,12 @@ class BoxFilter(BaseTransform):
 class FastNIMeansDenoisingColored(BaseTransform):
     doc_filename = "fastNIMeansDenoisingColored.html"
 
-    template_window_size = params.IntSlider(min_val=1, max_val=15, default=7, step=2)
-    search_window_size = params.IntSlider(min_val=1, max_val=51, default=21, step=2)
+    template_window_size = params.IntSlider(
+        min_val=1, max_val=15, default=7, step=2, preview_scaling=params.PREVIEW_ODD
+    )
+    search_window_size = params.IntSlider(
+        min_val=1, max_val=51, default=21, step=2, preview_scaling=params.PREVIEW_ODD
+    )
     h = params.IntSlider(min_val=0, max_val=25, default=3, step=1)
     h_color = params.IntSlider(min_val=0, max_val=25, default=7, step=1)
 
@@ -633,9 +777,9 @@ class Kmeans(BaseTransform):
             x = np.linspace(0, width-1, 10, dtype=np.float32)
             y = np.linspace(0, height-1, 10, dtype=np.float32)
             xx, yy = np.meshgrid(x, y)
-            points = np.column_stack([xx.flatten(), yy.flatten()]).astype(np.float32)
+            points = as_point_set(np.column_stack([xx.flatten(), yy.flatten()]))
         else:
-            points = extra_in.astype(np.float32)
+            points = as_point_set(extra_in)
             
         comp, labels, centers = cv2.kmeans(
             points,
@@ -657,12 +801,15 @@ class InRange(BaseTransform):
     """
 
     doc_filename = "inRange.html"
+    outputs = ("image", "mask")
 
     ch1 = params.SliderPairParam(min_val=0, max_val=255)
     ch2 = params.SliderPairParam(min_val=0, max_val=255)
     ch3 = params.SliderPairParam(min_val=0, max_val=255)
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "Since inRange returns what is effectively a bitmask, we can "
             "combine it with a preceeding cvtColor and then trailing bitwise_and "
@@ -700,11 +847,26 @@ class InRangeRaw(BaseTransform):
         out = cv2.inRange(src=img_in, lowerb=lower, upperb=upper,)
         return out
 
+    def draw_batch(self, imgs_in, extras_in):
+        imgs_in = stack_frames(imgs_in)
+        if not isinstance(imgs_in, np.ndarray):
+            return super().draw_batch(imgs_in, extras_in)
+        lower = (self.ch1["top"], self.ch2["top"], self.ch3["top"])
+        upper = (self.ch1["bot"], self.ch2["bot"], self.ch3["bot"])
+
+        def in_range(chunk):
+            out = cv2.inRange(src=flatten_stack(chunk), lowerb=lower, upperb=upper)
+            return unflatten_stack(out, len(chunk))
+
+        return map_chunks(in_range, imgs_in), [None] * len(imgs_in)
+
 
 class CornerHarris(BaseTransform):
     doc_filename = "cornerHarris.html"
 
-    block_size = params.IntSlider(min_val=1, max_val=100, default=1)
+    block_size = params.IntSlider(
+        min_val=1, max_val=100, default=1, preview_scaling=params.PREVIEW_LINEAR
+    )
     ksize = params.IntSlider(min_val=1, max_val=7, default=3, step=2)
     k = params.FloatSlider(min_val=0.005, max_val=1, default=0.1, step=0.005)
     border_type = params.ComboBox(
@@ -733,8 +895,12 @@ class CornerHarris(BaseTransform):
 class CornerSubPix(BaseTransform):
     doc_filename = "cornerSubPix.html"
 
-    window_size_rows = params.IntSlider(min_val=1, max_val=100, default=5)
-    window_size_cols = params.IntSlider(min_val=1, max_val=100, default=5)
+    window_size_rows = params.IntSlider(
+        min_val=1, max_val=100, default=5, preview_scaling=params.PREVIEW_LINEAR
+    )
+    window_size_cols = params.IntSlider(
+        min_val=1, max_val=100, default=5, preview_scaling=params.PREVIEW_LINEAR
+    )
     criteria = params.ComboBox(
         options=[
             "TERM_CRITERIA_EPS",
@@ -786,7 +952,13 @@ class GoodFeaturesToTrack(BaseTransform):
 
     max_corners = params.IntSlider(min_val=0, max_val=100, default=0)
     quality_level = params.FloatSlider(min_val=0.001, max_val=1.0, default=0.1, step=0.001)
-    min_distance = params.FloatSlider(min_val=0, max_val=100, default=5, step=0.001)
+    min_distance = params.FloatSlider(
+        min_val=0,
+        max_val=100,
+        default=5,
+        step=0.001,
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
     block_size = params.IntSlider(min_val=1, max_val=7, default=3, step=2)
     use_harris_detector = params.CheckBox()
     k = params.FloatSlider(min_val=0.005, max_val=1, default=0.1, step=0.005)
@@ -848,7 +1020,13 @@ class ApproxPolyDP(BaseTransform):
     doc_filename = "approxPolyDP.html"
 
     
-    epsilon = params.FloatSlider(min_val=0.005, max_val=30.0, default=1.0, step=0.005)
+    epsilon = params.FloatSlider(
+        min_val=0.005,
+        max_val=30.0,
+        default=1.0,
+        step=0.005,
+        preview_scaling=params.PREVIEW_LINEAR,
+    )
     closed = params.CheckBox()
 
     def draw(self, img_in, extra_in):
@@ -859,19 +1037,22 @@ class ApproxPolyDP(BaseTransform):
         approx_contours = []
 
         if contours is None:
-            return img_in, approx_contours
+            return img_in, Contours(approx_contours)
 
         for cont in contours:
             epsilon = self.epsilon
             approx = cv2.approxPolyDP(cont, epsilon, self.closed)
             approx_contours.append(approx)
 
-        return img_in, approx_contours
+        return img_in, Contours(approx_contours)
 
 
 class FindContours(BaseTransform):
     doc_filename = "findContours.html"
 
+    # Thresholds the (possibly already gray) input in place
+    mutates_input = True
+
     threshold = params.IntSlider(min_val=0, max_val=255, default=100, step=1)
     mode = params.ComboBox(
         options=["RETR_EXTERNAL", "RETR_LIST", "RETR_CCOMP", "RETR_TREE",],
@@ -890,6 +1071,8 @@ class FindContours(BaseTransform):
     )
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "We first apply a threshold to the image before searching for contours. ",
             alignment=QtCore.Qt.AlignCenter,
@@ -907,7 +1090,7 @@ class FindContours(BaseTransform):
 
         contours, _ = cv2.findContours(image=img, mode=self.mode, method=self.method)
 
-        return img_in, contours
+        return img_in, Contours(contours)
 
 
 class GetGaussianKernel(BaseTransform):
@@ -917,6 +1100,8 @@ class GetGaussianKernel(BaseTransform):
     sigma = params.FloatSlider(min_val=-1.0, max_val=31.0, default=13.0, step=0.005)
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "This display is showing the 1D Gaussian kernel as a vertical image. ",
             alignment=QtCore.Qt.AlignCenter,
@@ -932,6 +1117,9 @@ class GetGaussianKernel(BaseTransform):
 class MatchTemplate(BaseTransform):
     doc_filename = "matchTemplate.html"
 
+    # Draws the template and match rectangles onto the input
+    mutates_input = True
+
     template_center_x = params.IntSlider(min_val=0, max_val=100, default=50, step=1)
     template_center_y = params.IntSlider(min_val=0, max_val=100, default=50, step=1)
     template_size = params.IntSlider(min_val=0, max_val=100, default=20, step=1)
@@ -950,6 +1138,8 @@ class MatchTemplate(BaseTransform):
     )
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "Selected template shown in red. \nBest template match shown in blue.",
             alignment=QtCore.Qt.AlignCenter,
@@ -989,21 +1179,66 @@ class MatchTemplate(BaseTransform):
 
 class AddWeighted(BaseTransform):
     doc_filename = "addWeighted.html"
+    inputs = ("image", "image2")
 
     alpha = params.FloatSlider(min_val=-2.0, max_val=3.0, default=1.0, step=0.05)
     beta = params.FloatSlider(min_val=0.0, max_val=1.0, default=0.0, step=0.005)
     gamma = params.IntSlider(min_val=0, max_val=255, default=0, step=1)
 
+    def _is_image2(self, extra_in, img_in):
+        """Return True if ``extra_in`` is a second image wired to port image2"""
+        return (
+            "image2" in self.wired_inputs
+            and isinstance(extra_in, np.ndarray)
+            and extra_in.shape == img_in.shape
+            and extra_in.dtype == img_in.dtype
+        )
+
     def draw(self, img_in, extra_in):
-        rev_rows = np.arange(img_in.shape[0]) * (-1)
-        if len(img_in.shape) == 3:
-            img2 = img_in[rev_rows, :, :]
+        # Blend with a second image if one is wired in a GraphPipeline, else
+        # with img_in flipped upside down
+        if self._is_image2(extra_in, img_in):
+            img2 = extra_in
         else:
-            img2 = img_in[rev_rows, :]
+            rev_rows = np.arange(img_in.shape[0]) * (-1)
+            if len(img_in.shape) == 3:
+                img2 = img_in[rev_rows, :, :]
+            else:
+                img2 = img_in[rev_rows, :]
         out = cv2.addWeighted(
             src1=img_in, alpha=self.alpha, src2=img2, beta=self.beta, gamma=self.gamma
         )
         return out
+
+    def draw_batch(self, imgs_in, extras_in):
+        imgs_in = stack_frames(imgs_in)
+        if not isinstance(imgs_in, np.ndarray):
+            return super().draw_batch(imgs_in, extras_in)
+        imgs2 = None
+        if "image2" in self.wired_inputs:
+            imgs2 = stack_extras(extras_in, imgs_in)
+            if imgs2 is None and any(
+                self._is_image2(extra, img) for img, extra in zip(imgs_in, extras_in)
+            ):
+                # Some frames have a second image and some don't
+                return super().draw_batch(imgs_in, extras_in)
+        alpha, beta, gamma = self.alpha, self.beta, self.gamma
+
+        def add_weighted(chunk, chunk2=None):
+            if chunk2 is None:
+                # Rows 0, -1, -2, ... of each frame, like draw's rev_rows
+                chunk2 = np.concatenate([chunk[:, :1], chunk[:, :0:-1]], axis=1)
+            out = cv2.addWeighted(
+                src1=flatten_stack(chunk),
+                alpha=alpha,
+                src2=flatten_stack(chunk2),
+                beta=beta,
+                gamma=gamma,
+            )
+            return unflatten_stack(out, len(chunk))
+
+        others = () if imgs2 is None else (imgs2,)
+        return map_chunks(add_weighted, imgs_in, *others), [None] * len(imgs_in)
     block_size = params.IntSlider(min_val=1, max_val=25, default=3)
     k_size = params.IntSlider(min_val=1, max_val=7, default=3, step=2)
     threshold = params.IntSlider(min_val=1, max_val=100, default=50)
@@ -1011,7 +1246,9 @@ class AddWeighted(BaseTransform):
 class CornerEigenValsAndVecs(BaseTransform):
     doc_filename = "cornerEigenValsAndVecs.html"
 
-    block_size = params.IntSlider(min_val=1, max_val=25, default=3)
+    block_size = params.IntSlider(
+        min_val=1, max_val=25, default=3, preview_scaling=params.PREVIEW_LINEAR
+    )
     k_size = params.IntSlider(min_val=1, max_val=7, default=3, step=2)
     threshold = params.IntSlider(min_val=1, max_val=100, default=50)
     border_type = params.ComboBox(
@@ -1027,6 +1264,8 @@ class CornerEigenValsAndVecs(BaseTransform):
     )
 
     def get_info_widget(self):
+        from PySide6 import QtCore, QtWidgets
+
         label = QtWidgets.QLabel(
             "This display is using the eigenvalues returned and a threshold "
             "value to build a corner detector. See the OpenCV tutorial for details. ",
@@ -1136,7 +1375,9 @@ class DrawContours(BaseTransform):
 
     contour_index = params.IntSlider(min_val=-1, max_val=10, default=-1)
     color = params.ColorPicker(default=(0, 255, 0))
-    thickness = params.IntSlider(min_val=1, max_val=10, default=2)
+    thickness = params.IntSlider(
+        min_val=1, max_val=10, default=2, preview_scaling=params.PREVIEW_LINEAR
+    )
     line_type = params.ComboBox(
         options=["LINE_4", "LINE_8", "LINE_AA"],
         default="LINE_8",
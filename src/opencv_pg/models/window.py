@@ -1,27 +1,63 @@
-import copy
 import logging
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
-from PySide6 import QtCore
+
+from .frames import freeze_extra, readonly_view
+from .signals import Signal
 
 log = logging.getLogger(__name__)
 
 
-class Window(QtCore.QObject):
-    image_updated = QtCore.Signal()
+class PipelineCancelled(Exception):
+    """Raised between transforms when a run's cancel event has been set"""
+
+
+class WindowOutput(NamedTuple):
+    """Everything ``Window.draw`` publishes about its output, as one value
+
+    Runs happen on worker threads while the view reads the output on the GUI
+    thread, so the image is published together with the scale, roi and
+    generation it belongs to in a single assignment.
+    """
+
+    image: Optional[np.ndarray] = None
+    extra: Any = None
+    # Size of ``image`` relative to a full resolution run; < 1 for previews
+    scale: float = 1.0
+    # (x, y, width, height) of the source image ``image`` covers, or None
+    roi: Optional[Tuple[int, int, int, int]] = None
+    # Incremented whenever ``draw`` changes any of the above
+    generation: int = 0
+
+
+class Window:
+    """A sequence of transforms whose output is displayed together
+
+    Attributes:
+        image_updated (Signal): Emitted after ``draw`` stores an ``output``
+            that differs from the previous one, on the thread that ran the
+            pipeline
+        output (WindowOutput): Output of the last ``draw``. Read it once
+            and use its fields, rather than the ``last_out``, ``extra_out``,
+            ``last_out_scale``, ``last_out_roi`` and ``output_generation``
+            shortcuts, when another thread may be running the pipeline.
+        visible_rect (tuple): (x, y, width, height) of the output that is on
+            screen, in full resolution pixels, or None if unknown. Set by the
+            view; see ``Pipeline.get_visible_rect``.
+    """
 
     counter = 1
 
     def __init__(self, transforms: List, name: str = ""):
-        super().__init__()
+        self.image_updated = Signal()
         self.transforms = transforms
         self.index = None
         self.pipeline = None
-        self.last_out = None
+        self.output = WindowOutput()
+        self.visible_rect = None
         self.last_in = None
         self.extra_in = None
-        self.extra_out = None
 
         # Use a suitable name if none is provided
         if not name:
@@ -30,6 +66,26 @@ class Window(QtCore.QObject):
         else:
             self.name = name
 
+    @property
+    def last_out(self):
+        return self.output.image
+
+    @property
+    def extra_out(self):
+        return self.output.extra
+
+    @property
+    def last_out_scale(self):
+        return self.output.scale
+
+    @property
+    def last_out_roi(self):
+        return self.output.roi
+
+    @property
+    def output_generation(self):
+        return self.output.generation
+
     @classmethod
     def reset_counter(cls):
         cls.counter = 1
@@ -82,7 +138,7 @@ class Window(QtCore.QObject):
         self.pipeline = None
 
     def clear_last_output(self):
-        self.last_out = None
+        self.output = self.output._replace(image=None)
 
     def clear_last_input(self):
         self.last_in = None
@@ -91,7 +147,7 @@ class Window(QtCore.QObject):
         self.extra_in = None
 
     def clear_extra_output(self):
-        self.extra_out = None
+        self.output = self.output._replace(extra=None)
 
     def clear_all(self):
         self.clear_pipeline()
@@ -101,6 +157,11 @@ class Window(QtCore.QObject):
         self.clear_extra_output()
         self.reset_transforms()
 
+    def clear_cache(self):
+        """Clear the cached results of all child transforms"""
+        for transform in self.transforms:
+            transform.clear_cache()
+
     def update_name(self, prefix):
         self.name = f"{prefix} {self.name}"
 
@@ -145,18 +206,33 @@ class Window(QtCore.QObject):
             )
             return
             
-        self.pipeline.run_pipeline(self.index, transform_index)
+        self.pipeline.request_run(self.index, transform_index)
+
+    def draw(
+        self,
+        img_in: Optional[np.ndarray],
+        extra_in: Any,
+        transform_index: int = 0,
+        cancel_event=None,
+    ) -> tuple:
+        """Call _draw on each child transform in sequence and return final output
 
-    def draw(self, img_in: Optional[np.ndarray], extra_in: Any, transform_index: int = 0) -> tuple:
-        """Call _draw on each child transform in sequence and return final output"""
+        Images and extras are passed along by reference as read-only views;
+        only transforms that declare ``mutates_input`` receive a copy.
+
+        Args:
+            cancel_event (threading.Event, optional): Checked before each
+                transform; if set, ``PipelineCancelled`` is raised and
+                ``output`` is left untouched.
+        """
         if transform_index < 0:
             raise ValueError(f"Transform index must be >= 0. Got {transform_index}")
 
         if img_in is not None and len(img_in.shape) > 0:
-            self.last_in = np.copy(img_in)
-            img_out = np.copy(img_in)
-            self.extra_in = copy.deepcopy(extra_in)
-            extra_out = copy.deepcopy(extra_in)
+            self.last_in = readonly_view(img_in)
+            img_out = self.last_in
+            self.extra_in = freeze_extra(extra_in)
+            extra_out = self.extra_in
         else:
             img_out = None
             extra_out = None
@@ -165,9 +241,27 @@ class Window(QtCore.QObject):
 
         # Run the transforms
         for transform in self.transforms[transform_index:]:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PipelineCancelled()
             img_out, extra_out = transform._draw(img_out, extra_out)
 
-        self.last_out = np.copy(img_out)
-        self.extra_out = copy.deepcopy(extra_out)
-        self.image_updated.emit()
+        img_out = readonly_view(img_out)
+        last = self.output
+        scale, roi = last.scale, last.roi
+        if self.transforms:
+            scale, roi = self.transforms[-1].preview_scale, self.transforms[-1].roi
+
+        # Cached results are returned as the same objects, so a window whose
+        # transforms were all served from their caches has nothing to redraw
+        changed = not (
+            img_out is last.image
+            and extra_out is last.extra
+            and scale == last.scale
+            and roi == last.roi
+        )
+        if changed:
+            self.output = WindowOutput(
+                img_out, extra_out, scale, roi, last.generation + 1
+            )
+            self.image_updated.emit()
         return img_out, extra_out
@@ -0,0 +1,188 @@
+"""Tune a pipeline's Params without the GUI
+
+Usage:
+    python main.py optimize --pipeline InRange --image img.png \\
+        --axis 0.1.ch1 --axis 0.1.ch2 --axis 0.1.ch3 --steps 16 \\
+        --objective iou --target mask.png --output tuned.json
+    python optimize.py --pipeline spec.json --image img.png \\
+        --axis 0.2.threshold=10:200:10 --objective extra_count \\
+        --method random --max-seconds 60 --output tuned.json --csv history.csv
+
+Axes are given as for ``sweep.py``; see ``models.sweep.parse_axis``. The
+best values found are written into the pipeline's spec; see
+``models.optimize``.
+"""
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from batch import load_pipeline
+from models import optimize, sweep
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# --objective that scores the output's mask against --target
+IOU = "iou"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Optimize entrypoint; returns 1 if no combination could be scored"""
+    parser = argparse.ArgumentParser("OpenCV Playground Optimize")
+    parser.add_argument(
+        "--pipeline",
+        required=True,
+        help="Pipeline spec (.json), builtin transform name, eg: Canny, "
+        "or module:attr",
+    )
+    parser.add_argument("--image", required=True, help="Image to run the pipeline on")
+    parser.add_argument(
+        "--axis",
+        action="append",
+        required=True,
+        help="Param to tune: <window>.<transform>.<param>[=start:stop:step "
+        "or =value,value,...]. Repeat for several",
+    )
+    parser.add_argument(
+        "--steps",
+        type=int,
+        default=None,
+        help="Try at most this many values of axes given without values",
+    )
+    parser.add_argument(
+        "--objective",
+        required=True,
+        help=f"Metric to optimize: {IOU} (with --target), one of "
+        f"{', '.join(sweep.METRICS)} or module:attr",
+    )
+    parser.add_argument(
+        "--target", default=None, help="Ground truth mask for --objective iou"
+    )
+    parser.add_argument(
+        "--minimize", action="store_true", help="Minimize the objective instead"
+    )
+    parser.add_argument(
+        "--method",
+        default=optimize.COORDINATE,
+        choices=optimize.METHODS,
+        help="Search method",
+    )
+    parser.add_argument(
+        "--max-evaluations", type=int, default=None, help="Stop after this many runs"
+    )
+    parser.add_argument(
+        "--max-seconds", type=float, default=None, help="Stop after this long"
+    )
+    parser.add_argument(
+        "--goal",
+        type=float,
+        default=None,
+        help="Stop once the objective is at least this good",
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=10,
+        help="Rounds of random search without improvement before stopping",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.0,
+        help="Smallest change of the objective that counts as an improvement",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes; 0 runs in this process. "
+        "Default is [Performance] processing_threads",
+    )
+    parser.add_argument(
+        "--max-dimension",
+        type=int,
+        default=None,
+        help="Run at a preview scale with the longest image side this many "
+        "pixels. Default runs at full resolution",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random search seed")
+    parser.add_argument(
+        "--output", default=None, help="Pipeline spec (.json) to write the tuned pipeline to"
+    )
+    parser.add_argument(
+        "--csv", default=None, help="CSV file to write every evaluation to"
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
+        help="Log Level",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format=config.get_log_format(), level=args.log_level)
+
+    objective = args.objective
+    if objective == IOU:
+        if not args.target:
+            parser.error(f"--objective {IOU} needs --target")
+        objective = sweep.MaskIoU(args.target)
+
+    pipeline = load_pipeline(args.pipeline, args.image)
+    try:
+        axes = [sweep.parse_axis(pipeline, text, args.steps) for text in args.axis]
+    except sweep.SweepError as e:
+        parser.error(str(e))
+    print(
+        f"Optimizing {', '.join(a.label for a in axes)} "
+        f"({sweep.count_combinations(axes)} combinations) by {args.method}"
+    )
+
+    evaluations = 0
+
+    def report(result):
+        nonlocal evaluations
+        evaluations += 1
+        print(f"\r{evaluations} evaluations", end="")
+        sys.stdout.flush()
+
+    result = optimize.optimize(
+        pipeline,
+        axes,
+        objective,
+        maximize=not args.minimize,
+        method=args.method,
+        max_evaluations=args.max_evaluations,
+        max_seconds=args.max_seconds,
+        goal=args.goal,
+        patience=args.patience,
+        min_delta=args.min_delta,
+        workers=args.workers,
+        max_dimension=args.max_dimension,
+        seed=args.seed,
+        callback=report,
+    )
+    print()
+
+    if args.csv:
+        sweep.write_csv(args.csv, axes, result.history)
+    if result.best_values is None:
+        print(f"No combination could be scored in {result.seconds:.2f} s")
+        return 1
+
+    for axis, value in zip(axes, result.best_values):
+        print(f"{axis.label} = {value}")
+    print(
+        f"{args.objective}: {result.best_score:.6g} (was {result.initial_score}), "
+        f"{result.evaluations} evaluations in {result.seconds:.2f} s, "
+        f"stopped: {result.stopped}"
+    )
+    if args.output:
+        sweep.apply_values(pipeline, axes, result.best_values)
+        pipeline.save(args.output)
+        print(f"Tuned pipeline written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
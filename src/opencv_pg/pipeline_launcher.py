@@ -1,6 +1,7 @@
 import logging
 from PySide6 import QtWidgets  # GUI library import
 from models.pipeline import Pipeline
+from models.scheduler import PipelineScheduler
 from views.pipeline_window import PipeWindow  # GUI window import
 from utils.config_manager import config  # Add this import
 
@@ -30,6 +31,9 @@ def launch_pipeline(pipeline: Pipeline, show_info_widgets: bool = False,
         pipe_win.show()  # Show window
         windows.append(pipe_win)  # Add window to list to keep in scope
 
+    # Coalesce the run requests made by the param widgets
+    pipeline.set_scheduler(PipelineScheduler(pipeline))
+
     # Process events before running pipeline (GUI event processing)
     app.processEvents()
     pipeline.run_pipeline()
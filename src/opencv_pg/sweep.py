@@ -0,0 +1,156 @@
+"""Sweep a pipeline's Params without the GUI
+
+Usage:
+    python main.py sweep --pipeline Canny --image img.png \\
+        --axis 0.1.threshold1=0:250:25 --axis 0.1.threshold2=50:300:25 \\
+        --output sweep.csv --thumbnails thumbs/
+    python sweep.py --pipeline spec.json --image img.png --axis 0.1.k_size \\
+        --steps 8 --metric nonzero --output sweep.csv
+
+Axes are ``<window>.<transform>.<param>``, optionally with the values to
+sweep; see ``models.sweep.parse_axis``. Every combination is run and a row of
+metrics is written to the CSV for each; see ``models.sweep``.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+
+from batch import load_pipeline
+from models import sweep
+from utils.config_manager import config
+from views.display import DisplayConverter, NORMALIZATIONS
+
+log = logging.getLogger(__name__)
+
+
+def write_thumbnails(out_dir, axes, results, normalization=None):
+    """Write each result's thumbnail to ``out_dir``, named by its axis values"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    converter = DisplayConverter(normalization)
+    for result in results:
+        if result.thumbnail is None:
+            continue
+        name = "_".join(
+            f"{axis.name}={value}" for axis, value in zip(axes, result.values)
+        )
+        img = converter.to_display(result.thumbnail)
+        if img is not None:
+            cv2.imwrite(str(out_dir / f"{result.index:05d}_{name}.png"), img)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Sweep entrypoint; returns the number of combinations that failed"""
+    parser = argparse.ArgumentParser("OpenCV Playground Sweep")
+    parser.add_argument(
+        "--pipeline",
+        required=True,
+        help="Pipeline spec (.json), builtin transform name, eg: Canny, "
+        "or module:attr",
+    )
+    parser.add_argument("--image", required=True, help="Image to run the pipeline on")
+    parser.add_argument(
+        "--axis",
+        action="append",
+        required=True,
+        help="Param to sweep: <window>.<transform>.<param>[=start:stop:step "
+        "or =value,value,...]. Repeat for a Cartesian product",
+    )
+    parser.add_argument(
+        "--steps",
+        type=int,
+        default=None,
+        help="Sweep at most this many values of axes given without values",
+    )
+    parser.add_argument(
+        "--metric",
+        action="append",
+        default=None,
+        help=f"Metric to record, one of {', '.join(sweep.METRICS)} or module:attr. "
+        "Repeat for several. Default is every builtin",
+    )
+    parser.add_argument("--output", required=True, help="CSV file to write")
+    parser.add_argument(
+        "--thumbnails", default=None, help="Directory to write thumbnails to"
+    )
+    parser.add_argument(
+        "--thumbnail-size",
+        type=int,
+        default=sweep.THUMBNAIL_SIZE,
+        help="Longest side of the thumbnails",
+    )
+    parser.add_argument(
+        "--max-dimension",
+        type=int,
+        default=None,
+        help="Run at a preview scale with the longest image side this many "
+        "pixels. Default runs at full resolution",
+    )
+    parser.add_argument(
+        "--normalization",
+        default=None,
+        choices=NORMALIZATIONS,
+        help="How thumbnails that aren't 8 bit are written. "
+        "Default is [ImageViewer] display_normalization",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes; 0 runs in this process. "
+        "Default is [Performance] processing_threads",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"],
+        help="Log Level",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format=config.get_log_format(), level=args.log_level)
+
+    pipeline = load_pipeline(args.pipeline, args.image)
+    try:
+        axes = [sweep.parse_axis(pipeline, text, args.steps) for text in args.axis]
+    except sweep.SweepError as e:
+        parser.error(str(e))
+    total = sweep.count_combinations(axes)
+    print(f"Sweeping {total} combinations of {', '.join(a.label for a in axes)}")
+
+    start = time.perf_counter()
+    results = []
+    failed = 0
+    for result in sweep.run_sweep(
+        pipeline,
+        axes,
+        metrics=args.metric,
+        workers=args.workers,
+        thumbnail_size=args.thumbnail_size,
+        max_dimension=args.max_dimension,
+    ):
+        results.append(result)
+        if result.error is not None:
+            failed += 1
+            log.warning("%s failed: %s", result.values, result.error)
+        print(f"\r{len(results)}/{total}", end="")
+        sys.stdout.flush()
+    print()
+
+    sweep.write_csv(args.output, axes, results)
+    if args.thumbnails:
+        write_thumbnails(args.thumbnails, axes, results, args.normalization)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(results)} combinations, {failed} failed, {elapsed:.2f} s total, "
+        f"written to {args.output}"
+    )
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -64,7 +64,9 @@ class ConfigManager:
         # ImageViewer section
         self.config['ImageViewer'] = {
             'base_zoom_factor': '0.002',
-            'valid_extensions': '.png,.jpg,.jpeg,.bmp,.tif,.tiff'
+            'valid_extensions': '.png,.jpg,.jpeg,.bmp,.tif,.tiff,.npy',
+            'valid_video_extensions': '.mp4,.avi,.mov,.mkv,.webm',
+            'display_normalization': 'fixed'  # fixed, minmax or percentile
         }
         
         # UI section
@@ -135,7 +137,11 @@ class ConfigManager:
             'processing_threads': '4',
             'enable_hardware_acceleration': 'true',
             'downscale_large_images': 'true',
-            'max_image_dimension': '4000'  # pixels
+            'max_image_dimension': '4000',  # pixels
+            'pipeline_debounce_interval': '30',  # milliseconds
+            'preview_settle_interval': '300',  # milliseconds
+            'tile_size': '2048',  # pixels
+            'memory_map_images': 'false'
         }
         
         # Export section
@@ -248,6 +254,18 @@ class ConfigManager:
         """
         valid_extensions = self.get_valid_image_extensions()
         return os.path.isfile(file_path) and file_path.lower().endswith(valid_extensions)
+
+    def is_valid_video(self, file_path):
+        """Check if the file is a video that can be streamed
+
+        Args:
+            file_path (str): Path to the file
+
+        Returns:
+            bool: True if the file is a valid video, False otherwise
+        """
+        valid_extensions = self.get_valid_video_extensions()
+        return os.path.isfile(file_path) and file_path.lower().endswith(valid_extensions)
     
     def get_default_image_dir(self):
         """Get the default directory for opening images
@@ -272,9 +290,27 @@ class ConfigManager:
             tuple: A tuple of valid image file extensions
         """
         extensions_str = self.get('ImageViewer', 'valid_extensions', 
-                                 '.png,.jpg,.jpeg,.bmp,.tif,.tiff')
+                                 '.png,.jpg,.jpeg,.bmp,.tif,.tiff,.npy')
+        return tuple(extensions_str.split(','))
+
+    def get_valid_video_extensions(self):
+        """Get the list of video file extensions opened as streams
+
+        Returns:
+            tuple: A tuple of valid video file extensions
+        """
+        extensions_str = self.get('ImageViewer', 'valid_video_extensions',
+                                  '.mp4,.avi,.mov,.mkv,.webm')
         return tuple(extensions_str.split(','))
     
+    def get_display_normalization(self):
+        """Get how images that aren't uint8 are mapped to 0-255 for display
+
+        Returns:
+            str: 'fixed' (like cv2.imshow), 'minmax' or 'percentile'
+        """
+        return self.get('ImageViewer', 'display_normalization', 'fixed')
+
     def get_timer_interval(self, default=1000):
         """Get the repaint timer interval
         
@@ -578,11 +614,46 @@ class ConfigManager:
     
     def get_max_image_dimension(self):
         """Get the maximum image dimension
-        
+
+        Large images are rendered with their longest side at this size while
+        parameters are being edited, if ``should_downscale_large_images``.
+
         Returns:
             int: The maximum image dimension in pixels
         """
         return self.get('Performance', 'max_image_dimension', 4000, int)
+
+    def get_pipeline_debounce_interval(self):
+        """Get the interval used to coalesce pipeline run requests
+
+        Returns:
+            int: The interval in milliseconds
+        """
+        return self.get('Performance', 'pipeline_debounce_interval', 30, int)
+
+    def get_preview_settle_interval(self):
+        """Get how long parameters must be unchanged before a full resolution run
+
+        Returns:
+            int: The interval in milliseconds
+        """
+        return self.get('Performance', 'preview_settle_interval', 300, int)
+
+    def get_tile_size(self):
+        """Get the width and height of the tiles used by tiled runs
+
+        Returns:
+            int: The tile size in pixels
+        """
+        return self.get('Performance', 'tile_size', 2048, int)
+
+    def should_memory_map_images(self):
+        """Check if uncompressed TIFFs should be memory mapped instead of decoded
+
+        Returns:
+            bool: True if TIFFs should be memory mapped
+        """
+        return self.get('Performance', 'memory_map_images', False, bool)
     
     # Export methods
     def get_default_image_format(self):
@@ -0,0 +1,63 @@
+"""Startup timings reported by ``--profile-startup``
+
+Import this module as early as possible; times are measured from its import.
+"""
+import sys
+import time
+
+_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """Records named steps of application startup and prints them on first paint
+
+    Does nothing unless ``enabled``, so it can be threaded through startup
+    unconditionally.
+
+    Args:
+        enabled (bool): If False, ``mark`` and ``watch_first_paint`` are no-ops
+        stream (file, optional): Where the report is written. Default stderr.
+    """
+
+    def __init__(self, enabled=False, stream=None):
+        self.enabled = enabled
+        self.stream = stream or sys.stderr
+        self.marks = []
+        self._filter = None
+
+    def mark(self, label):
+        """Record that step ``label`` has just finished"""
+        if self.enabled:
+            self.marks.append((label, time.perf_counter() - _START))
+
+    def watch_first_paint(self, widget):
+        """Mark ``first paint`` and print the report when ``widget`` first paints"""
+        if not self.enabled:
+            return
+        from PySide6 import QtCore
+
+        profiler = self
+
+        class _FirstPaintFilter(QtCore.QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QtCore.QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    profiler.mark("first paint")
+                    profiler.report()
+                return False
+
+        self._filter = _FirstPaintFilter()
+        widget.installEventFilter(self._filter)
+
+    def report(self):
+        """Write each step's duration and the time since start to ``stream``"""
+        if not self.enabled:
+            return
+        self.stream.write("Startup profile (ms):\n")
+        last = 0.0
+        for label, elapsed in self.marks:
+            self.stream.write(
+                f"  {label:<30} {(elapsed - last) * 1000:8.1f} {elapsed * 1000:8.1f}\n"
+            )
+            last = elapsed
+        self.stream.flush()
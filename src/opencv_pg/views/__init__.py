@@ -1,11 +1,24 @@
+import importlib
 import logging
 
 # Initialize logging for the views module
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
-# Import key components to make them accessible from the views module
-from .pipeline_window import PipeWindow
-from .playground import Playground
+# Key components accessible from the views module. They are imported on first
+# access so that models can import views.widgets without pulling in (and
+# circularly importing) the windows built on top of models.
+_LAZY_ATTRS = {
+    "PipeWindow": ".pipeline_window",
+    "Playground": ".playground",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
+
 
 log.info("Views module initialized")
@@ -0,0 +1,158 @@
+"""Convert pipeline outputs into 8 bit images for display
+
+Outputs are shown the way ``cv2.imshow`` shows them: uint8 as is, 16 and 32
+bit integers divided by 256 and floats multiplied by 255. Signed or
+unbounded outputs, eg: Sobel's int16 or float32 gradients, are easier to
+read stretched to their own range; see ``[ImageViewer] display_normalization``.
+
+A DisplayConverter keeps one 8 bit buffer and writes every conversion into
+it with OpenCV or numpy ``out=`` calls, so redraws of an image of the same
+size allocate nothing. uint8 gray and BGR images are displayed without any
+conversion.
+"""
+import logging
+from typing import Optional
+
+import cv2
+import numpy as np
+from PySide6 import QtGui
+
+from utils.config_manager import config
+
+log = logging.getLogger(__name__)
+
+# Ways of mapping non uint8 images to 0-255
+NORMALIZE_FIXED = "fixed"
+NORMALIZE_MINMAX = "minmax"
+NORMALIZE_PERCENTILE = "percentile"
+NORMALIZATIONS = (NORMALIZE_FIXED, NORMALIZE_MINMAX, NORMALIZE_PERCENTILE)
+
+# Percentiles stretched to 0-255 with NORMALIZE_PERCENTILE
+PERCENTILES = (1, 99)
+# Pixels sampled to estimate the percentiles
+_PERCENTILE_SAMPLES = 1 << 16
+
+# Maps each uint16 value to its top 8 bits
+_UINT16_LUT = (np.arange(1 << 16) >> 8).astype(np.uint8)
+
+# Non uint8 dtypes that can be displayed, and their NORMALIZE_FIXED scale
+_FIXED_SCALES = {
+    np.int8: 1.0,
+    np.int16: 1 / 256,
+    np.uint16: 1 / 256,
+    np.int32: 1 / 256,
+    np.float32: 255.0,
+    np.float64: 255.0,
+}
+
+
+class DisplayConverter:
+    """Converts images to 8 bit for one display surface, reusing a buffer
+
+    Args:
+        normalization (str, optional): One of NORMALIZATIONS. Default is
+            ``[ImageViewer] display_normalization``.
+    """
+
+    def __init__(self, normalization: Optional[str] = None):
+        if normalization is None:
+            normalization = config.get_display_normalization()
+        if normalization not in NORMALIZATIONS:
+            log.warning(
+                "Unknown display normalization '%s'; using '%s'",
+                normalization,
+                NORMALIZE_FIXED,
+            )
+            normalization = NORMALIZE_FIXED
+        self.normalization = normalization
+        self._buffer = None
+
+    def to_display(self, img: np.ndarray) -> Optional[np.ndarray]:
+        """Return ``img`` as a contiguous uint8 gray or BGR image
+
+        The result is ``img`` itself or this converter's buffer, which is
+        overwritten by the next call.
+
+        Returns:
+            np.ndarray or None: None if the dtype or channels aren't supported
+        """
+        if img.ndim == 3 and img.shape[2] in (1, 4):
+            # Gray, or BGRA shown without its alpha
+            img = img[..., 0] if img.shape[2] == 1 else img[..., :3]
+        if img.ndim not in (2, 3) or (img.ndim == 3 and img.shape[2] != 3):
+            log.error("Can't display an image of shape %s", img.shape)
+            return None
+        if img.dtype != np.uint8 and img.dtype.type not in _FIXED_SCALES:
+            log.error(
+                "'%s' is not a supported np.ndarray type. Supported types are: "
+                "uint8, int8, uint16, int16, int32, float32 and float64.",
+                img.dtype,
+            )
+            return None
+
+        if img.dtype == np.uint8:
+            if img.flags.c_contiguous:
+                return img
+            buffer = self._get_buffer(img.shape)
+            np.copyto(buffer, img)
+            return buffer
+
+        buffer = self._get_buffer(img.shape)
+        if self.normalization == NORMALIZE_FIXED and img.dtype == np.uint16:
+            np.take(_UINT16_LUT, img, out=buffer)
+            return buffer
+
+        alpha, beta = self._get_scaling(img)
+        # dst = saturate(img * alpha + beta), written straight into the buffer
+        img = np.ascontiguousarray(img)
+        cv2.addWeighted(img, alpha, img, 0, beta, dst=buffer, dtype=cv2.CV_8U)
+        return buffer
+
+    def to_qimage(self, img: np.ndarray) -> Optional[QtGui.QImage]:
+        """Return a QImage of ``img`` converted by ``to_display``
+
+        The QImage shares memory with ``img`` or this converter's buffer, so
+        it must be used, eg: by ``QPixmap.fromImage``, before the next call.
+        """
+        img = self.to_display(img)
+        if img is None:
+            return None
+        return to_qimage(img)
+
+    def _get_buffer(self, shape) -> np.ndarray:
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+        return self._buffer
+
+    def _get_scaling(self, img: np.ndarray):
+        """Return (alpha, beta) mapping ``img`` to 0-255"""
+        if self.normalization == NORMALIZE_MINMAX:
+            low, high = img.min(), img.max()
+        elif self.normalization == NORMALIZE_PERCENTILE:
+            step = max(1, int((img.shape[0] * img.shape[1] / _PERCENTILE_SAMPLES) ** 0.5))
+            low, high = np.percentile(img[::step, ::step], PERCENTILES)
+        else:
+            return _FIXED_SCALES[img.dtype.type], 0.0
+
+        low, high = float(low), float(high)
+        if not np.isfinite(low) or not np.isfinite(high) or high <= low:
+            # NaNs, infinities or a flat image; nothing to stretch
+            return _FIXED_SCALES[img.dtype.type], 0.0
+        alpha = 255 / (high - low)
+        return alpha, -low * alpha
+
+
+def to_qimage(img: np.ndarray) -> QtGui.QImage:
+    """Return a QImage of uint8 gray or BGR image ``img``
+
+    The QImage shares memory with ``img`` unless it isn't contiguous, eg: a
+    crop of a larger image, in which case it's copied first.
+    """
+    if not img.flags.c_contiguous:
+        img = np.ascontiguousarray(img)
+    rows, cols = img.shape[:2]
+    if img.ndim == 2:
+        fmt = QtGui.QImage.Format_Grayscale8
+    else:
+        fmt = QtGui.QImage.Format_BGR888
+    return QtGui.QImage(img.data, cols, rows, img.strides[0], fmt)
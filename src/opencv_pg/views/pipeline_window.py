@@ -4,11 +4,12 @@ This format is not going to be used. View model probably works better
 """
 import logging
 
-import numpy as np
-from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6 import QtCore, QtWidgets
 
+from models.sweep import get_sweepable_params
 from models.window import Window
 
+from .sweep_dialog import SweepDialog
 from .widgets.image_viewer import ImageViewer
 from .widgets.vertical_scroll_area import VerticalScrollArea
 
@@ -16,14 +17,26 @@ log = logging.getLogger(__name__)
 
 
 class PipeWindow(QtWidgets.QWidget):
+    # Re-emits Window.image_updated, which may come from a worker thread, so
+    # Qt queues _handle_pipeline_completed onto the GUI thread
+    _image_updated = QtCore.Signal()
+
     def __init__(self, window: Window, parent=None, show_info_widget=True):
         super().__init__(parent=parent)
         self.show_info_widget = show_info_widget
         self.window = window
         self.viewer = None
+        # {transform: WidgetGroup}, to show each transform's DrawStats
+        self._groupboxes = {}
+        # WindowOutput.generation of the image in the viewer
+        self._shown_generation = None
         layout = self._build_layout()
         self.setLayout(layout)
-        self.window.image_updated.connect(self._handle_pipeline_completed)
+        self._image_updated.connect(self._handle_pipeline_completed)
+        self.viewer.visible_rect_changed.connect(self._handle_visible_rect_changed)
+        forward = self._image_updated.emit
+        self.window.image_updated.connect(forward)
+        self.destroyed.connect(lambda: window.image_updated.disconnect(forward))
 
     def set_splitter_pos(self, percent):
         """Set the splitter `percent` of the way down the window"""
@@ -42,58 +55,57 @@ class PipeWindow(QtWidgets.QWidget):
         """Rescale viewer image when splitter changes"""
         self.viewer.update_scale()
 
-    def update_image(self, img_in, viewer):
-        """Update the `viewer` with `img_in`"""
+    def update_image(self, img_in, viewer, scale=1.0, roi=None):
+        """Update the `viewer` with `img_in`, rendered at preview `scale`
+
+        If `roi` is given, `img_in` only covers that part of the image.
+        """
         if img_in is None:
             log.warning("Attempted to update viewer with None image")
             return
-            
-        q_img = self._get_qimage(img_in)
-        if q_img is None:
-            log.error("Failed to convert image to QImage")
-            return
-            
+
         try:
-            pixmap = QtGui.QPixmap.fromImage(q_img)
-            viewer.setPixmap(pixmap)
+            if not viewer.set_image(img_in, scale=scale, roi=roi):
+                log.error("Failed to convert image to QImage")
         except Exception as e:
             log.error(f"Failed to update image in viewer: {e}")
 
-    def _get_qimage(self, img):
-        """Return a QImage appropriate for the image type
-
-        We're going to do this the same way that cv2.imshow works:
-        https://github.com/opencv/opencv/blob/bea2c7545243ba2dabce6badc94dd55894a8e5ca/modules/highgui/include/opencv2/highgui.hpp#L358-L366
-        """
-        imtype = img.dtype
-        y, x = img.shape[0], img.shape[1]
-        channels = 1 if len(img.shape) == 2 else img.shape[2]
-
-        # Scale image from 0, 255
-        # maybe dropping precision since using astype and not rounding first ...
-        if imtype in (np.uint16, np.int32):
-            img = (img / 256).astype(np.uint8)
-        elif imtype in (np.float32, np.float64):
-            img = (img * 255).astype(np.uint8)
-        elif imtype != np.uint8:
-            log.error(
-                "'%s' is not a supported np.ndarray type. Supported types "
-                "are: uint8, uint16, int32, float32, and float64.",
-                imtype,
-            )
-            return None  # Add this line to handle unsupported types
-
-        # Display as grayscale or BGR
-        if len(img.shape) == 2:
-            fmt = QtGui.QImage.Format_Grayscale8
-        else:
-            fmt = QtGui.QImage.Format_BGR888
-        return QtGui.QImage(img.data, x, y, channels * x, fmt)
-
     @QtCore.Slot()
     def _handle_pipeline_completed(self):
         """Redraw the output image after a param change"""
-        self.update_image(self.window.last_out, self.viewer)
+        # Signals queue up while the GUI is busy; draw each output only once.
+        # Read once, as a worker thread may publish the next output meanwhile
+        output = self.window.output
+        if output.generation == self._shown_generation:
+            return
+        self._shown_generation = output.generation
+        self.update_image(output.image, self.viewer, output.scale, output.roi)
+        for transform, groupbox in self._groupboxes.items():
+            groupbox.set_stats(transform.stats)
+
+    def _show_transform_menu(self, transform, groupbox, pos):
+        """Show the context menu of a transform's group box"""
+        menu = QtWidgets.QMenu(self)
+        action = menu.addAction("Sweep Params...")
+        action.setEnabled(
+            self.window.pipeline is not None and bool(get_sweepable_params(transform))
+        )
+        action.triggered.connect(lambda: self.open_sweep_dialog(transform))
+        menu.exec(groupbox.mapToGlobal(pos))
+
+    def open_sweep_dialog(self, transform):
+        """Open a SweepDialog over the Params of ``transform``"""
+        dialog = SweepDialog(self.window.pipeline, transform, parent=self)
+        dialog.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        dialog.resize(800, 600)
+        dialog.show()
+        return dialog
+
+    @QtCore.Slot(QtCore.QRectF)
+    def _handle_visible_rect_changed(self, rect):
+        """Tell the pipeline which part of the output is on screen"""
+        rect = rect.toAlignedRect()
+        self.window.visible_rect = (rect.x(), rect.y(), rect.width(), rect.height())
 
     def _build_layout(self):
         top_layout = QtWidgets.QVBoxLayout()
@@ -120,6 +132,7 @@ class PipeWindow(QtWidgets.QWidget):
 
             # Build the groupbox with its transforms
             groupbox = WidgetGroup(transform.__class__.__name__)
+            self._groupboxes[transform] = groupbox
             for param in transform.params:
                 widget = param.get_widget()
                 groupbox.add_widget(widget, param.label, param.help_text)
@@ -128,6 +141,10 @@ class PipeWindow(QtWidgets.QWidget):
                     param.set_enabled(False)
 
             transform.interconnect_widgets()
+            groupbox.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+            groupbox.customContextMenuRequested.connect(
+                lambda pos, t=transform, g=groupbox: self._show_transform_menu(t, g, pos)
+            )
             
             # Check if transform has handle_enabled_changed method before connecting
             if hasattr(transform, 'handle_enabled_changed') and callable(transform.handle_enabled_changed):
@@ -158,6 +175,7 @@ class PipeWindow(QtWidgets.QWidget):
 class WidgetGroup(QtWidgets.QGroupBox):
     def __init__(self, name, parent=None):
         super().__init__(name, parent=parent)
+        self.name = name
         self.form_layout = QtWidgets.QFormLayout()
         self.form_layout.setVerticalSpacing(10)
         self.form_layout.setHorizontalSpacing(10)
@@ -173,6 +191,16 @@ class WidgetGroup(QtWidgets.QGroupBox):
             qlabel.setToolTip(help_text)
         self.form_layout.addRow(qlabel, widget)
 
+    def set_stats(self, stats):
+        """Show the DrawStats of the last draw in the title and tooltip"""
+        if stats is None:
+            self.setTitle(self.name)
+            self.setToolTip("")
+            return
+        suffix = "cached" if stats.cached else f"{stats.wall_time * 1000:.1f} ms"
+        self.setTitle(f"{self.name}  ({suffix})")
+        self.setToolTip(stats.format())
+
     def change_label(self, widget, label):
         """Change the label for the provided widget"""
         qlabel = self.form_layout.labelForField(widget)
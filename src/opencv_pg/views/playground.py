@@ -8,10 +8,10 @@ except ImportError as e:
 
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import QModelIndex, Qt, QUrl, Slot
-from PySide6.QtWebEngineWidgets import QWebEngineView
 
-from docs.doc_writer import RENDERED_DIR
 from models.pipeline import Pipeline
+from models.scheduler import PipelineScheduler
+from models.stream import StreamRunner
 from models.transform_windows import get_transform_window
 
 from .pipeline_window import PipeWindow
@@ -100,19 +100,15 @@ class Playground(QtWidgets.QSplitter):
             self._reload_pipeline
         )
 
-        # Document Viewer
+        # Document Viewer; a placeholder until the first doc is shown since
+        # starting QtWebEngine is the slowest part of startup
         if self.show_docs:
-            self.docview = QWebEngineView(parent=self)
-            self.docview.setAttribute(
-                QtCore.Qt.WidgetAttribute.WA_AcceptTouchEvents, False
-            )
+            self.docview = QtWidgets.QWidget(parent=self)
             self.addWidget(self.docview)
-            # NOTE: No idea why, but we get random segfaults if we don't first set/load
-            # some kind of html before the signal handler takes over ... :shrug:
-            self.docview.setHtml("")
 
         # PipeWindow
         self.pipe_stack = QtWidgets.QStackedWidget(parent=self)
+        self.pipe_stack.currentChanged.connect(self._handle_pipe_changed)
         self.addWidget(self.pipe_stack)
 
     def _calculate_max_text_width(self, tlist):
@@ -146,6 +142,7 @@ class Playground(QtWidgets.QSplitter):
         """
         while self.pipe_stack.count() > 0:
             widget = self.pipe_stack.widget(0)
+            self._stop_stream(widget)
             self.pipe_stack.removeWidget(widget)
             if widget:
                 widget.deleteLater()
@@ -224,19 +221,61 @@ class Playground(QtWidgets.QSplitter):
         window = get_transform_window(transform, self.img_path)
         pipe = Pipeline(window)
         pipe_win = PipeWindow(window, parent=self, show_info_widget=self.show_info_widgets)
+        pipe.set_scheduler(PipelineScheduler(pipe, parent=pipe_win))
+        if hasattr(window.transforms[0], "read_frame"):
+            # Video source; started when its window is shown
+            StreamRunner(pipe)
         img, _ = pipe.run_pipeline()
         pipe_win.update_image(img, pipe_win.viewer)
         self.pipe_stack.addWidget(pipe_win)
         self.added_pipes[transform.__name__] = self.pipe_stack.count() - 1
         self.pipe_stack.setCurrentIndex(self.added_pipes[transform.__name__])
 
+    @Slot(int)
+    def _handle_pipe_changed(self, index):
+        """Only stream video through the pipeline that is displayed"""
+        for i in range(self.pipe_stack.count()):
+            if i != index:
+                self._stop_stream(self.pipe_stack.widget(i))
+        widget = self.pipe_stack.widget(index)
+        stream = widget.window.pipeline.stream if widget is not None else None
+        if stream is not None:
+            stream.start()
+
+    def _stop_stream(self, pipe_win):
+        stream = pipe_win.window.pipeline.stream if pipe_win is not None else None
+        if stream is not None:
+            stream.stop()
+
+    def _get_docview(self):
+        """Return the doc viewer, replacing the placeholder on first use"""
+        from PySide6.QtWebEngineWidgets import QWebEngineView
+
+        if isinstance(self.docview, QWebEngineView):
+            return self.docview
+
+        # No parent; replaceWidget adds it to the splitter in the placeholder's spot
+        docview = QWebEngineView()
+        docview.setAttribute(QtCore.Qt.WidgetAttribute.WA_AcceptTouchEvents, False)
+        # NOTE: No idea why, but we get random segfaults if we don't first set/load
+        # some kind of html before the signal handler takes over ... :shrug:
+        docview.setHtml("")
+        placeholder = self.docview
+        self.replaceWidget(self.indexOf(placeholder), docview)
+        placeholder.deleteLater()
+        self.docview = docview
+        return docview
+
     @Slot(QModelIndex, QModelIndex)
     def _handle_changed(self, current, previous):
+        from docs.doc_writer import RENDERED_DIR, render_local_doc
+
         model = current.model()
         transform = model.items[current.row()]
-        doc_fname = RENDERED_DIR.joinpath(transform.get_doc_filename())
-        url = QUrl.fromLocalFile(str(doc_fname))
-        self.docview.load(url)
+        doc_name = transform.get_doc_filename()
+        render_local_doc(RENDERED_DIR, doc_name)
+        url = QUrl.fromLocalFile(str(RENDERED_DIR.joinpath(doc_name)))
+        self._get_docview().load(url)
 
     def display_image_in_new_window(self, img):
         new_window = QtWidgets.QWidget()
@@ -0,0 +1,365 @@
+"""Dialog that sweeps Params of a transform and shows the outputs in a grid
+
+Opened from the context menu of a transform's group box in a PipeWindow. The
+sweep runs in worker processes (see ``models.sweep``) while results stream
+into the grid; double clicking a thumbnail applies its values to the
+transform. "Optimize" instead searches the checked Params for the best value
+of a metric (see ``models.optimize``) and applies the best values found.
+"""
+import bisect
+import logging
+import math
+import threading
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from models import optimize, params, sweep
+
+from .display import DisplayConverter
+
+log = logging.getLogger(__name__)
+
+# Values swept per Param unless changed in the dialog
+DEFAULT_STEPS = 5
+
+# Objective scored against a mask picked when optimizing
+MASK_IOU = "mask IoU"
+
+
+class SweepDialog(QtWidgets.QDialog):
+    """Sweeps the Params of ``transform`` over a copy of ``pipeline``
+
+    Args:
+        pipeline (Pipeline): Pipeline the transform belongs to
+        transform (BaseTransform): Transform whose Params are swept
+    """
+
+    # Emitted from the sweep's thread with the sweep's cancel event, so
+    # signals still queued from a stopped sweep can be told apart
+    _result_ready = QtCore.Signal(object, object)
+    _sweep_finished = QtCore.Signal(object, str)
+    _optimize_finished = QtCore.Signal(object, object)
+
+    def __init__(self, pipeline, transform, parent=None):
+        super().__init__(parent=parent)
+        self.pipeline = pipeline
+        self.transform = transform
+        self.axes = []
+        # {SweepResult.index: SweepResult} of the current sweep
+        self.results = {}
+        self._indices = []
+        self._total = 0
+        self._cancel_event = None
+        self._converter = DisplayConverter()
+        # {param name: (QCheckBox, QSpinBox)}
+        self._param_rows = {}
+
+        self.setWindowTitle(f"Sweep {transform.__class__.__name__}")
+        self.setLayout(self._build_layout())
+        self._result_ready.connect(self._handle_result)
+        self._sweep_finished.connect(self._handle_finished)
+        self._optimize_finished.connect(self._handle_optimized)
+
+    def _build_layout(self):
+        layout = QtWidgets.QVBoxLayout()
+
+        form = QtWidgets.QFormLayout()
+        for name in sweep.get_sweepable_params(self.transform):
+            param = self.transform._get_param(name)
+            count = len(sweep.get_param_values(param))
+            checkbox = QtWidgets.QCheckBox(param.label)
+            steps = QtWidgets.QSpinBox()
+            steps.setRange(1, count)
+            steps.setValue(min(count, DEFAULT_STEPS))
+            steps.setSuffix(f" of {count} values")
+            checkbox.toggled.connect(self._update_count)
+            steps.valueChanged.connect(self._update_count)
+            form.addRow(checkbox, steps)
+            self._param_rows[name] = (checkbox, steps)
+        layout.addLayout(form)
+
+        self.full_resolution = QtWidgets.QCheckBox("Full resolution")
+        self.full_resolution.setToolTip(
+            "Run at full resolution instead of the preview scale"
+        )
+        self.full_resolution.setVisible(bool(self.pipeline.preview_max_dimension))
+        layout.addWidget(self.full_resolution)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.run_button = QtWidgets.QPushButton("Run")
+        self.run_button.clicked.connect(self.start_sweep)
+        self.stop_button = QtWidgets.QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_sweep)
+        self.stop_button.setEnabled(False)
+        self.optimize_button = QtWidgets.QPushButton("Optimize")
+        self.optimize_button.setToolTip(
+            "Search the checked Params for the best objective and apply it"
+        )
+        self.optimize_button.clicked.connect(self.start_optimize)
+        self.objective = QtWidgets.QComboBox()
+        self.objective.addItems(list(sweep.METRICS) + [MASK_IOU])
+        self.maximize = QtWidgets.QCheckBox("Maximize")
+        self.maximize.setChecked(True)
+        self.save_button = QtWidgets.QPushButton("Save CSV...")
+        self.save_button.clicked.connect(self._save_csv)
+        self.save_button.setEnabled(False)
+        self.status = QtWidgets.QLabel()
+        for widget in (
+            self.run_button,
+            self.optimize_button,
+            self.objective,
+            self.maximize,
+            self.stop_button,
+            self.save_button,
+        ):
+            buttons.addWidget(widget)
+        buttons.addWidget(self.status, 1)
+        layout.addLayout(buttons)
+
+        self.grid = QtWidgets.QListWidget()
+        self.grid.setViewMode(QtWidgets.QListView.IconMode)
+        self.grid.setResizeMode(QtWidgets.QListView.Adjust)
+        self.grid.setMovement(QtWidgets.QListView.Static)
+        self.grid.setIconSize(QtCore.QSize(sweep.THUMBNAIL_SIZE, sweep.THUMBNAIL_SIZE))
+        self.grid.setUniformItemSizes(True)
+        self.grid.setToolTip("Double click to apply the values")
+        self.grid.itemActivated.connect(self._handle_item_activated)
+        layout.addWidget(self.grid, 1)
+
+        self._update_count()
+        return layout
+
+    def get_axes(self):
+        """Return a SweepAxis for every checked Param"""
+        win_index = self.transform.window.index
+        return [
+            sweep.make_axis(
+                self.pipeline, win_index, self.transform.index, name, steps=steps.value()
+            )
+            for name, (checkbox, steps) in self._param_rows.items()
+            if checkbox.isChecked()
+        ]
+
+    def start_sweep(self):
+        """Start sweeping the checked Params, replacing any previous results"""
+        self._start(self._run)
+
+    def start_optimize(self):
+        """Start optimizing the checked Params, replacing any previous results"""
+        objective = self.objective.currentText()
+        if objective == MASK_IOU:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, "Target Mask", "", "Image Files (*.png *.jpg *.bmp *.tif *.tiff)"
+            )
+            if not path:
+                return
+            objective = sweep.MaskIoU(path)
+        self._start(self._run_optimize, objective, self.maximize.isChecked())
+
+    def _start(self, target, *args):
+        """Clear the results and run ``target`` on a thread for the checked Params"""
+        self.stop_sweep()
+        self.axes = self.get_axes()
+        if not self.axes:
+            return
+        self.results = {}
+        self._indices = []
+        self._total = sweep.count_combinations(self.axes)
+        self.grid.clear()
+        self.run_button.setEnabled(False)
+        self.optimize_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.save_button.setEnabled(False)
+        self._update_status()
+
+        max_dimension = None
+        if not self.full_resolution.isChecked():
+            max_dimension = self.pipeline.preview_max_dimension
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=target,
+            args=(self.axes, max_dimension, self._cancel_event) + args,
+            name="sweep",
+            daemon=True,
+        )
+        thread.start()
+
+    def stop_sweep(self):
+        """Stop the running sweep, keeping the results so far"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._handle_finished(self._cancel_event, "stopped")
+
+    def closeEvent(self, event):
+        self.stop_sweep()
+        super().closeEvent(event)
+
+    def _run(self, axes, max_dimension, cancel_event):
+        """Runs the sweep on its own thread, forwarding results to the GUI"""
+        message = ""
+        try:
+            for result in sweep.run_sweep(
+                self.pipeline,
+                axes,
+                max_dimension=max_dimension,
+                output_window=self.transform.window.index,
+                cancel_event=cancel_event,
+            ):
+                if cancel_event.is_set():
+                    break
+                self._result_ready.emit(cancel_event, result)
+        except Exception as e:
+            log.exception(e)
+            message = str(e)
+        self._sweep_finished.emit(cancel_event, message)
+
+    def _run_optimize(self, axes, max_dimension, cancel_event, objective, maximize):
+        """Runs the optimization on its own thread, forwarding results to the GUI"""
+        try:
+            result = optimize.optimize(
+                self.pipeline,
+                axes,
+                objective,
+                maximize=maximize,
+                max_dimension=max_dimension,
+                output_window=self.transform.window.index,
+                cancel_event=cancel_event,
+                callback=lambda result: self._result_ready.emit(cancel_event, result),
+            )
+        except Exception as e:
+            log.exception(e)
+            self._sweep_finished.emit(cancel_event, str(e))
+            return
+        self._optimize_finished.emit(cancel_event, result)
+
+    @QtCore.Slot(object, object)
+    def _handle_result(self, cancel_event, result):
+        """Add a result's thumbnail to the grid, in product order"""
+        if cancel_event is not self._cancel_event:
+            # From a sweep that has been stopped
+            return
+        self.results[result.index] = result
+        position = bisect.bisect(self._indices, result.index)
+        self._indices.insert(position, result.index)
+
+        item = QtWidgets.QListWidgetItem(", ".join(_format(v) for v in result.values))
+        item.setData(QtCore.Qt.UserRole, result.index)
+        lines = [
+            f"{axis.name} = {_format(value)}"
+            for axis, value in zip(self.axes, result.values)
+        ]
+        lines += [f"{name} = {_format(value)}" for name, value in result.metrics.items()]
+        lines.append(f"{result.seconds * 1000:.1f} ms")
+        if result.error is not None:
+            lines.append(f"Error: {result.error}")
+        item.setToolTip("\n".join(lines))
+        if result.thumbnail is not None:
+            qimage = self._converter.to_qimage(result.thumbnail)
+            if qimage is not None:
+                item.setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(qimage)))
+        self.grid.insertItem(position, item)
+        self._update_status()
+
+    @QtCore.Slot(object, str)
+    def _handle_finished(self, cancel_event, message):
+        if cancel_event is not self._cancel_event:
+            return
+        self._cancel_event = None
+        self._update_count()
+        self.stop_button.setEnabled(False)
+        self.save_button.setEnabled(bool(self.results))
+        self._update_status(message)
+
+    @QtCore.Slot(object, object)
+    def _handle_optimized(self, cancel_event, result):
+        """Apply the best values of a finished optimization to the transform"""
+        if cancel_event is not self._cancel_event:
+            return
+        if result.best_values is None:
+            self._handle_finished(cancel_event, "no combination could be scored")
+            return
+        for axis, value in zip(result.axes, result.best_values):
+            _set_param_value(self.transform, axis.name, value)
+        self.transform.start_pipeline()
+        self._handle_finished(
+            cancel_event,
+            f"applied best {_format(result.best_score)} "
+            f"(was {_format(result.initial_score)}), {result.stopped}",
+        )
+
+    def _handle_item_activated(self, item):
+        """Apply the values of the double clicked result to the transform"""
+        result = self.results[item.data(QtCore.Qt.UserRole)]
+        for axis, value in zip(self.axes, result.values):
+            _set_param_value(self.transform, axis.name, value)
+        self.transform.start_pipeline()
+
+    def _save_csv(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save Sweep", "sweep.csv", "CSV Files (*.csv)"
+        )
+        if path:
+            sweep.write_csv(path, self.axes, list(self.results.values()))
+
+    def _update_count(self):
+        counts = [
+            steps.value()
+            for checkbox, steps in self._param_rows.values()
+            if checkbox.isChecked()
+        ]
+        self.run_button.setText(f"Run {math.prod(counts)} combinations" if counts else "Run")
+        self.run_button.setEnabled(bool(counts) and self._cancel_event is None)
+        self.optimize_button.setEnabled(bool(counts) and self._cancel_event is None)
+
+    def _update_status(self, message=""):
+        failed = sum(result.error is not None for result in self.results.values())
+        text = f"{len(self.results)} / {self._total}"
+        if failed:
+            text += f", {failed} failed"
+        if message:
+            text += f": {message}"
+        self.status.setText(text)
+
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def _set_param_value(transform, name, value):
+    """Set Param ``name`` of ``transform`` and show the value in its widget
+
+    The widget's signals are blocked, so it doesn't also store the value and
+    start the pipeline.
+    """
+    sweep.set_param_value(transform, name, value)
+    param = transform._get_param(name)
+    widget = param.widget
+    if widget is None:
+        return
+    if isinstance(param, params.SliderPairParam):
+        top, bot = value
+        for child, child_value in (
+            (widget.slider, top),
+            (widget.value_spinbox, top),
+            (widget.bot_slider, bot),
+        ):
+            child.blockSignals(True)
+            child.setValue(child_value)
+            child.blockSignals(False)
+        widget.bot_slider_text.setText(str(bot))
+    elif isinstance(param, params.BaseSlider):
+        for child in (widget.slider, widget.value_spinbox):
+            child.blockSignals(True)
+            child.setValue(value)
+            child.blockSignals(False)
+    elif isinstance(param, params.ComboBox):
+        labels = {v: k for k, v in param.options_map.items()}
+        widget.blockSignals(True)
+        widget.setCurrentText(str(labels[value]))
+        widget.blockSignals(False)
+    elif isinstance(param, params.CheckBox):
+        widget.blockSignals(True)
+        widget.setChecked(value)
+        widget.blockSignals(False)
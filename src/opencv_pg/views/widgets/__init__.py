@@ -1 +1,13 @@
-from .doc_widget import TransformDocButton
+import importlib
+
+# TransformDocButton pulls in QtWebEngine, so only import it when it's used
+_LAZY_ATTRS = {
+    "TransformDocButton": ".doc_widget",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -1,12 +1,26 @@
 import logging
+import math
 
-from PySide6 import QtCore, QtWidgets
+import cv2
+from PySide6 import QtCore, QtGui, QtWidgets
 from utils.config_manager import config
 
+from ..display import DisplayConverter, to_qimage
+
 log = logging.getLogger(__name__)
 
+# When zoomed in, images set with set_image are uploaded in tiles of this
+# many pixels around the visible part instead of whole
+_TILE_SIZE = 512
+# Pyramid levels stop once their shorter side would be below this
+_MIN_LEVEL_SIZE = 64
+
 
 class ImageViewer(QtWidgets.QGraphicsView):
+    # Emitted with the part of the scene in the viewport after zooming,
+    # panning or setting an image
+    visible_rect_changed = QtCore.Signal(QtCore.QRectF)
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         # Use config setting for touch events
@@ -21,21 +35,95 @@ class ImageViewer(QtWidgets.QGraphicsView):
         self._scene = QtWidgets.QGraphicsScene(self)
         self._img = QtWidgets.QGraphicsPixmapItem()
         self._scene.addItem(self._img)
+        # Up to date region of the image drawn over the stale full image
+        self._roi_img = QtWidgets.QGraphicsPixmapItem()
+        self._roi_img.setVisible(False)
+        self._scene.addItem(self._roi_img)
         self.setScene(self._scene)
+        # Each item keeps its own conversion buffer for set_image
+        self._converter = DisplayConverter()
+        self._roi_converter = DisplayConverter()
+        # Mip pyramid of the image from set_image: level n is 2**n times
+        # smaller than level 0; built as levels are needed
+        self._levels = []
+        # Preview scale of level 0
+        self._levels_scale = 1.0
+        # (level, (x, y, width, height) in level pixels) uploaded to _img
+        self._uploaded = None
 
         self._base_zoom_fac = config.get('ImageViewer', 'base_zoom_factor', 0.002, float)
 
         self._first_time_set = False
         self._current_rect = None
 
-    def setPixmap(self, pixmap, save=True):
+    def setPixmap(self, pixmap, save=True, scale=1.0, roi=None):
+        """Display ``pixmap``
+
+        Args:
+            pixmap (QPixmap): Image to display
+            scale (float, optional): Size of ``pixmap`` relative to the full
+                resolution image. Previews are stretched to the full size so
+                the view doesn't jump when the full resolution image arrives.
+            roi (tuple, optional): (x, y, width, height) of the full image
+                that ``pixmap`` covers. It is drawn over the image displayed
+                last until a full image is set.
+        """
+        if roi is not None:
+            self._roi_img.setPixmap(pixmap)
+            self._roi_img.setPos(roi[0], roi[1])
+            self._roi_img.setVisible(True)
+            return
+        self._levels = []
+        self._uploaded = None
+        self._roi_img.setVisible(False)
         self._img.setPixmap(pixmap)
-        self._current_rect = self.get_visible_rect()
+        self._img.setPos(0, 0)
+        self._img.setScale(1 / scale)
+        self._scene.setSceneRect(
+            0, 0, pixmap.width() / scale, pixmap.height() / scale
+        )
+        self._update_current_rect()
+
+    def set_image(self, img, scale=1.0, roi=None):
+        """Display the np.ndarray ``img``; see ``setPixmap`` for the args
+
+        Unlike ``setPixmap``, only what the view needs is uploaded: zoomed
+        out, a downscaled level of the image no larger than the view's zoom
+        requires; zoomed in, only the tiles around the visible part.
+
+        Returns:
+            bool: False if ``img`` can't be displayed, eg: unsupported dtype
+        """
+        if roi is not None:
+            # Already only the visible part
+            q_img = self._roi_converter.to_qimage(img)
+            if q_img is None:
+                return False
+            self.setPixmap(QtGui.QPixmap.fromImage(q_img), scale=scale, roi=roi)
+            return True
+
+        # Either img or the converter's buffer, which only the next call changes
+        display = self._converter.to_display(img)
+        if display is None:
+            return False
+        self._levels = [display]
+        self._levels_scale = scale
+        self._uploaded = None
+        self._roi_img.setVisible(False)
+        rows, cols = display.shape[:2]
+        self._scene.setSceneRect(0, 0, cols / scale, rows / scale)
+        self._update_current_rect()
+        return True
+
+    def scrollContentsBy(self, dx, dy):
+        """Upload the tiles panned into view"""
+        super().scrollContentsBy(dx, dy)
+        self._refresh_pixmap()
 
     def mouseReleaseEvent(self, event):
         """Store visible rect when done dragging with LMB (panning)"""
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
-            self._current_rect = self.get_visible_rect()
+            self._update_current_rect()
         return super().mouseReleaseEvent(event)
 
     def resizeEvent(self, event):
@@ -57,7 +145,7 @@ class ImageViewer(QtWidgets.QGraphicsView):
             zoom = self._zoom_fac_by_degree_change(degrees)
 
         self._handle_zoom(zoom)
-        self._current_rect = self.get_visible_rect()
+        self._update_current_rect()
         event.accept()
 
     def _is_max_zoomed_out(self):
@@ -107,6 +195,7 @@ class ImageViewer(QtWidgets.QGraphicsView):
         if self._is_max_zoomed_out():
             self.reset_view()
         self.fitInView(self._current_rect, QtCore.Qt.KeepAspectRatio)
+        self._refresh_pixmap()
 
     def contextMenuEvent(self, event):
         """Add a reset view context menu"""
@@ -118,8 +207,60 @@ class ImageViewer(QtWidgets.QGraphicsView):
             self.reset_view()
 
     def reset_view(self):
-        self.fitInView(self._img, QtCore.Qt.KeepAspectRatio)
+        # The scene rect is the whole image even if _img holds only some tiles
+        self.fitInView(self._scene.sceneRect(), QtCore.Qt.KeepAspectRatio)
+        self._update_current_rect()
+
+    def _update_current_rect(self):
         self._current_rect = self.get_visible_rect()
+        self._refresh_pixmap()
+        self.visible_rect_changed.emit(self._current_rect)
+
+    def _refresh_pixmap(self):
+        """Upload the pyramid level and tiles the view needs, if not already"""
+        if not self._levels:
+            return
+        # Level pixels of level 0 per screen pixel
+        zoom = self.transform().m11() / self._levels_scale
+        level = 0
+        while zoom * 2 ** (level + 1) <= 1 and self._can_downscale(level):
+            level += 1
+        img = self._get_level(level)
+        rows, cols = img.shape[:2]
+        # Scene units per level pixel
+        factor = self._scene.sceneRect().width() / cols
+
+        # Visible part, in level pixels
+        visible = self.get_visible_rect()
+        x0 = max(0, int(visible.left() / factor))
+        y0 = max(0, int(visible.top() / factor))
+        x1 = min(cols, math.ceil(visible.right() / factor))
+        y1 = min(rows, math.ceil(visible.bottom() / factor))
+        if self._uploaded is not None and self._uploaded[0] == level:
+            ux, uy, uwidth, uheight = self._uploaded[1]
+            if ux <= x0 and uy <= y0 and x1 <= ux + uwidth and y1 <= uy + uheight:
+                return
+
+        # Whole tiles around the visible part, so small pans don't re-upload
+        x0 = max(0, (x0 // _TILE_SIZE - 1) * _TILE_SIZE)
+        y0 = max(0, (y0 // _TILE_SIZE - 1) * _TILE_SIZE)
+        x1 = min(cols, (math.ceil(x1 / _TILE_SIZE) + 1) * _TILE_SIZE)
+        y1 = min(rows, (math.ceil(y1 / _TILE_SIZE) + 1) * _TILE_SIZE)
+        if x1 <= x0 or y1 <= y0:
+            return
+        self._img.setPixmap(QtGui.QPixmap.fromImage(to_qimage(img[y0:y1, x0:x1])))
+        self._img.setScale(factor)
+        self._img.setPos(x0 * factor, y0 * factor)
+        self._uploaded = (level, (x0, y0, x1 - x0, y1 - y0))
+
+    def _can_downscale(self, level):
+        rows, cols = self._get_level(level).shape[:2]
+        return min(rows, cols) // 2 >= _MIN_LEVEL_SIZE
+
+    def _get_level(self, level):
+        while len(self._levels) <= level:
+            self._levels.append(cv2.pyrDown(self._levels[-1]))
+        return self._levels[level]
 
     def get_visible_rect(self):
         """Return the part of the scene that is visible in the viewport"""
@@ -0,0 +1,70 @@
+"""Shared fixtures
+
+The app imports its packages as top level modules (``models``, ``utils``),
+so its source directory is put on the path like ``main.py`` runs from it.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "opencv_pg")
+)
+
+
+@pytest.fixture
+def image():
+    """A noisy BGR image, so blurs and thresholds change every pixel"""
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    # Add some structure for edge and contour detectors
+    cv2.circle(img, (80, 60), 30, (255, 255, 255), -1)
+    return img
+
+
+@pytest.fixture
+def image_path(tmp_path, image):
+    """``image`` written to a png file"""
+    path = tmp_path / "image.png"
+    cv2.imwrite(str(path), image)
+    return path
+
+
+@pytest.fixture
+def count_draws(monkeypatch):
+    """Return a function that makes a transform count its ``draw`` calls
+
+    Usage::
+
+        calls = count_draws(transform)
+        ...
+        assert calls == [img_in, ...]  # input of every draw
+    """
+
+    def patch(transform):
+        calls = []
+        draw = transform.draw
+
+        def counting_draw(img_in, extra_in):
+            calls.append(img_in)
+            return draw(img_in, extra_in)
+
+        monkeypatch.setattr(transform, "draw", counting_draw)
+        return calls
+
+    return patch
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The QApplication, created offscreen unless a platform is set
+
+    A QApplication rather than a QCoreApplication, so tests that need
+    widgets can run after those that only need an event loop.
+    """
+    QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
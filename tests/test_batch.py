@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+import pytest
+
+import batch
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import GaussianBlur
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    """Three images of the same size and a file that isn't an image"""
+    path = tmp_path / "input"
+    path.mkdir()
+    rng = np.random.default_rng(2)
+    for i in range(3):
+        img = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        cv2.imwrite(str(path / f"img{i}.png"), img)
+    (path / "notes.txt").write_text("not an image")
+    return path
+
+
+def expected_output(img_path):
+    """Output of the builtin GaussianBlur window, run in the GUI's way"""
+    return batch.load_pipeline("GaussianBlur", img_path).run_pipeline()[0]
+
+
+def check_results(results, input_dir, output_dir):
+    results = sorted(results)
+    assert [r.path for r in results] == [
+        str(input_dir / f"img{i}.png") for i in range(3)
+    ]
+    for result in results:
+        assert result.error is None
+        np.testing.assert_array_equal(
+            cv2.imread(result.out_path), expected_output(result.path)
+        )
+    assert sorted(p.name for p in output_dir.iterdir()) == [
+        "img0.png", "img1.png", "img2.png"
+    ]
+
+
+def test_collect_images_skips_other_files(input_dir):
+    assert [p.name for p in batch.collect_images(input_dir)] == [
+        "img0.png", "img1.png", "img2.png"
+    ]
+    assert batch.collect_images(input_dir / "img1.png") == [input_dir / "img1.png"]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_batch_matches_pipeline(input_dir, tmp_path, workers):
+    output_dir = tmp_path / "output"
+
+    results = list(batch.run_batch("GaussianBlur", input_dir, output_dir, workers))
+
+    check_results(results, input_dir, output_dir)
+
+
+def test_run_batch_in_tiles(input_dir, tmp_path):
+    output_dir = tmp_path / "output"
+
+    results = batch.run_batch(
+        "GaussianBlur", input_dir, output_dir, workers=0, tile_size=16
+    )
+
+    check_results(results, input_dir, output_dir)
+
+
+def test_run_batch_in_stacks(input_dir, tmp_path):
+    output_dir = tmp_path / "output"
+
+    results = batch.run_batch(
+        "GaussianBlur", input_dir, output_dir, workers=0, batch_size=2
+    )
+
+    check_results(results, input_dir, output_dir)
+
+
+def test_run_batch_from_spec(input_dir, tmp_path):
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 7
+    spec_path = tmp_path / "blur.json"
+    Pipeline([LoadImage(str(input_dir / "img0.png")), blur]).save(spec_path)
+
+    results = list(
+        batch.run_batch(str(spec_path), input_dir, tmp_path / "output", workers=0)
+    )
+
+    for result in results:
+        expected = cv2.GaussianBlur(cv2.imread(result.path), (7, 7), 1.0)
+        np.testing.assert_array_equal(cv2.imread(result.out_path), expected)
+
+
+def test_failed_image_is_reported(input_dir, tmp_path):
+    (input_dir / "broken.png").write_bytes(b"not a png")
+
+    results = list(
+        batch.run_batch("GaussianBlur", input_dir, tmp_path / "output", workers=0)
+    )
+
+    failed = [r for r in results if r.error is not None]
+    assert [r.path for r in failed] == [str(input_dir / "broken.png")]
+    assert failed[0].out_path is None
+    assert len(results) == 4
+
+
+def test_main_returns_number_of_failures(input_dir, tmp_path, capsys):
+    argv = ["--pipeline", "GaussianBlur", "--input", str(input_dir)]
+    argv += ["--output", str(tmp_path / "output"), "--workers", "0", "--ext", ".bmp"]
+
+    assert batch.main(argv) == 0
+
+    assert "3 images, 0 failed" in capsys.readouterr().out
+    assert (tmp_path / "output" / "img0.bmp").exists()
@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+
+from models import batching
+from models.base_transform import BaseTransform
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import AddWeighted, GaussianBlur, InRangeRaw, Normalize
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(1)
+    return rng.integers(0, 256, (5, 40, 60, 3), dtype=np.uint8)
+
+
+def make_blur():
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 7
+    return blur
+
+
+def make_add_weighted():
+    add_weighted = AddWeighted()
+    add_weighted.beta = 0.5
+    return add_weighted
+
+
+def make_in_range():
+    in_range = InRangeRaw()
+    in_range.ch1 = {"top": 20, "bot": 200}
+    in_range.ch2 = {"top": 0, "bot": 128}
+    in_range.ch3 = {"top": 60, "bot": 255}
+    return in_range
+
+
+def make_transforms():
+    """Per frame and vectorized transforms mixed, so frames change form"""
+    return [make_blur(), make_add_weighted(), Normalize(), make_in_range()]
+
+
+def run_each(transforms, frames):
+    pipeline = Pipeline(transforms)
+    return [pipeline.run_pipeline(img_in=frame)[0] for frame in frames]
+
+
+@pytest.mark.parametrize("as_list", [False, True])
+def test_batch_equals_running_each_frame(frames, as_list):
+    expected = run_each(make_transforms(), frames)
+
+    imgs = list(frames) if as_list else frames
+    out, extras = Pipeline(make_transforms()).run_batch(imgs)
+
+    assert len(out) == len(frames)
+    assert extras == [None] * len(frames)
+    for img, expected_img in zip(out, expected):
+        np.testing.assert_array_equal(img, expected_img)
+
+
+def test_frames_of_different_sizes_are_run_one_by_one(frames):
+    imgs = [frames[0], frames[1, :20], frames[2, :, :30]]
+    expected = run_each(make_transforms(), imgs)
+
+    out, _ = Pipeline(make_transforms()).run_batch(imgs)
+
+    assert isinstance(out, list)
+    for img, expected_img in zip(out, expected):
+        np.testing.assert_array_equal(img, expected_img)
+
+
+def test_small_chunks_give_the_same_output(frames, monkeypatch):
+    expected, _ = Pipeline(make_transforms()).run_batch(frames)
+
+    # Less than a frame, so every frame is its own chunk
+    monkeypatch.setattr(batching, "CHUNK_BYTES", 1000)
+    out, _ = Pipeline(make_transforms()).run_batch(frames)
+
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_flatten_stack_round_trip(frames):
+    flat = batching.flatten_stack(frames)
+
+    assert flat.shape == (5 * 40, 60, 3)
+    assert np.shares_memory(flat, frames)
+    np.testing.assert_array_equal(batching.unflatten_stack(flat, 5), frames)
+
+
+def test_stack_frames():
+    same = [np.zeros((4, 4)), np.ones((4, 4))]
+    assert batching.stack_frames(same).shape == (2, 4, 4)
+    mixed = [np.zeros((4, 4)), np.ones((4, 5))]
+    assert isinstance(batching.stack_frames(mixed), list)
+
+
+class PassExtra(BaseTransform):
+    def draw(self, img_in, extra_in):
+        return img_in, extra_in
+
+
+def test_each_frame_gets_its_extra(frames):
+    extras = [("frame", i) for i in range(len(frames))]
+
+    _, out_extras = Pipeline([make_blur(), PassExtra()]).run_batch(frames, extras)
+
+    assert out_extras == [None] * len(frames)
+
+    _, out_extras = Pipeline([PassExtra(), PassExtra()]).run_batch(frames, extras)
+
+    assert out_extras == extras
+
+
+def test_batch_skips_the_source_and_leaves_its_state(image_path, frames, count_draws):
+    blur = make_blur()
+    pipeline = Pipeline([LoadImage(str(image_path)), blur])
+    last, _ = pipeline.run_pipeline()
+    calls = count_draws(blur)
+
+    out, _ = pipeline.run_batch(frames)
+
+    assert len(out) == len(frames)
+    assert len(calls) == len(frames)
+    assert pipeline.run_pipeline()[0] is last
+
+
+def test_batch_after_preview_is_full_resolution(image_path, frames):
+    pipeline = Pipeline([LoadImage(str(image_path)), make_blur()])
+    pipeline.set_preview_max_dimension(80)
+    pipeline.run_pipeline(preview=True)
+
+    out, _ = pipeline.run_batch(frames)
+
+    expected = run_each([make_blur()], frames)
+    np.testing.assert_array_equal(out, np.stack(expected))
+
+
+def test_batch_after_region_run_is_whole_frames(image_path, frames):
+    pipeline = Pipeline([LoadImage(str(image_path)), make_blur()])
+    pipeline.run_pipeline(region=(10, 10, 40, 40))
+    assert pipeline.roi is not None
+
+    out, _ = pipeline.run_batch(frames)
+
+    expected = run_each([make_blur()], frames)
+    np.testing.assert_array_equal(out, np.stack(expected))
+
+
+def test_wrong_number_of_frames_raises(frames):
+    class DropFrame(BaseTransform):
+        def draw(self, img_in, extra_in):
+            return img_in
+
+        def draw_batch(self, imgs_in, extras_in):
+            return imgs_in[1:], extras_in[1:]
+
+    with pytest.raises(batching.BatchError):
+        Pipeline([DropFrame()]).run_batch(frames)
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pytest
+
+import benchmark
+from benchmark import Case
+
+
+def test_iter_cases():
+    cases = list(
+        benchmark.iter_cases(["GaussianBlur", "Kmeans"], [0.1], ["uint8"], [1, 3])
+    )
+
+    assert cases == [
+        Case("GaussianBlur", 0.1, "uint8", 1),
+        Case("GaussianBlur", 0.1, "uint8", 3),
+        Case("Kmeans", None, None, None),
+    ]
+    assert [case.key for case in cases] == [
+        "GaussianBlur/0.1MP/uint8/1ch", "GaussianBlur/0.1MP/uint8/3ch", "Kmeans"
+    ]
+    with pytest.raises(ValueError):
+        benchmark.takes_image("Nope")
+
+
+@pytest.mark.parametrize(
+    "dtype, channels, shape",
+    [("uint8", 3, (274, 365, 3)), ("float32", 1, (274, 365))],
+)
+def test_make_image(dtype, channels, shape):
+    img = benchmark.make_image(0.1, dtype, channels)
+
+    assert img.shape == shape and img.dtype == dtype
+    assert img.max() <= (1 if dtype == "float32" else 255)
+    np.testing.assert_array_equal(img, benchmark.make_image(0.1, dtype, channels))
+
+
+def make_result(key, median):
+    return {"key": key, "latency": {"median": median}}
+
+
+def test_compare_reports_regressions():
+    baseline = [make_result("a", 0.010), make_result("b", 0.010), make_result("c", 0)]
+    results = [
+        make_result("a", 0.011),
+        make_result("b", 0.015),
+        make_result("c", 0.1),
+        make_result("new", 1),
+    ]
+
+    assert benchmark.compare(results, baseline, 1.2) == [
+        "b: 10.0 ms -> 15.0 ms (1.50x)"
+    ]
+
+
+def test_run_case():
+    pytest.importorskip("PySide6.QtGui")
+
+    result = benchmark.run_case(Case("GaussianBlur", 0.01, "uint8", 3), repeat=2)
+
+    assert result["key"] == "GaussianBlur/0.01MP/uint8/3ch"
+    assert result["runs"] == 2
+    assert result["transforms"][1:] == ["GaussianBlur"]
+    assert result["latency"]["median"] > 0
+    assert list(result["stages"]) == ["GaussianBlur"]
+    assert result["errors"] == []
+
+
+def test_main_compares_against_baseline(tmp_path, capsys):
+    pytest.importorskip("PySide6.QtGui")
+    output = tmp_path / "bench.json"
+    argv = ["--transforms", "GaussianBlur", "--sizes", "0.01", "--dtypes", "uint8"]
+    argv += ["--channels", "1", "--repeat", "1", "--no-isolate"]
+
+    assert benchmark.main(argv + ["--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert [r["key"] for r in report["results"]] == ["GaussianBlur/0.01MP/uint8/1ch"]
+
+    # A baseline 1000 times faster makes the case a regression
+    report["results"][0]["latency"]["median"] /= 1000
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    assert benchmark.main(argv + ["--compare", str(baseline)]) == 1
+    assert "REGRESSION GaussianBlur/0.01MP/uint8/1ch" in capsys.readouterr().err
@@ -0,0 +1,119 @@
+import numpy as np
+
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import Filter2D, GaussianBlur
+
+
+def make_blur():
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 5
+    return blur
+
+
+def test_same_input_reuses_result(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+
+    out, _ = blur._draw(image, None)
+    again, _ = blur._draw(image, None)
+
+    assert len(calls) == 1
+    assert again is out
+
+
+def test_equal_input_reuses_result(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+
+    out, _ = blur._draw(image, None)
+    again, _ = blur._draw(image.copy(), None)
+
+    assert len(calls) == 1
+    assert again is out
+
+
+def test_changed_input_runs_again(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+
+    blur._draw(image, None)
+    out, _ = blur._draw(255 - image, None)
+
+    assert len(calls) == 2
+    np.testing.assert_array_equal(out, make_blur().draw(255 - image, None))
+
+
+def test_param_change_runs_again(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+
+    first, _ = blur._draw(image, None)
+    blur.k_size_x = 9
+    out, _ = blur._draw(image, None)
+
+    assert len(calls) == 2
+    assert not np.array_equal(out, first)
+
+
+def test_array_anchor_is_part_of_the_state(image, count_draws):
+    filter2d = Filter2D()
+    calls = count_draws(filter2d)
+
+    first, _ = filter2d._draw(image, None)
+    filter2d._kernel.anchor = (0, 0)
+    filter2d.dirty = True
+    out, _ = filter2d._draw(image, None)
+
+    assert len(calls) == 2
+    assert not np.array_equal(out, first)
+
+
+def test_uncacheable_transform_runs_for_equal_input(image, count_draws):
+    blur = make_blur()
+    blur.cacheable = False
+    calls = count_draws(blur)
+
+    blur._draw(image, None)
+    blur._draw(image.copy(), None)
+
+    assert len(calls) == 2
+
+
+def test_clear_cache_runs_again(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+
+    blur._draw(image, None)
+    blur.clear_cache()
+    blur._draw(image, None)
+
+    assert len(calls) == 2
+
+
+def test_error_returns_input_and_is_not_cached(image):
+    blur = make_blur()
+    blur.k_size_x = 4  # cv2 needs odd kernel sizes
+
+    out, _ = blur._draw(image, None)
+
+    assert blur.error is not None
+    np.testing.assert_array_equal(out, image)
+
+    blur.k_size_x = 5
+    out, _ = blur._draw(image, None)
+
+    assert blur.error is None
+    np.testing.assert_array_equal(out, make_blur().draw(image, None))
+
+
+def test_pipeline_rerun_reuses_every_result(image_path, count_draws):
+    blur = make_blur()
+    pipeline = Pipeline([LoadImage(str(image_path)), blur])
+    calls = count_draws(blur)
+
+    out, _ = pipeline.run_pipeline()
+    again, _ = pipeline.run_pipeline()
+
+    assert len(calls) == 1
+    assert again is out
@@ -0,0 +1,119 @@
+import numpy as np
+
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import Filter2D, GaussianBlur, MedianBlur
+
+
+def make_blur(k_size=5):
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = k_size
+    return blur
+
+
+def test_clean_transform_skips_param_comparison(image, monkeypatch):
+    blur = make_blur()
+    out, _ = blur._draw(image, None)
+    assert not blur.dirty
+
+    def fail():
+        raise AssertionError("params compared for a clean transform")
+
+    monkeypatch.setattr(blur, "get_params_state", fail)
+    again, _ = blur._draw(image, None)
+
+    assert again is out
+    assert blur.stats.cached
+
+
+def test_setting_a_param_marks_dirty(image):
+    blur = make_blur()
+    blur._draw(image, None)
+
+    blur.k_size_x = blur.k_size_x
+    assert not blur.dirty
+    blur.k_size_x = 9
+    assert blur.dirty
+
+
+def test_param_set_state_runs_again(image, count_draws):
+    blur = make_blur()
+    calls = count_draws(blur)
+    blur._draw(image, None)
+
+    blur._k_size_x.set_state(9)
+    out, _ = blur._draw(image, None)
+
+    assert len(calls) == 2
+    expected = make_blur()
+    expected.k_size_x = 9
+    np.testing.assert_array_equal(out, expected.draw(image, None))
+
+
+def test_array_set_state_runs_again(image, count_draws):
+    filter2d = Filter2D()
+    calls = count_draws(filter2d)
+    filter2d._draw(image, None)
+
+    kernel = np.array([[0, 0, 0], [0, 0, 1], [0, 0, 0]], dtype=float)
+    filter2d._kernel.set_state((kernel, (0, 0)))
+    out, _ = filter2d._draw(image, None)
+
+    assert len(calls) == 2
+    expected = Filter2D()
+    expected._kernel.set_state((kernel, (0, 0)))
+    np.testing.assert_array_equal(out, expected.draw(image, None))
+
+
+def test_param_set_while_taking_the_snapshot_is_not_lost(image, monkeypatch):
+    """A param changed from the GUI thread while a worker thread snapshots the
+    params must leave the transform dirty, and the result, which may have
+    been computed from either value, must not be cached as the old one
+    """
+    blur = make_blur(5)
+    get_params_state = blur.get_params_state
+
+    def get_params_state_then_change():
+        state = get_params_state()
+        blur.k_size_x = blur.k_size_y = 9
+        return state
+
+    monkeypatch.setattr(blur, "get_params_state", get_params_state_then_change)
+    blur._draw(image, None)
+    monkeypatch.undo()
+
+    assert blur.dirty
+    out, _ = blur._draw(image, None)
+    np.testing.assert_array_equal(out, make_blur(9).draw(image, None))
+
+    blur.k_size_x = blur.k_size_y = 5
+    out, _ = blur._draw(image, None)
+    np.testing.assert_array_equal(out, make_blur(5).draw(image, None))
+
+
+def test_change_only_reruns_downstream(image_path, count_draws):
+    first, second = make_blur(), MedianBlur()
+    pipeline = Pipeline([LoadImage(str(image_path)), first, second])
+    first_calls, second_calls = count_draws(first), count_draws(second)
+    pipeline.run_pipeline()
+
+    second.k_size = 3
+    pipeline.run_pipeline(0, 2)
+    assert (len(first_calls), len(second_calls)) == (1, 2)
+
+    first.k_size_x = 9
+    pipeline.run_pipeline(0, 1)
+    assert (len(first_calls), len(second_calls)) == (2, 3)
+
+
+def test_output_generation_only_changes_with_output(image):
+    blur = make_blur()
+    blur._draw(image, None)
+    generation = blur.output_generation
+
+    blur._draw(image, None)
+    assert blur.output_generation == generation
+
+    blur.k_size_x = 9
+    blur._draw(image, None)
+    assert blur.output_generation == generation + 1
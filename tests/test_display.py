@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("PySide6.QtGui")
+
+from views import display  # noqa: E402
+from views.display import DisplayConverter  # noqa: E402
+
+
+def test_uint8_is_shown_without_a_copy(image):
+    converter = DisplayConverter(display.NORMALIZE_FIXED)
+
+    assert converter.to_display(image) is image
+
+    crop = converter.to_display(image[::2, ::2])
+    np.testing.assert_array_equal(crop, image[::2, ::2])
+    assert crop.flags.c_contiguous
+
+
+@pytest.mark.parametrize(
+    "img, expected",
+    [
+        (np.array([[0, 255, 256, 65535]], dtype=np.uint16), [[0, 0, 1, 255]]),
+        (np.array([[-512, 0, 512, 70000]], dtype=np.int32), [[0, 0, 2, 255]]),
+        (np.array([[-1.0, 0.0, 0.5, 2.0]], dtype=np.float32), [[0, 0, 128, 255]]),
+        (np.array([[-5, 0, 5, 127]], dtype=np.int8), [[0, 0, 5, 127]]),
+    ],
+)
+def test_fixed_scaling_saturates_like_imshow(img, expected):
+    converter = DisplayConverter(display.NORMALIZE_FIXED)
+
+    out = converter.to_display(img)
+
+    assert out.dtype == np.uint8
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_minmax_stretches_to_full_range():
+    converter = DisplayConverter(display.NORMALIZE_MINMAX)
+    img = np.array([[-100, 0, 155]], dtype=np.int16)
+
+    np.testing.assert_array_equal(converter.to_display(img), [[0, 100, 255]])
+
+    # Nothing to stretch in a flat image
+    flat = np.full((2, 2), 0.5, dtype=np.float32)
+    np.testing.assert_array_equal(converter.to_display(flat), np.full((2, 2), 128))
+
+
+def test_percentile_ignores_outliers():
+    converter = DisplayConverter(display.NORMALIZE_PERCENTILE)
+    img = np.tile(np.linspace(0, 1, 100, dtype=np.float32), (100, 1))
+    img[0, 0] = 1000
+
+    out = converter.to_display(img)
+
+    assert out[0, 0] == 255
+    assert out[50, 0] == 0 and out[50, 99] == 255
+    assert 100 < out[50, 50] < 155
+
+
+def test_buffer_is_reused():
+    converter = DisplayConverter(display.NORMALIZE_FIXED)
+    img = np.zeros((10, 20, 3), dtype=np.float32)
+
+    first = converter.to_display(img)
+    second = converter.to_display(img + 1)
+
+    assert second is first
+    assert (second == 255).all()
+
+
+def test_channels(image):
+    converter = DisplayConverter(display.NORMALIZE_FIXED)
+    bgra = np.dstack([image, np.zeros(image.shape[:2], dtype=np.uint8)])
+
+    np.testing.assert_array_equal(converter.to_display(bgra), image)
+    np.testing.assert_array_equal(
+        converter.to_display(image[..., :1]), image[..., 0]
+    )
+    assert converter.to_display(image[..., :2]) is None
+    assert converter.to_display(image.astype(np.int64)) is None
+
+
+def test_to_qimage(image):
+    qimage = DisplayConverter(display.NORMALIZE_FIXED).to_qimage(image)
+
+    assert (qimage.width(), qimage.height()) == (160, 120)
+    assert qimage.pixelColor(80, 60).getRgb()[:3] == (255, 255, 255)
+    b, g, r = image[0, 0]
+    assert qimage.pixelColor(0, 0).getRgb()[:3] == (r, g, b)
+
+
+def test_unknown_normalization_falls_back_to_fixed():
+    assert DisplayConverter("nope").normalization == display.NORMALIZE_FIXED
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from models.base_transform import BaseTransform
+from models.frames import Contours, as_point_set, freeze_extra, readonly_view
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+
+
+class PassThrough(BaseTransform):
+    def draw(self, img_in, extra_in):
+        return img_in
+
+
+class WriteInPlace(BaseTransform):
+    def draw(self, img_in, extra_in):
+        img_in[:10] = 0
+        return img_in
+
+
+class WriteInPlaceCopy(WriteInPlace):
+    mutates_input = True
+
+
+def test_readonly_view_shares_memory(image):
+    view = readonly_view(image)
+
+    assert np.shares_memory(view, image)
+    assert not view.flags.writeable
+    assert image.flags.writeable
+    assert readonly_view(view) is view
+    assert readonly_view(None) is None
+
+
+def test_images_are_handed_on_without_copies(image_path):
+    load = LoadImage(str(image_path))
+    pipeline = Pipeline([load, PassThrough(), PassThrough()])
+
+    out, _ = pipeline.run_pipeline()
+
+    assert np.shares_memory(out, load.img)
+    assert not out.flags.writeable
+
+
+def test_writing_into_input_raises_instead_of_corrupting(image_path):
+    load = LoadImage(str(image_path))
+    writer = WriteInPlace()
+    pipeline = Pipeline([load, writer])
+    original = load.img.copy()
+
+    pipeline.run_pipeline()
+
+    assert writer.error is not None
+    np.testing.assert_array_equal(load.img, original)
+
+
+def test_mutating_transform_gets_a_copy(image_path):
+    load = LoadImage(str(image_path))
+    writer = WriteInPlaceCopy()
+    pipeline = Pipeline([load, writer])
+    original = load.img.copy()
+
+    out, _ = pipeline.run_pipeline()
+
+    assert writer.error is None
+    assert (out[:10] == 0).all()
+    np.testing.assert_array_equal(load.img, original)
+
+
+@pytest.mark.parametrize("mutates_input", [False, True])
+def test_apply_protects_its_input(image, mutates_input):
+    writer = WriteInPlaceCopy() if mutates_input else WriteInPlace()
+    original = image.copy()
+
+    if mutates_input:
+        out, _ = writer.apply(image)
+        assert (out[:10] == 0).all()
+    else:
+        with pytest.raises(ValueError):
+            writer.apply(image)
+    np.testing.assert_array_equal(image, original)
+
+
+def make_contours():
+    return [
+        np.array([[[0, 0]], [[0, 5]], [[5, 5]]], dtype=np.int32),
+        np.array([[[10, 10]], [[12, 10]]], dtype=np.int32),
+    ]
+
+
+def test_contours_pack_into_one_read_only_array():
+    contours = Contours(make_contours())
+
+    assert len(contours) == 2
+    assert contours[0].shape == (3, 1, 2)
+    assert contours.points.shape == (5, 2)
+    assert list(contours.offsets) == [0, 3, 5]
+    for cont, expected in zip(contours, make_contours()):
+        np.testing.assert_array_equal(cont, expected)
+        assert np.shares_memory(cont, contours.points)
+        assert not cont.flags.writeable
+
+
+def test_freeze_extra():
+    contours = freeze_extra(make_contours())
+    assert isinstance(contours, Contours)
+    assert freeze_extra(contours) is contours
+
+    frozen = freeze_extra([np.zeros(3), [1, np.ones(2)], "text"])
+    assert isinstance(frozen, tuple)
+    assert not frozen[0].flags.writeable
+    assert frozen[1][0] == 1 and not frozen[1][1].flags.writeable
+    assert frozen[2] == "text"
+    assert freeze_extra(None) is None
+
+
+def test_as_point_set_only_copies_when_needed():
+    points = np.zeros((4, 2), dtype=np.float32)
+    assert np.shares_memory(as_point_set(points), points)
+
+    converted = as_point_set(np.zeros((4, 1, 2), dtype=np.int32))
+    assert converted.dtype == np.float32
+    assert not converted.flags.writeable
+
+
+class ReturnContours(BaseTransform):
+    def draw(self, img_in, extra_in):
+        return img_in, make_contours()
+
+
+class PassExtra(BaseTransform):
+    def draw(self, img_in, extra_in):
+        return img_in, extra_in
+
+
+def test_extras_are_passed_on_by_reference(image_path):
+    first, second = ReturnContours(), PassExtra()
+    pipeline = Pipeline([LoadImage(str(image_path)), first, second, PassExtra()])
+
+    _, extra = pipeline.run_pipeline()
+
+    assert isinstance(extra, Contours)
+    assert second.extra_in is extra
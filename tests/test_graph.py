@@ -0,0 +1,162 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from models.base_transform import BaseTransform
+from models.graph import GraphError, GraphPipeline
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import AddWeighted, GaussianBlur, MedianBlur
+from models.window import PipelineCancelled
+
+
+class InvertWithOriginal(BaseTransform):
+    """Returns the inverted image, and the original as its extra"""
+
+    def draw(self, img_in, extra_in):
+        return 255 - img_in, img_in
+
+
+def make_blur():
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 9
+    return blur
+
+
+def make_add_weighted():
+    add_weighted = AddWeighted()
+    add_weighted.beta = 0.5
+    return add_weighted
+
+
+def blend(img, img2):
+    return cv2.addWeighted(img, 1.0, img2, 0.5, 0)
+
+
+def flip_blend(img):
+    """What AddWeighted blends with when image2 isn't wired"""
+    return blend(img, img[np.arange(img.shape[0]) * -1])
+
+
+@pytest.fixture
+def graph(image_path):
+    """load -> blur -> blend(image2) and load -> median -> blend(image)"""
+    graph = GraphPipeline()
+    graph.add("load", LoadImage(str(image_path)))
+    graph.add("blur", make_blur(), image="load")
+    graph.add("median", MedianBlur(), image="load")
+    graph.add("blend", make_add_weighted(), image="median", image2="blur")
+    return graph
+
+
+def test_wired_image2_is_blended(graph, image):
+    outputs = graph.run_pipeline()
+
+    expected = blend(cv2.medianBlur(image, 11), make_blur().draw(image, None))
+    np.testing.assert_array_equal(outputs["blend"]["image"], expected)
+
+
+def test_unwired_image2_blends_flipped_image(image_path, image):
+    graph = GraphPipeline()
+    graph.add("load", LoadImage(str(image_path)))
+    graph.add("blend", make_add_weighted(), image="load")
+
+    outputs = graph.run_pipeline()
+
+    np.testing.assert_array_equal(outputs["blend"]["image"], flip_blend(image))
+
+
+def test_chained_extra_is_not_image2(image_path, image):
+    """A linear pipeline passes on whatever extra it gets; an image of the
+    right size must not be taken for a second image
+    """
+    expected = flip_blend(255 - image)
+
+    pipeline = Pipeline(
+        [LoadImage(str(image_path)), InvertWithOriginal(), make_add_weighted()]
+    )
+    out, _ = pipeline.run_pipeline()
+    np.testing.assert_array_equal(out, expected)
+
+    out, _ = pipeline.run_batch(np.stack([image, image]))
+    np.testing.assert_array_equal(out, np.stack([expected, expected]))
+
+    outputs = GraphPipeline.from_pipeline(pipeline).run_pipeline()
+    np.testing.assert_array_equal(outputs["0-2"]["image"], expected)
+
+
+def test_wired_image2_is_blended_in_batches(graph, image):
+    add_weighted = graph.nodes["blend"].transform
+    imgs = np.stack([image, 255 - image])
+    imgs2 = np.stack([image[::-1], image])
+
+    out, _ = add_weighted.apply_batch(imgs, list(imgs2))
+
+    for img, img2, out_img in zip(imgs, imgs2, out):
+        np.testing.assert_array_equal(out_img, blend(img, img2))
+
+    # Frames without a second image are blended with themselves flipped
+    out, _ = add_weighted.apply_batch(imgs, [imgs2[0], None])
+    np.testing.assert_array_equal(out[0], blend(imgs[0], imgs2[0]))
+    np.testing.assert_array_equal(out[1], flip_blend(imgs[1]))
+
+
+def test_only_changed_node_and_its_consumers_run(graph, count_draws):
+    graph.run_pipeline()
+    calls = {name: count_draws(node.transform) for name, node in graph.nodes.items()}
+
+    graph.run_pipeline()
+    assert {name: len(c) for name, c in calls.items()} == {
+        "load": 0, "blur": 0, "median": 0, "blend": 0
+    }
+
+    graph.nodes["blur"].transform.k_size_x = 5
+    graph.request_run("blur")
+    assert {name: len(c) for name, c in calls.items()} == {
+        "load": 0, "blur": 1, "median": 0, "blend": 1
+    }
+
+
+def test_unchanged_output_stops_propagation(graph, count_draws):
+    graph.run_pipeline()
+    blend_calls = count_draws(graph.nodes["blend"].transform)
+
+    # Runs again, but its result comes from the cache as the same object
+    graph.mark_dirty("blur")
+    graph.run_pipeline()
+
+    assert blend_calls == []
+
+
+def test_from_pipeline_matches_pipeline(image_path):
+    pipeline = Pipeline([LoadImage(str(image_path)), make_blur(), MedianBlur()])
+    expected, _ = pipeline.run_pipeline()
+    pipeline.clear_cache()
+
+    outputs = GraphPipeline.from_pipeline(pipeline).run_pipeline()
+
+    assert list(outputs) == ["0-0", "0-1", "0-2"]
+    np.testing.assert_array_equal(outputs["0-2"]["image"], expected)
+
+
+def test_cycles_and_bad_ports_are_refused(graph):
+    with pytest.raises(GraphError):
+        graph.connect("blur", "image", "blend")
+    assert graph.nodes["blur"].inputs["image"] == ("load", "image")
+
+    with pytest.raises(GraphError):
+        graph.add("bad", MedianBlur(), mask="load")
+    with pytest.raises(GraphError):
+        graph.add("blur", MedianBlur(), image="load")
+
+
+def test_cancelled_run_leaves_nodes_dirty(graph):
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    with pytest.raises(PipelineCancelled):
+        graph.run_pipeline(cancel_event=cancel_event)
+
+    assert all(node.dirty for node in graph.nodes.values())
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+from models.signals import Signal
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "opencv_pg")
+
+
+def test_models_run_without_qt(image_path):
+    """Importing PySide6 or jinja2 raises ImportError in the child process"""
+    script = textwrap.dedent(
+        f"""
+        import sys
+        sys.modules["PySide6"] = None
+        sys.modules["jinja2"] = None
+
+        import batch
+        from models.transform_windows import _TRANS_WINDOWS
+
+        for transform in _TRANS_WINDOWS:
+            pipeline = batch.load_pipeline(transform.__name__, {str(image_path)!r})
+            pipeline.run_pipeline()
+        print("ran", len(_TRANS_WINDOWS))
+        """
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("ran ")
+
+
+def test_signal_calls_callbacks_on_emitting_thread():
+    signal = Signal()
+    calls = []
+
+    def callback(*args):
+        calls.append((args, threading.current_thread()))
+
+    signal.connect(callback)
+    thread = threading.Thread(target=signal.emit, args=(1, "a"))
+    thread.start()
+    thread.join()
+
+    assert calls == [((1, "a"), thread)]
+
+    signal.disconnect(callback)
+    signal.emit(2)
+    assert len(calls) == 1
@@ -0,0 +1,102 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from models import image_cache
+from models.image_cache import ImageCache
+from models.support_transforms import LoadImage
+
+
+class CountingReader:
+    """Stands in for cv2.imread, returning a 100 byte image and recording the
+    paths read
+    """
+
+    def __init__(self):
+        self.paths = []
+
+    def __call__(self, path):
+        self.paths.append(path)
+        return np.zeros((10, 10), dtype=np.uint8)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = []
+    for name in "abcd":
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    return paths
+
+
+def test_hit_returns_the_same_read_only_image(paths):
+    cache, read = ImageCache(1000), CountingReader()
+
+    first = cache.get(paths[0], read)
+    second = cache.get(paths[0], read)
+
+    assert second is first
+    assert not first.flags.writeable
+    assert read.paths == [paths[0]]
+    assert cache.nbytes == 100 and len(cache) == 1
+
+
+def test_least_recently_used_is_evicted_by_bytes(paths):
+    cache, read = ImageCache(300), CountingReader()
+    for path in paths[:3]:
+        cache.get(path, read)
+
+    # Using a makes b the least recently used
+    cache.get(paths[0], read)
+    cache.get(paths[3], read)
+
+    assert len(cache) == 3 and cache.nbytes == 300
+    read.paths.clear()
+    for path in (paths[0], paths[2], paths[3]):
+        cache.get(path, read)
+    assert read.paths == []
+    cache.get(paths[1], read)
+    assert read.paths == [paths[1]]
+
+
+def test_changed_file_is_read_again(paths):
+    cache, read = ImageCache(1000), CountingReader()
+    cache.get(paths[0], read)
+
+    with open(paths[0], "ab") as fp:
+        fp.write(b"more")
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cache.get(paths[0], read)
+
+    assert read.paths == [paths[0], paths[0]]
+
+
+def test_oversized_and_unreadable_images_are_not_cached(paths):
+    cache, read = ImageCache(50), CountingReader()
+
+    img = cache.get(paths[0], read)
+    assert img.shape == (10, 10) and not img.flags.writeable
+    assert cache.get(paths[1], lambda path: None) is None
+
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_loaders_of_the_same_file_share_its_image(image_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "_cache", ImageCache(10 ** 7))
+    reads = []
+    cv2_imread = cv2.imread
+
+    def imread(path):
+        reads.append(path)
+        return cv2_imread(path)
+
+    monkeypatch.setattr(cv2, "imread", imread)
+
+    first, second = LoadImage(str(image_path)), LoadImage(str(image_path))
+
+    assert second.img is first.img
+    assert reads == [str(image_path)]
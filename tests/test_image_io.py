@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+import pytest
+
+from models import image_io
+from models.image_io import MemmapError, open_memmap
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage, MemmapImage
+from models.transforms import GaussianBlur
+
+
+def write_tiff(path, img, compression=1):
+    cv2.imwrite(str(path), img, [cv2.IMWRITE_TIFF_COMPRESSION, compression])
+    return path
+
+
+def test_npy_is_mapped(tmp_path, image):
+    path = tmp_path / "image.npy"
+    np.save(path, image)
+
+    img = open_memmap(path)
+
+    assert isinstance(img, np.memmap)
+    assert not img.flags.writeable
+    np.testing.assert_array_equal(img, image)
+
+
+def test_raw_file_is_mapped(tmp_path, image):
+    path = tmp_path / "image.raw"
+    path.write_bytes(b"header" + image.astype("<u2").tobytes())
+
+    img = open_memmap(path, shape=image.shape, dtype="<u2", offset=6)
+
+    assert img.dtype == np.uint16
+    np.testing.assert_array_equal(img, image)
+    with pytest.raises(MemmapError):
+        open_memmap(path)
+
+
+@pytest.mark.parametrize("gray", [False, True])
+def test_uncompressed_tiff_matches_imread(tmp_path, image, gray):
+    if gray:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    path = write_tiff(tmp_path / "image.tif", image)
+
+    img = open_memmap(path)
+
+    assert isinstance(img, np.memmap)
+    np.testing.assert_array_equal(img, image)
+
+
+def test_compressed_tiff_falls_back_to_imread(tmp_path, image):
+    path = write_tiff(tmp_path / "image.tif", image, compression=5)  # LZW
+
+    with pytest.raises(MemmapError):
+        open_memmap(path)
+    np.testing.assert_array_equal(image_io.read_image(path), image)
+
+
+def test_not_an_image_is_refused(tmp_path):
+    path = tmp_path / "data.npy"
+    np.save(path, np.zeros(10))
+
+    with pytest.raises(MemmapError):
+        open_memmap(path)
+
+
+def make_pipeline(source):
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 7
+    return Pipeline([source, blur])
+
+
+def test_memmap_image_matches_load_image(tmp_path, image_path, image):
+    path = tmp_path / "image.npy"
+    np.save(path, image)
+    expected, _ = make_pipeline(LoadImage(str(image_path))).run_pipeline()
+    pipeline = make_pipeline(MemmapImage(str(path)))
+
+    out, _ = pipeline.run_pipeline()
+    np.testing.assert_array_equal(out, expected)
+
+    # Region runs only read the crop of the mapped file
+    pipeline.windows[0].visible_rect = (40, 30, 50, 40)
+    region_out, _ = pipeline.run_pipeline(region=pipeline.get_visible_rect())
+    x, y, _, _ = pipeline.roi
+    np.testing.assert_array_equal(
+        region_out[30 - y : 70 - y, 40 - x : 90 - x], expected[30:70, 40:90]
+    )
+
+
+def test_memmap_image_preview(tmp_path, image):
+    path = tmp_path / "image.npy"
+    np.save(path, image)
+    pipeline = make_pipeline(MemmapImage(str(path)))
+    pipeline.set_preview_max_dimension(40)
+
+    out, _ = pipeline.run_pipeline(preview=True)
+
+    assert out.shape == (30, 40, 3)
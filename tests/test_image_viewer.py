@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+from views.widgets import image_viewer  # noqa: E402
+from views.widgets.image_viewer import ImageViewer  # noqa: E402
+
+
+@pytest.fixture
+def viewer(app):
+    viewer = ImageViewer()
+    viewer.resize(400, 300)
+    viewer.show()
+    yield viewer
+    viewer.close()
+
+
+@pytest.fixture
+def big_image():
+    rng = np.random.default_rng(3)
+    return rng.integers(0, 256, (1800, 2400, 3), dtype=np.uint8)
+
+
+def uploaded_size(viewer):
+    pixmap = viewer._img.pixmap()
+    return pixmap.width(), pixmap.height()
+
+
+def test_fitted_image_uploads_a_downscaled_level(viewer, big_image):
+    viewer.set_image(big_image)
+    viewer.reset_view()
+
+    level, (x, y, width, height) = viewer._uploaded
+    # About 400 / 2400 of the size, so every level down to a sixth fits
+    assert level == 2
+    assert (x, y) == (0, 0)
+    assert uploaded_size(viewer) == (width, height) == (600, 450)
+    assert viewer._scene.sceneRect() == QtCore.QRectF(0, 0, 2400, 1800)
+
+
+def test_zoomed_in_image_uploads_visible_tiles(viewer, big_image):
+    viewer.set_image(big_image)
+    viewer.resetTransform()
+    viewer.scale(4, 4)
+    viewer.centerOn(1200, 900)
+    viewer._refresh_pixmap()
+
+    level, (x, y, width, height) = viewer._uploaded
+    assert level == 0
+    visible = viewer.get_visible_rect()
+    assert x <= visible.left() and visible.right() <= x + width
+    assert y <= visible.top() and visible.bottom() <= y + height
+    assert x % image_viewer._TILE_SIZE == 0 and y % image_viewer._TILE_SIZE == 0
+    assert width < 2400 and height < 1800
+    assert uploaded_size(viewer) == (width, height)
+
+    # Panning within the uploaded tiles doesn't upload again
+    uploaded = viewer._uploaded
+    pixmap_key = viewer._img.pixmap().cacheKey()
+    viewer.centerOn(1210, 905)
+    viewer._refresh_pixmap()
+    assert viewer._uploaded == uploaded
+    assert viewer._img.pixmap().cacheKey() == pixmap_key
+
+
+def test_uploaded_pixels_match_the_image(viewer, image):
+    viewer.set_image(image)
+    viewer.resetTransform()
+    viewer._refresh_pixmap()
+
+    assert viewer._uploaded == (0, (0, 0, 160, 120))
+    qimage = viewer._img.pixmap().toImage()
+    b, g, r = image[5, 7]
+    assert qimage.pixelColor(7, 5).getRgb()[:3] == (r, g, b)
+
+
+def test_preview_is_stretched_to_full_size(viewer, big_image):
+    viewer.set_image(big_image[::2, ::2], scale=0.5)
+    viewer.reset_view()
+
+    assert viewer._scene.sceneRect() == QtCore.QRectF(0, 0, 2400, 1800)
+    level, _ = viewer._uploaded
+    assert level == 1
+
+
+def test_region_is_drawn_over_the_image(viewer, big_image):
+    viewer.set_image(big_image)
+
+    assert viewer.set_image(big_image[100:200, 300:500], roi=(300, 100, 200, 100))
+
+    assert viewer._roi_img.isVisible()
+    assert viewer._roi_img.pos() == QtCore.QPointF(300, 100)
+    assert viewer._roi_img.pixmap().width() == 200
+
+    viewer.set_image(big_image)
+    assert not viewer._roi_img.isVisible()
+
+
+def test_unsupported_image_is_refused(viewer):
+    assert not viewer.set_image(np.zeros((4, 4), dtype=np.int64))
@@ -0,0 +1,151 @@
+import csv
+
+import pytest
+
+from models import optimize, sweep
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import Canny, GaussianBlur, InRangeRaw
+
+
+def make_pipeline(image_path):
+    return Pipeline([LoadImage(str(image_path)), GaussianBlur(), Canny()])
+
+
+def make_axes(pipeline):
+    return [
+        sweep.parse_axis(pipeline, "0.1.k_size_x=1,5,9"),
+        sweep.parse_axis(pipeline, "0.2.threshold1=0,100,200,300"),
+    ]
+
+
+def sweep_scores(pipeline, axes, objective="nonzero"):
+    """{values: score} of every combination of ``axes``"""
+    results = sweep.run_sweep(
+        pipeline, axes, metrics=[objective], workers=0, thumbnail_size=None
+    )
+    return {r.values: r.metrics[objective] for r in results}
+
+
+def make_in_range_pipeline(image_path):
+    return Pipeline([LoadImage(str(image_path)), InRangeRaw()])
+
+
+@pytest.mark.parametrize("maximize", [True, False])
+def test_coordinate_descent_finds_best_of_one_axis(image_path, maximize):
+    pipeline = make_pipeline(image_path)
+    axes = make_axes(pipeline)[1:]
+    scores = sweep_scores(pipeline, axes)
+
+    result = optimize.optimize(
+        pipeline, axes, "nonzero", maximize=maximize, workers=0
+    )
+
+    best = max(scores.values()) if maximize else min(scores.values())
+    assert result.best_score == best
+    assert scores[result.best_values] == best
+    assert result.stopped == optimize.CONVERGED
+    # Each value once, plus the initial threshold of 0
+    assert result.evaluations == 4
+    assert result.initial_score == scores[(0,)]
+
+
+def test_pipeline_is_left_untouched(image_path):
+    pipeline = make_pipeline(image_path)
+    pipeline_spec = pipeline.to_spec()
+
+    result = optimize.optimize(pipeline, make_axes(pipeline), "nonzero", workers=0)
+
+    assert pipeline.to_spec() == pipeline_spec
+    sweep.apply_values(pipeline, result.axes, result.best_values)
+    img, extra = pipeline.run_pipeline()
+    assert sweep.METRICS["nonzero"](img, extra) == result.best_score
+
+
+def test_random_search_exhausts_small_spaces(image_path):
+    pipeline = make_pipeline(image_path)
+    axes = make_axes(pipeline)
+    scores = sweep_scores(pipeline, axes)
+
+    result = optimize.optimize(
+        pipeline, axes, "nonzero", method=optimize.RANDOM, patience=100, workers=0, seed=1
+    )
+
+    assert result.stopped == optimize.EXHAUSTED
+    assert sorted(r.values for r in result.history) == sorted(scores)
+    assert result.best_score == max(scores.values())
+
+
+def test_random_search_is_seeded(image_path):
+    pipeline = make_pipeline(image_path)
+    axes = make_axes(pipeline)
+
+    runs = [
+        optimize.optimize(
+            pipeline, axes, "nonzero", method=optimize.RANDOM, max_evaluations=5,
+            workers=0, seed=7,
+        )
+        for _ in range(2)
+    ]
+
+    assert [r.values for r in runs[0].history] == [r.values for r in runs[1].history]
+    assert runs[0].stopped == optimize.MAX_EVALUATIONS
+    assert runs[0].evaluations == 5
+
+
+def test_goal_stops_the_search(image_path):
+    pipeline = make_in_range_pipeline(image_path)
+    target = InRangeRaw()
+    target.ch1, target.ch3 = {"top": 0, "bot": 128}, {"top": 128, "bot": 255}
+    mask, _ = Pipeline([LoadImage(str(image_path)), target]).run_pipeline()
+    axes = [sweep.parse_axis(pipeline, f"0.1.{name}", steps=3) for name in ("ch1", "ch3")]
+    evaluated = []
+
+    result = optimize.optimize(
+        pipeline, axes, sweep.MaskIoU(mask), goal=1.0, workers=0,
+        callback=evaluated.append,
+    )
+
+    assert result.stopped == optimize.GOAL
+    assert result.best_values == ((0, 128), (128, 255))
+    assert result.best_score == 1.0
+    assert evaluated == result.history
+    assert result.evaluations < sweep.count_combinations(axes)
+
+
+def test_failed_evaluations_are_not_scored(image_path):
+    pipeline = make_pipeline(image_path)
+    axes = [sweep.make_axis(pipeline, 0, 2, "aperture_size", values=[4, 5])]
+
+    result = optimize.optimize(pipeline, axes, "nonzero", workers=0)
+
+    assert result.best_values == (5,)
+    assert result.initial_score is None
+    assert any(r.error for r in result.history)
+
+
+def test_current_values_snap_to_the_axis(image_path):
+    pipeline = make_pipeline(image_path)
+    pipeline.get_transform(0, 2).threshold1 = 140
+    axes = make_axes(pipeline)
+
+    assert optimize.get_current_values(pipeline, axes) == (1, 100)
+
+    with pytest.raises(ValueError):
+        optimize.optimize(pipeline, axes, "nonzero", method="nope", workers=0)
+
+
+def test_optimize_cli(tmp_path, image_path):
+    import optimize as optimize_cli
+
+    output, history = tmp_path / "tuned.json", tmp_path / "history.csv"
+    argv = ["--pipeline", "Canny", "--image", str(image_path), "--workers", "0"]
+    argv += ["--axis", "0.1.threshold1=0,100,200", "--objective", "nonzero"]
+    argv += ["--minimize", "--output", str(output), "--csv", str(history)]
+
+    assert optimize_cli.main(argv) == 0
+
+    tuned = Pipeline.load(output, image_path=image_path)
+    assert tuned.get_transform(0, 1).threshold1 == 200
+    with open(history, newline="") as f:
+        assert len(list(csv.reader(f))) == 4
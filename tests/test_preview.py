@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import GaussianBlur, Normalize
+
+
+def make_pipeline(image_path, *transforms):
+    pipeline = Pipeline([LoadImage(str(image_path)), *transforms])
+    # The test image is 120 x 160, so previews are rendered at half size
+    pipeline.set_preview_max_dimension(80)
+    return pipeline
+
+
+def make_blur():
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 9
+    return blur
+
+
+def test_preview_scale(image_path):
+    pipeline = make_pipeline(image_path, make_blur())
+    assert pipeline.get_source_size() == (120, 160)
+    assert pipeline.get_preview_scale() == 0.5
+
+    pipeline.set_preview_max_dimension(None)
+    assert pipeline.get_preview_scale() == 1.0
+    pipeline.set_preview_max_dimension(1000)
+    assert pipeline.get_preview_scale() == 1.0
+
+
+def test_preview_run_scales_image_and_params(image_path):
+    blur = make_blur()
+    pipeline = make_pipeline(image_path, blur)
+
+    out, _ = pipeline.run_pipeline(preview=True)
+
+    assert out.shape == (60, 80, 3)
+    assert blur.preview_scale == 0.5
+    # Kernel sizes stay odd
+    assert (blur.k_size_x, blur._k_size_x.get_value()) == (5, 9)
+
+
+def test_full_run_after_preview_matches_fresh_run(image_path):
+    pipeline = make_pipeline(image_path, make_blur())
+    pipeline.run_pipeline(preview=True)
+
+    out, _ = pipeline.run_pipeline(0, 1)
+
+    expected, _ = make_pipeline(image_path, make_blur()).run_pipeline()
+    assert out.shape == (120, 160, 3)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_preview_and_full_results_are_cached_separately(image_path, count_draws):
+    blur = make_blur()
+    pipeline = make_pipeline(image_path, blur)
+    calls = count_draws(blur)
+
+    preview, _ = pipeline.run_pipeline(preview=True)
+    full, _ = pipeline.run_pipeline()
+    assert len(calls) == 2
+
+    assert pipeline.run_pipeline(preview=True)[0] is preview
+    assert pipeline.run_pipeline()[0] is full
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("preview", [False, True])
+def test_normalize_full_size_of_preview(image_path, image, preview):
+    normalize = Normalize()
+    pipeline = make_pipeline(image_path, normalize)
+
+    pipeline.run_pipeline(preview=preview)
+
+    assert normalize._get_full_size() == image.size
+
+
+def test_normalize_full_size_of_region(image_path, image):
+    normalize = Normalize()
+    pipeline = make_pipeline(image_path, normalize)
+    # Normalize has no halo, so run_pipeline never gives it a region
+    pipeline._set_roi((10, 20, 30, 40))
+    normalize._draw(image[20:60, 10:40], None)
+
+    assert normalize._get_full_size() == image.size
+
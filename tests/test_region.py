@@ -0,0 +1,93 @@
+import numpy as np
+
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import CopyMakeBorder, GaussianBlur, MedianBlur, Sobel
+from models.window import Window
+
+
+def make_pipeline(image_path, *extra):
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 9
+    median = MedianBlur()
+    return Pipeline(
+        [
+            Window([LoadImage(str(image_path)), blur]),
+            Window([median, Sobel(), *extra]),
+        ]
+    )
+
+
+def test_halo_is_summed_over_processing_transforms(image_path):
+    pipeline = make_pipeline(image_path)
+
+    # 9 // 2 + 11 // 2 + 3 // 2
+    assert pipeline.get_halo() == 4 + 5 + 1
+
+    pipeline.get_transform(1, 0).enabled = False
+    assert pipeline.get_halo() == 4 + 1
+
+
+def test_non_local_transform_has_no_halo(image_path):
+    pipeline = make_pipeline(image_path, CopyMakeBorder())
+    for window in pipeline.windows:
+        window.visible_rect = (10, 10, 20, 20)
+
+    assert pipeline.get_halo() is None
+    assert pipeline.get_visible_rect() is None
+
+
+def test_visible_rect_is_union_of_windows(image_path):
+    pipeline = make_pipeline(image_path)
+    assert pipeline.get_visible_rect() is None
+
+    pipeline.windows[0].visible_rect = (-5, 10, 30, 20)
+    assert pipeline.get_visible_rect() is None
+
+    pipeline.windows[1].visible_rect = (20, 20, 40, 30)
+    assert pipeline.get_visible_rect() == (0, 10, 60, 40)
+
+    # Everything visible means the whole image is processed anyway
+    pipeline.windows[1].visible_rect = (0, 0, 160, 120)
+    assert pipeline.get_visible_rect() is None
+
+
+def test_region_matches_full_run_inside_region(image_path):
+    expected, _ = make_pipeline(image_path).run_pipeline()
+    pipeline = make_pipeline(image_path)
+    region = (40, 30, 50, 40)
+
+    out, _ = pipeline.run_pipeline(region=region)
+
+    halo = pipeline.get_halo()
+    roi = (40 - halo, 30 - halo, 50 + 2 * halo, 40 + 2 * halo)
+    assert pipeline.roi == roi
+    assert pipeline.windows[1].output.roi == roi
+    assert out.shape[:2] == (roi[3], roi[2])
+    np.testing.assert_array_equal(
+        out[halo:halo + 40, halo:halo + 50], expected[30:70, 40:90]
+    )
+
+
+def test_region_at_image_edge_is_clipped(image_path):
+    expected, _ = make_pipeline(image_path).run_pipeline()
+    pipeline = make_pipeline(image_path)
+
+    out, _ = pipeline.run_pipeline(region=(0, 0, 30, 20))
+
+    halo = pipeline.get_halo()
+    assert pipeline.roi == (0, 0, 30 + halo, 20 + halo)
+    np.testing.assert_array_equal(out[:20, :30], expected[:20, :30])
+
+
+def test_full_run_after_region_run(image_path):
+    expected, _ = make_pipeline(image_path).run_pipeline()
+    pipeline = make_pipeline(image_path)
+    pipeline.run_pipeline(region=(40, 30, 50, 40))
+
+    # Starting at a later transform still restarts from the source
+    out, _ = pipeline.run_pipeline(1, 1)
+
+    assert pipeline.roi is None
+    assert pipeline.windows[1].output.roi is None
+    np.testing.assert_array_equal(out, expected)
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+from models.base_transform import BaseTransform  # noqa: E402
+from models.pipeline import Pipeline  # noqa: E402
+from models.scheduler import PipelineScheduler  # noqa: E402
+from models.support_transforms import LoadImage  # noqa: E402
+from models.transforms import GaussianBlur, MedianBlur  # noqa: E402
+from utils.config_manager import config  # noqa: E402
+
+
+class Gate(BaseTransform):
+    """Passes its input on once ``release`` is set, so a run stays in flight"""
+
+    cacheable = False
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def draw(self, img_in, extra_in):
+        self.entered.set()
+        assert self.release.wait(5)
+        return img_in
+
+
+def wait_until(predicate, timeout=5.0):
+    """Process Qt events until ``predicate()`` is true"""
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "timed out"
+        QtCore.QCoreApplication.processEvents()
+        time.sleep(0.001)
+
+
+def make_scheduler(pipeline, monkeypatch, settle_interval=60000, max_dimension=None):
+    monkeypatch.setattr(config, "should_downscale_large_images", lambda: bool(max_dimension))
+    monkeypatch.setattr(config, "get_max_image_dimension", lambda: max_dimension)
+    scheduler = PipelineScheduler(pipeline, interval=20, settle_interval=settle_interval)
+    pipeline.set_scheduler(scheduler)
+    finished = []
+    scheduler.finished.connect(lambda: finished.append(pipeline.windows[0].output))
+    return scheduler, finished
+
+
+def record_runs(pipeline, monkeypatch):
+    """Return the (win_index, transform_index, preview, region, thread) of
+    every run started
+    """
+    runs = []
+    run_pipeline = pipeline.run_pipeline
+
+    def recording_run(win_index=0, transform_index=0, cancel_event=None, **kwargs):
+        runs.append(
+            (
+                win_index,
+                transform_index,
+                kwargs.get("preview"),
+                kwargs.get("region"),
+                threading.current_thread(),
+            )
+        )
+        return run_pipeline(win_index, transform_index, cancel_event, **kwargs)
+
+    monkeypatch.setattr(pipeline, "run_pipeline", recording_run)
+    return runs
+
+
+def make_pipeline(image_path):
+    blur = GaussianBlur()
+    blur.k_size_x = blur.k_size_y = 5
+    return Pipeline([LoadImage(str(image_path)), blur, MedianBlur()])
+
+
+@pytest.fixture
+def pipeline(image_path):
+    """A pipeline that has been run once, as the GUI does when it opens"""
+    pipeline = make_pipeline(image_path)
+    pipeline.run_pipeline()
+    return pipeline
+
+
+def test_requests_are_coalesced_into_one_run(app, pipeline, monkeypatch):
+    scheduler, finished = make_scheduler(pipeline, monkeypatch)
+    runs = record_runs(pipeline, monkeypatch)
+
+    scheduler.request_run(0, 2)
+    scheduler.request_run(0, 1)
+    scheduler.request_run(0, 2)
+    assert scheduler.has_pending()
+    wait_until(lambda: finished)
+
+    assert [run[:2] for run in runs] == [(0, 1)]
+    assert not scheduler.has_pending() and not scheduler.is_running()
+
+
+def test_runs_on_a_worker_thread(app, image_path, pipeline, monkeypatch):
+    scheduler, finished = make_scheduler(pipeline, monkeypatch)
+    runs = record_runs(pipeline, monkeypatch)
+
+    pipeline.windows[0].transforms[2].k_size = 5
+    pipeline.request_run(0, 2)
+    wait_until(lambda: finished)
+
+    assert runs[0][4] is not threading.main_thread()
+    expected = make_pipeline(image_path)
+    expected.windows[0].transforms[2].k_size = 5
+    np.testing.assert_array_equal(finished[0].image, expected.run_pipeline()[0])
+
+
+def test_request_during_run_cancels_and_restarts_it(app, image_path, monkeypatch):
+    gate, median = Gate(), MedianBlur()
+    pipeline = Pipeline([LoadImage(str(image_path)), gate, median])
+    gate.release.set()
+    pipeline.run_pipeline()
+    gate.entered.clear()
+    gate.release.clear()
+    scheduler, finished = make_scheduler(pipeline, monkeypatch)
+    runs = record_runs(pipeline, monkeypatch)
+
+    gate.dirty = True
+    scheduler.request_run(0, 1)
+    scheduler.flush()
+    assert gate.entered.wait(5)
+    assert scheduler.is_running()
+
+    # A param change while the run is in flight
+    median.k_size = 3
+    scheduler.request_run(0, 2)
+    gate.release.set()
+    wait_until(lambda: finished)
+
+    assert [run[:2] for run in runs] == [(0, 1), (0, 1)]
+    assert len(finished) == 1
+    expected = Pipeline([LoadImage(str(image_path)), MedianBlur()])
+    expected.windows[0].transforms[1].k_size = 3
+    np.testing.assert_array_equal(finished[0].image, expected.run_pipeline()[0])
+
+
+def test_cancel_drops_pending_run(app, pipeline, monkeypatch):
+    scheduler, finished = make_scheduler(pipeline, monkeypatch)
+    runs = record_runs(pipeline, monkeypatch)
+
+    scheduler.request_run(0, 1)
+    scheduler.cancel()
+    deadline = time.monotonic() + 0.1
+    wait_until(lambda: time.monotonic() > deadline)
+
+    assert runs == [] and finished == []
+
+
+def test_preview_then_full_resolution_pass(app, pipeline, monkeypatch):
+    scheduler, finished = make_scheduler(
+        pipeline, monkeypatch, settle_interval=20, max_dimension=80
+    )
+    runs = record_runs(pipeline, monkeypatch)
+    assert pipeline.preview_max_dimension == 80
+
+    pipeline.windows[0].transforms[2].k_size = 5
+    pipeline.request_run(0, 2)
+    wait_until(lambda: len(finished) == 2)
+
+    assert [run[2] for run in runs] == [True, False]
+    assert finished[0].scale == 0.5
+    assert finished[0].image.shape[:2] == (60, 80)
+    assert finished[1].scale == 1.0
+    assert finished[1].image.shape[:2] == (120, 160)
+
+
+def test_previews_are_full_size_without_downscaling(app, pipeline, monkeypatch):
+    make_scheduler(pipeline, monkeypatch, max_dimension=None)
+
+    assert pipeline.get_preview_scale() == 1.0
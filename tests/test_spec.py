@@ -0,0 +1,102 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from models import spec
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transform_windows import _TRANS_WINDOWS, get_transform_window
+from models.transforms import CopyMakeBorder, Filter2D, GaussianBlur, InRangeRaw
+from models.window import Window
+
+
+def make_pipeline(image_path):
+    """Two windows with every kind of Param state changed from its default"""
+    blur = GaussianBlur()
+    blur.k_size_x = 7
+    blur.sigma_x = 2.5
+    filter2d = Filter2D()
+    filter2d._kernel.set_state((np.arange(9, dtype=float).reshape(3, 3) / 36, (0, 1)))
+    border = CopyMakeBorder()
+    border.border_type = 0  # BORDER_CONSTANT
+    border.border_val = (10, 20, 30)
+    in_range = InRangeRaw()
+    in_range.ch1 = {"top": 10, "bot": 200}
+    in_range.enabled = False
+    return Pipeline(
+        [
+            Window([LoadImage(str(image_path)), blur, filter2d], name="First"),
+            Window([border, in_range], name="Second"),
+        ]
+    )
+
+
+def test_save_load_round_trip(image_path, tmp_path):
+    pipeline = make_pipeline(image_path)
+    expected, _ = pipeline.run_pipeline()
+    path = tmp_path / "pipeline.json"
+
+    pipeline.save(path)
+    loaded = Pipeline.load(path)
+
+    assert loaded.to_spec() == pipeline.to_spec()
+    assert [w.name for w in loaded.windows] == ["First", "Second"]
+    assert not loaded.get_transform(1, 1).enabled
+    assert loaded.get_transform(0, 2)._kernel.anchor == (0, 1)
+    np.testing.assert_array_equal(loaded.run_pipeline()[0], expected)
+
+
+def test_spec_is_plain_json(image_path):
+    pipeline_spec = make_pipeline(image_path).to_spec()
+
+    assert json.loads(json.dumps(pipeline_spec)) == pipeline_spec
+    assert pipeline_spec["version"] == spec.SPEC_VERSION
+    transform = pipeline_spec["windows"][0]["transforms"][1]
+    assert transform["class"] == "models.transforms.GaussianBlur"
+    assert transform["params"]["k_size_x"] == 7
+
+
+@pytest.mark.parametrize("name", sorted(t.__name__ for t in _TRANS_WINDOWS))
+def test_builtin_pipelines_round_trip(name, image_path):
+    transform = next(t for t in _TRANS_WINDOWS if t.__name__ == name)
+    pipeline = Pipeline(get_transform_window(transform, str(image_path)))
+    np.random.seed(0)
+    expected, _ = pipeline.run_pipeline()
+
+    loaded = Pipeline.from_spec(json.loads(json.dumps(pipeline.to_spec())))
+    np.random.seed(0)
+    out, _ = loaded.run_pipeline()
+
+    assert loaded.to_spec() == pipeline.to_spec()
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_image_path_replaces_the_loaders_image(image_path, tmp_path, image):
+    other = tmp_path / "other.png"
+    cv2.imwrite(str(other), 255 - image)
+    pipeline_spec = make_pipeline(image_path).to_spec()
+
+    loaded = Pipeline.from_spec(pipeline_spec, image_path=other)
+
+    assert loaded.get_transform(0, 0).path == str(other)
+    np.testing.assert_array_equal(loaded.get_transform(0, 0).img, 255 - image)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda s: s.update(version=spec.SPEC_VERSION + 1),
+        lambda s: s.update(windows=[]),
+        lambda s: s["windows"][0]["transforms"][1].update({"class": "models.nope.Blur"}),
+        lambda s: s["windows"][0]["transforms"][1].update({"class": "json.JSONDecoder"}),
+        lambda s: s["windows"][0]["transforms"][1]["params"].update(nope=1),
+    ],
+)
+def test_bad_spec_is_refused(image_path, change):
+    pipeline_spec = make_pipeline(image_path).to_spec()
+    change(pipeline_spec)
+
+    with pytest.raises(spec.SpecError):
+        Pipeline.from_spec(pipeline_spec)
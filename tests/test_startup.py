@@ -0,0 +1,76 @@
+import io
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from utils.startup_profile import StartupProfiler
+
+from .test_headless import SRC_DIR
+
+
+def test_disabled_profiler_records_nothing():
+    stream = io.StringIO()
+    profiler = StartupProfiler(stream=stream)
+
+    profiler.mark("imports")
+    profiler.report()
+    profiler.watch_first_paint(None)
+
+    assert profiler.marks == [] and stream.getvalue() == ""
+
+
+def test_report_lists_steps_in_order():
+    stream = io.StringIO()
+    profiler = StartupProfiler(enabled=True, stream=stream)
+
+    profiler.mark("imports")
+    profiler.mark("main window")
+    profiler.report()
+
+    assert [label for label, _ in profiler.marks] == ["imports", "main window"]
+    assert profiler.marks[0][1] <= profiler.marks[1][1]
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "Startup profile (ms):"
+    assert [line.split()[0] for line in lines[1:]] == ["imports", "main"]
+
+
+def test_first_paint_prints_the_report(app):
+    QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+    stream = io.StringIO()
+    profiler = StartupProfiler(enabled=True, stream=stream)
+    widget = QtWidgets.QWidget()
+
+    profiler.watch_first_paint(widget)
+    widget.show()
+    for _ in range(2):
+        widget.repaint()
+        app.processEvents()
+    widget.close()
+
+    assert [label for label, _ in profiler.marks] == ["first paint"]
+    assert "first paint" in stream.getvalue()
+
+
+def test_importing_docs_renders_nothing():
+    script = textwrap.dedent(
+        """
+        import sys
+        from docs import doc_writer
+        from models import transform_windows
+        transform_windows.collect_builtin_transforms()
+        print(doc_writer._env is None, "jinja2" in sys.modules)
+        """
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", "False"]
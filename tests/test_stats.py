@@ -0,0 +1,93 @@
+import tracemalloc
+
+import numpy as np
+
+from models.base_transform import BaseTransform
+from models.pipeline import Pipeline
+from models.stats import DrawStats, StatsRecorder, format_table
+from models.support_transforms import LoadImage
+from models.transforms import GaussianBlur, MedianBlur
+
+
+class PassThrough(BaseTransform):
+    def draw(self, img_in, extra_in):
+        return img_in
+
+
+def make_stats(wall_time, allocated=0, cached=False):
+    return DrawStats(
+        wall_time, wall_time / 2, (4, 4), "uint8", (4, 4), "uint8", allocated, None, cached
+    )
+
+
+def test_recorder_measures_new_arrays(image):
+    img_out = image.astype(np.float32)
+
+    stats = StatsRecorder().finish(image, img_out, cached=False)
+
+    assert stats.wall_time >= 0 and stats.cpu_time >= 0
+    assert (stats.in_shape, stats.in_dtype) == (image.shape, "uint8")
+    assert (stats.out_shape, stats.out_dtype) == (image.shape, "float32")
+    assert stats.allocated == img_out.nbytes
+    assert stats.peak_allocated is None
+
+
+def test_views_and_cached_results_allocate_nothing(image):
+    assert StatsRecorder().finish(image, image[10:], cached=False).allocated == 0
+    assert StatsRecorder().finish(image, image.copy(), cached=True).allocated == 0
+    assert StatsRecorder().finish(image, None, cached=False).out_shape is None
+
+
+def test_recorder_reports_peak_while_tracing():
+    tracemalloc.start()
+    try:
+        recorder = StatsRecorder()
+        data = np.ones(10 ** 6, dtype=np.uint8)
+        stats = recorder.finish(None, data, cached=False)
+    finally:
+        tracemalloc.stop()
+
+    assert stats.peak_allocated >= 10 ** 6
+
+
+def test_pipeline_stats(image_path):
+    pipeline = Pipeline([LoadImage(str(image_path)), GaussianBlur(), PassThrough()])
+    pipeline.get_transform(0, 1).enabled = False
+    pipeline.run_pipeline()
+
+    rows = pipeline.get_stats()
+
+    assert [t.__class__.__name__ for t, _ in rows] == ["LoadImage", "PassThrough"]
+    assert all(not s.cached for _, s in rows)
+    assert rows[1][1].allocated == 0
+
+    pipeline.get_transform(0, 2).dirty = True
+    pipeline.run_pipeline(0, 2)
+    assert pipeline.get_transform(0, 2).stats.cached
+
+
+def test_format_stats_lists_slowest_first(image_path):
+    pipeline = Pipeline([LoadImage(str(image_path)), GaussianBlur(), MedianBlur()])
+    pipeline.run_pipeline()
+    for transform, wall_time in zip(pipeline.windows[0].transforms, (1, 3, 2)):
+        transform.stats = make_stats(wall_time)
+
+    lines = pipeline.format_stats().splitlines()
+
+    assert [line.split()[0] for line in lines] == [
+        "GaussianBlur", "MedianBlur", "LoadImage", "Total"
+    ]
+
+
+def test_format_table():
+    table = format_table(
+        [("Blur", make_stats(0.0125, 2048)), ("Median", make_stats(0.5, 512, True))]
+    )
+
+    assert table.splitlines() == [
+        "Blur    12.5 ms wall, 6.2 ms cpu, 4x4 uint8 -> 4x4 uint8, 2.0 KB allocated",
+        "Median  500.0 ms wall, 250.0 ms cpu, 4x4 uint8 -> 4x4 uint8, 512 B allocated"
+        " (cached)",
+        "Total   512.5 ms wall, 2.5 KB allocated",
+    ]
+    assert format_table([]) == ""
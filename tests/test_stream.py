@@ -0,0 +1,108 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from models.pipeline import Pipeline
+from models.stream import StreamRunner
+from models.support_transforms import LoadImage, VideoSource
+from models.transforms import GaussianBlur
+
+
+@pytest.fixture
+def frames(tmp_path):
+    """printf style path of a sequence of four noisy frames, and the frames"""
+    rng = np.random.default_rng(1)
+    imgs = []
+    for i in range(4):
+        img = rng.integers(0, 256, (32, 48, 3), dtype=np.uint8)
+        cv2.imwrite(str(tmp_path / f"frame_{i:04d}.png"), img)
+        imgs.append(img)
+    return str(tmp_path / "frame_%04d.png"), imgs
+
+
+def test_video_source_reads_frames(frames):
+    path, imgs = frames
+    source = VideoSource(path, loop=False)
+
+    np.testing.assert_array_equal(source.img, imgs[0])
+    assert source.frame_index == 0
+    read = [source.read_frame() for _ in range(4)]
+    for frame, img in zip(read, imgs[1:]):
+        np.testing.assert_array_equal(frame, img)
+    assert read[3] is None
+
+
+def test_video_source_loops(frames):
+    path, imgs = frames
+    source = VideoSource(path)
+
+    read = [source.read_frame() for _ in range(4)]
+
+    np.testing.assert_array_equal(read[3], imgs[0])
+
+
+def test_set_frame_reruns_the_pipeline(frames):
+    path, imgs = frames
+    source, blur = VideoSource(path), GaussianBlur()
+    pipeline = Pipeline([source, blur])
+    pipeline.run_pipeline()
+
+    source.set_frame(source.read_frame())
+    out, _ = pipeline.run_pipeline()
+
+    assert source.frame_index == 1
+    np.testing.assert_array_equal(out, blur.draw(imgs[1], None))
+
+
+def test_stream_processes_every_frame(frames, monkeypatch):
+    path, imgs = frames
+    source, blur = VideoSource(path, loop=False), GaussianBlur()
+    pipeline = Pipeline([source, blur])
+    runner = StreamRunner(pipeline, realtime=False)
+    outputs = []
+    run_pipeline = pipeline.run_pipeline
+
+    def recording_run(*args, **kwargs):
+        outputs.append(run_pipeline(*args, **kwargs)[0])
+
+    monkeypatch.setattr(pipeline, "run_pipeline", recording_run)
+
+    runner.start()
+    end = time.monotonic() + 10
+    while runner.is_running():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+    assert runner.stats.decoded == runner.stats.processed == 3
+    assert runner.stats.dropped == 0
+    assert len(outputs) == 3
+    for out, img in zip(outputs, imgs[1:]):
+        np.testing.assert_array_equal(out, blur.draw(img, None))
+
+
+def test_requests_are_dropped_while_streaming(frames, monkeypatch):
+    path, _ = frames
+    pipeline = Pipeline([VideoSource(path), GaussianBlur()])
+    runner = StreamRunner(pipeline)
+    runs = []
+    monkeypatch.setattr(pipeline, "run_pipeline", lambda *args: runs.append(args))
+
+    runner.start()
+    try:
+        assert runner.is_running()
+        pipeline.request_run(0, 1)
+    finally:
+        runner.stop(timeout=5)
+    assert not runner.is_running()
+
+    # Frames run from the start; the request didn't run at all
+    assert (0, 1) not in runs
+    pipeline.request_run(0, 1)
+    assert runs[-1] == (0, 1)
+
+
+def test_stream_needs_a_video_source(image_path):
+    with pytest.raises(TypeError):
+        StreamRunner(Pipeline([LoadImage(str(image_path)), GaussianBlur()]))
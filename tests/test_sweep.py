@@ -0,0 +1,197 @@
+import csv
+
+import cv2
+import numpy as np
+import pytest
+
+from models import sweep
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.sweep import SweepAxis, SweepError
+from models.transforms import Canny, GaussianBlur, InRangeRaw
+
+
+def make_pipeline(image_path):
+    """load -> blur -> canny, with thresholds that find some edges"""
+    canny = Canny()
+    canny.threshold1, canny.threshold2 = 50, 150
+    return Pipeline([LoadImage(str(image_path)), GaussianBlur(), canny])
+
+
+def expected_metrics(image_path, axes, values):
+    """Metrics of a fresh pipeline with ``values`` set, run directly"""
+    pipeline = make_pipeline(image_path)
+    sweep.apply_values(pipeline, axes, values)
+    img, extra = pipeline.run_pipeline()
+    return {name: metric(img, extra) for name, metric in sweep.METRICS.items()}
+
+
+def test_param_values():
+    blur, canny, in_range = GaussianBlur(), Canny(), InRangeRaw()
+
+    assert sweep.get_param_values(canny._aperture_size) == (3, 5, 7)
+    assert sweep.get_param_values(blur._k_size_x, steps=3) == (1, 49, 99)
+    assert sweep.get_param_values(blur._sigma_x, steps=4) == (0.1, 3.4, 6.7, 10.0)
+    assert sweep.get_param_values(canny._use_l2_gradient) == (False, True)
+    assert sweep.get_param_values(blur._border_type)[0] == cv2.BORDER_CONSTANT
+    assert sweep.get_param_values(in_range._ch1, steps=3) == (
+        (0, 0), (0, 128), (0, 255), (128, 128), (128, 255), (255, 255)
+    )
+    assert "ch1" in sweep.get_sweepable_params(in_range)
+
+
+def test_slider_pair_values_round_trip():
+    in_range = InRangeRaw()
+
+    sweep.set_param_value(in_range, "ch2", (10, 20))
+
+    assert in_range.ch2 == {"top": 10, "bot": 20}
+    assert sweep.get_param_value(in_range, "ch2") == (10, 20)
+    assert in_range.dirty
+
+
+def test_parse_axis(image_path):
+    pipeline = make_pipeline(image_path)
+
+    axis = sweep.parse_axis(pipeline, "0.2.threshold1=50:200:50")
+    assert axis == SweepAxis(0, 2, "threshold1", (50, 100, 150, 200))
+    assert axis.label == "0.2.threshold1"
+
+    assert sweep.parse_axis(pipeline, "0.1.sigma_x=0.5,2").values == (0.5, 2)
+    assert sweep.parse_axis(pipeline, "0.2.aperture_size").values == (3, 5, 7)
+    assert len(sweep.parse_axis(pipeline, "0.2.threshold1", steps=5).values) == 5
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["threshold1", "0.2", "0.5.threshold1", "0.2.nope", "0.2.threshold1=a:b:c",
+     "0.2.threshold1=0:10:0"],
+)
+def test_bad_axis_is_refused(image_path, text):
+    with pytest.raises(SweepError):
+        sweep.parse_axis(make_pipeline(image_path), text)
+
+
+def make_axes(pipeline):
+    return [
+        sweep.parse_axis(pipeline, "0.2.threshold1=20,80"),
+        sweep.parse_axis(pipeline, "0.1.k_size_x=1,5,9"),
+    ]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_sweep_matches_direct_runs(image_path, workers):
+    pipeline = make_pipeline(image_path)
+    pipeline_spec = pipeline.to_spec()
+    axes = make_axes(pipeline)
+
+    results = sorted(sweep.run_sweep(pipeline, axes, workers=workers, thumbnail_size=40))
+
+    assert sweep.count_combinations(axes) == len(results) == 6
+    assert sorted(r.values for r in results) == sorted(
+        (t, k) for t in (20, 80) for k in (1, 5, 9)
+    )
+    for result in results:
+        assert result.error is None
+        assert result.metrics == expected_metrics(image_path, axes, result.values)
+        assert result.thumbnail.shape == (30, 40)
+    # The swept pipeline is left as it was
+    assert pipeline.to_spec() == pipeline_spec
+
+
+def test_earlier_transforms_vary_slowest(image_path):
+    pipeline = make_pipeline(image_path)
+    axes = make_axes(pipeline)
+
+    results = sorted(sweep.run_sweep(pipeline, axes, workers=0, thumbnail_size=None))
+
+    # The blur is the earlier transform, so it changes least often
+    assert [r.values for r in results] == [
+        (20, 1), (80, 1), (20, 5), (80, 5), (20, 9), (80, 9)
+    ]
+    assert all(r.thumbnail is None for r in results)
+
+
+def test_failed_combination_is_reported(image_path):
+    pipeline = make_pipeline(image_path)
+    axes = [sweep.make_axis(pipeline, 0, 2, "aperture_size", values=[3, 4])]
+
+    results = sorted(sweep.run_sweep(pipeline, axes, metrics=["mean"], workers=0))
+
+    assert results[0].error is None and results[0].metrics
+    assert "Canny" in results[1].error
+    assert results[1].metrics == {} and results[1].thumbnail is None
+
+
+def test_cancelled_sweep_stops(image_path):
+    class CancelAfterFirst:
+        def __init__(self):
+            self.calls = 0
+
+        def is_set(self):
+            self.calls += 1
+            return self.calls > 1
+
+    pipeline = make_pipeline(image_path)
+    results = list(
+        sweep.run_sweep(pipeline, make_axes(pipeline), workers=0, cancel_event=CancelAfterFirst())
+    )
+
+    assert len(results) == 1
+
+
+def test_write_csv(tmp_path, image_path):
+    pipeline = make_pipeline(image_path)
+    axes = make_axes(pipeline)
+    results = list(sweep.run_sweep(pipeline, axes, metrics=["nonzero"], workers=0))
+    path = tmp_path / "sweep.csv"
+
+    sweep.write_csv(path, axes, results[::-1])
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["0.2.threshold1", "0.1.k_size_x", "nonzero", "seconds", "error"]
+    assert [row[:2] for row in rows[1:]] == [
+        [str(t), str(k)] for k in (1, 5, 9) for t in (20, 80)
+    ]
+    by_index = sorted(results)
+    assert [float(row[2]) for row in rows[1:]] == [
+        r.metrics["nonzero"] for r in by_index
+    ]
+
+
+def test_mask_iou():
+    target = np.zeros((10, 10), dtype=np.uint8)
+    target[:, :5] = 255
+    iou = sweep.MaskIoU(target)
+
+    found = np.zeros((10, 10), dtype=np.uint8)
+    found[:, 2:8] = 1
+    assert iou(found, None) == pytest.approx(30 / 80)
+    assert iou(np.zeros((10, 10), np.uint8), None) == 0
+    # The mask is resized to previews
+    assert iou(np.full((5, 5), 255, np.uint8), None) == pytest.approx(0.6)
+
+
+def test_get_metric():
+    assert sweep.get_metric("mean") is sweep.METRICS["mean"]
+    assert sweep.get_metric("numpy:mean") is np.mean
+    with pytest.raises(SweepError):
+        sweep.get_metric("nope")
+
+
+def test_sweep_cli(tmp_path, image_path):
+    pytest.importorskip("PySide6.QtGui")
+    import sweep as sweep_cli
+
+    output, thumbnails = tmp_path / "sweep.csv", tmp_path / "thumbs"
+    argv = ["--pipeline", "Canny", "--image", str(image_path), "--workers", "0"]
+    argv += ["--axis", "0.1.threshold1=0:200:100", "--metric", "nonzero"]
+    argv += ["--output", str(output), "--thumbnails", str(thumbnails)]
+
+    assert sweep_cli.main(argv) == 0
+
+    assert len(output.read_text().splitlines()) == 4
+    assert sorted(p.name for p in thumbnails.iterdir()) == [
+        "00000_threshold1=0.png", "00001_threshold1=100.png", "00002_threshold1=200.png"
+    ]
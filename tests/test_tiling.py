@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from models import tiling
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import GaussianBlur, MedianBlur, Normalize
+
+
+def make_pipeline(image_path, *transforms):
+    if not transforms:
+        blur = GaussianBlur()
+        blur.k_size_x = blur.k_size_y = 9
+        transforms = (blur, MedianBlur())
+    return Pipeline([LoadImage(str(image_path)), *transforms])
+
+
+def test_tiles_cover_the_image():
+    tiles = list(tiling.iter_tiles(50, 70, 32))
+
+    covered = np.zeros((50, 70), dtype=int)
+    for x, y, width, height in tiles:
+        covered[y : y + height, x : x + width] += 1
+    assert len(tiles) == 6
+    assert (covered == 1).all()
+
+
+def test_grow_rect_is_clipped():
+    assert tiling.grow_rect((0, 10, 20, 20), 5, 40, 30) == (0, 5, 25, 30)
+
+
+@pytest.mark.parametrize("tile_size, workers", [(32, 1), (32, 4), (50, 2), (1000, 2)])
+def test_tiled_output_equals_whole_image_output(image_path, image, tile_size, workers):
+    pipeline = make_pipeline(image_path)
+    expected, _ = pipeline.run_pipeline()
+
+    out = pipeline.run_tiled(image, tile_size=tile_size, workers=workers)
+
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_tiled_output_into_memory_mapped_dst(image_path, image, tmp_path):
+    pipeline = make_pipeline(image_path)
+    expected, _ = pipeline.run_pipeline()
+    src_path, dst_path = tmp_path / "src.npy", tmp_path / "dst.npy"
+    np.save(src_path, image)
+    src = np.load(src_path, mmap_mode="r")
+    dst = np.lib.format.open_memmap(
+        dst_path, mode="w+", dtype=image.dtype, shape=image.shape
+    )
+
+    assert pipeline.run_tiled(src, dst, tile_size=40) is dst
+    dst.flush()
+
+    np.testing.assert_array_equal(np.load(dst_path), expected)
+
+
+def test_tiled_run_after_preview_is_full_resolution(image_path, image):
+    pipeline = make_pipeline(image_path)
+    pipeline.set_preview_max_dimension(80)
+    pipeline.run_pipeline(preview=True)
+
+    out = pipeline.run_tiled(image, tile_size=32)
+
+    expected, _ = make_pipeline(image_path).run_pipeline()
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_tiled_run_after_region_run_is_whole_image(image_path, image):
+    pipeline = make_pipeline(image_path)
+    pipeline.run_pipeline(region=(10, 10, 40, 40))
+    assert pipeline.roi is not None
+
+    out = pipeline.run_tiled(image, tile_size=32)
+
+    expected, _ = make_pipeline(image_path).run_pipeline()
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_transform_needing_whole_image_is_refused(image_path, image):
+    pipeline = make_pipeline(image_path, Normalize())
+
+    with pytest.raises(tiling.TilingError):
+        pipeline.run_tiled(image, tile_size=32)
+
+
+def test_dst_of_wrong_shape_is_refused(image_path, image):
+    pipeline = make_pipeline(image_path)
+
+    with pytest.raises(tiling.TilingError):
+        pipeline.run_tiled(image, np.empty((10, 10, 3), np.uint8), tile_size=32)
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from models.pipeline import Pipeline
+from models.support_transforms import LoadImage
+from models.transforms import GaussianBlur, MedianBlur
+from models.window import PipelineCancelled, Window, WindowOutput
+
+
+@pytest.fixture
+def pipeline(image_path):
+    """Two windows, so the first one's output can be left unchanged"""
+    return Pipeline(
+        [
+            Window([LoadImage(str(image_path)), GaussianBlur()]),
+            Window([MedianBlur()]),
+        ]
+    )
+
+
+def count_updates(window):
+    updates = []
+    window.image_updated.connect(lambda: updates.append(window.output))
+    return updates
+
+
+def test_output_is_published_with_its_generation(pipeline):
+    window = pipeline.windows[0]
+    updates = count_updates(window)
+
+    pipeline.run_pipeline()
+
+    assert isinstance(window.output, WindowOutput)
+    assert updates == [window.output]
+    assert window.output.image is window.last_out
+    assert window.output.image.shape == window.transforms[0].img.shape
+    assert (window.output.scale, window.output.roi) == (1.0, None)
+    assert window.output.generation == window.output_generation == 1
+
+
+def test_unchanged_window_is_not_updated(pipeline):
+    first, second = pipeline.windows
+    pipeline.run_pipeline()
+    first_updates, second_updates = count_updates(first), count_updates(second)
+    output = first.output
+
+    second.transforms[0].k_size = 3
+    pipeline.run_pipeline(1, 0)
+
+    assert first_updates == []
+    assert first.output is output
+    assert len(second_updates) == 1
+    assert second.output.generation == 2
+
+
+def test_published_output_keeps_its_scale(pipeline):
+    window = pipeline.windows[0]
+    rows, cols = window.transforms[0].get_source_size()
+    pipeline.set_preview_max_dimension(max(rows, cols) // 2)
+
+    pipeline.run_pipeline(preview=True)
+    preview = window.output
+    pipeline.run_pipeline()
+
+    # What the view read before the next run still pairs image and scale
+    assert preview.scale == 0.5
+    assert preview.image.shape[:2] == (rows // 2, cols // 2)
+    assert window.output.scale == 1.0
+    assert window.output.image.shape[:2] == (rows, cols)
+    assert window.output.generation == preview.generation + 1
+
+
+def test_cancelled_run_leaves_output_untouched(pipeline):
+    window = pipeline.windows[1]
+    pipeline.run_pipeline()
+    output = window.output
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    window.transforms[0].k_size = 3
+    with pytest.raises(PipelineCancelled):
+        pipeline.run_pipeline(1, 0, cancel_event=cancel_event)
+    assert window.output is output